@@ -0,0 +1,151 @@
+import asyncio
+
+from discord import Embed, HTTPException
+
+from logger_config import main_logger
+
+ALERT_QUEUE_SIZE = 100
+ALERT_WINDOW = 2.0  # Alerts arriving within this many seconds share one embed
+
+# Discord embed limits
+EMBED_MAX_FIELDS = 25
+EMBED_FIELD_MAX_CHARS = 1024
+EMBED_MAX_CHARS = 6000
+
+
+class AlertDispatcher:
+    """
+    Sends alerts to Discord from its own task so callers never wait on the API.
+
+    `submit()` only enqueues. The dispatcher collects alerts for ALERT_WINDOW
+    seconds, merges them into one embed per channel and backs off when Discord
+    answers with a rate limit. When the queue is full the oldest alert is dropped.
+    """
+
+    def __init__(self, bot, routes, window=ALERT_WINDOW, maxsize=ALERT_QUEUE_SIZE):
+        self.bot = bot
+        self.routes = routes  # route name -> channel ID
+        self.window = window
+
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.channels = {}
+        self.retry_at = {}  # channel ID -> loop time when sending may resume
+        self.task = None
+
+    def submit(self, message, route="entry", title="🚨 Alert"):
+        alert = (route, title, message)
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.dropped += 1
+            main_logger.warning(f"Alert queue full, dropped oldest ({self.dropped}).")
+            self.queue.put_nowait(alert)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def run(self):
+        while True:
+            batch = await self.collect()
+
+            by_channel = {}
+            for route, title, message in batch:
+                channel_id = self.routes.get(route)
+                if channel_id is None:
+                    main_logger.error(f"No channel configured for alert route {route}")
+                    continue
+                by_channel.setdefault(channel_id, []).append((title, message))
+
+            for channel_id, alerts in by_channel.items():
+                try:
+                    for embed in self.build_embeds(alerts):
+                        await self.send(channel_id, embed)
+                except Exception as e:
+                    main_logger.exception(f"Dispatching alerts failed: {e}")
+
+    async def collect(self):
+        loop = asyncio.get_running_loop()
+
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.window
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def build_embeds(self, alerts):
+        embeds = []
+        embed = None
+        size = 0
+
+        for title, message in alerts:
+            value = f"```{message}```"
+            if len(value) > EMBED_FIELD_MAX_CHARS:
+                value = value[: EMBED_FIELD_MAX_CHARS - 6] + "…```"
+
+            if (
+                embed is None
+                or len(embed.fields) >= EMBED_MAX_FIELDS
+                or size + len(title) + len(value) > EMBED_MAX_CHARS
+            ):
+                embed = Embed(color=0xFF0000)
+                embeds.append(embed)
+                size = 0
+
+            embed.add_field(name=title, value=value, inline=False)
+            size += len(title) + len(value)
+
+        for embed in embeds:
+            embed.title = f"{len(embed.fields)} new alert(s)"
+
+        return embeds
+
+    async def get_channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                channel = await self.bot.fetch_channel(channel_id)
+            self.channels[channel_id] = channel
+        return channel
+
+    async def send(self, channel_id, embed, attempts=3):
+        loop = asyncio.get_running_loop()
+
+        for _ in range(attempts):
+            delay = self.retry_at.get(channel_id, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                channel = await self.get_channel(channel_id)
+                await channel.send(embed=embed)
+                return True
+            except HTTPException as e:
+                if e.status != 429:
+                    main_logger.error(f"Sending alert to {channel_id} failed: {e}")
+                    return False
+
+                retry_after = float(e.response.headers.get("Retry-After", 1))
+                self.retry_at[channel_id] = loop.time() + retry_after
+                main_logger.warning(
+                    f"Rate limited on channel {channel_id}, retrying in {retry_after}s."
+                )
+            except Exception as e:
+                # Anything else only loses this alert, never the dispatcher
+                main_logger.exception(f"Sending alert to {channel_id} failed: {e}")
+                return False
+
+        main_logger.error(f"Giving up on alert for channel {channel_id}.")
+        return False
@@ -0,0 +1,77 @@
+"""
+Memory and CSV size of full indicator frames vs CompactCandles.
+
+    python benchmarks/candle_memory.py --rows 100000 --decimals 1
+
+Also prints the largest decoding error per column, to check against the bounds
+documented in bitget/compact.py.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bitget.compact import FRAME_COLUMNS, CompactCandles  # noqa: E402
+from bitget.utils import convert_to_dataframe  # noqa: E402
+
+
+def random_walk_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Prices on BTCUSDT's 0.1 tick
+    closes = np.round(27000 + np.cumsum(rng.normal(0, 15, n)), 1)
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    highs = np.maximum(opens, closes) + np.round(np.abs(rng.normal(0, 5, n)), 1)
+    lows = np.minimum(opens, closes) - np.round(np.abs(rng.normal(0, 5, n)), 1)
+    volumes = np.abs(rng.normal(2, 1, n))
+    timestamps = 1695772800000 + np.arange(n) * 60_000
+    return [list(row) for row in zip(timestamps, opens, highs, lows, closes, volumes)]
+
+
+def file_size(write):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "candles.csv")
+        write(path)
+        return os.path.getsize(path)
+
+
+def report(label, before, after):
+    print(
+        f"  {label + ':':<8}{before / 2**20:8.1f} MiB -> {after / 2**20:6.1f} MiB "
+        f"({before / after:.1f}x less)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--decimals", type=int, default=None)
+    args = parser.parse_args()
+
+    df = convert_to_dataframe(random_walk_candles(args.rows))
+    compact = CompactCandles.from_frame(df, price_decimals=args.decimals)
+
+    full_bytes = df.memory_usage(deep=True, index=True).sum()
+    full_csv = file_size(df.to_csv)
+    compact_csv = file_size(compact.to_csv)
+
+    print(f"{args.rows} rows, prices as {compact.prices.dtype}")
+    report("memory", full_bytes, compact.nbytes)
+    report("csv", full_csv, compact_csv)
+
+    decoded = compact.to_frame()
+    print("  max |error| per column:")
+    for name in FRAME_COLUMNS:
+        if name == "Timestamp":
+            continue
+        error = np.nanmax(np.abs(decoded[name].to_numpy() - df[name].to_numpy()))
+        print(f"    {name:<18} {error:.3g}")
+
+
+if __name__ == "__main__":
+    main()
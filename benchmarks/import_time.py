@@ -0,0 +1,68 @@
+"""
+Import-time report, based on `python -X importtime`.
+
+    python benchmarks/import_time.py            # main and the lazily imported modules
+    python benchmarks/import_time.py plot -n 20
+
+For each module this prints the total import time in a fresh interpreter and
+the slowest packages it pulls in (cumulative time, top-level packages only).
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["main", "bitget.trader", "bitget.utils", "plot"]
+
+
+def import_times(module):
+    """{module name: (self us, cumulative us, depth)} for one fresh import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def report(module, top=10):
+    times = import_times(module)
+    total = times[module][1]
+    print(f"{module}: {total / 1000:.1f} ms")
+
+    # Only the first level below the module, so packages are not counted twice
+    children = [
+        (cumulative, name)
+        for name, (_, cumulative, depth) in times.items()
+        if depth == 1 and name != module
+    ]
+    for cumulative, name in sorted(children, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("-n", "--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        report(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Candle updates per second of sharded Traders, by number of worker processes.
+
+    python benchmarks/worker_scaling.py --symbols 32 --updates 500 --workers 1 2 4
+
+Each worker process builds compact Traders for its shard of the symbols (as
+bitget.supervisor does) and feeds every one of them the same synthetic 1m
+updates through Trader.handle_update, with no network involved. The total rate
+should grow with the number of workers up to the number of cores.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bitget.supervisor import shard_symbols  # noqa: E402
+
+
+def random_walk_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = np.round(27000 + np.cumsum(rng.normal(0, 15, n)), 1)
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    highs = np.maximum(opens, closes) + np.round(np.abs(rng.normal(0, 5, n)), 1)
+    lows = np.minimum(opens, closes) - np.round(np.abs(rng.normal(0, 5, n)), 1)
+    volumes = np.abs(rng.normal(2, 1, n))
+    timestamps = 1695772800000 + np.arange(n) * 60_000
+    return [
+        [str(ts), *(str(value) for value in values)]
+        for ts, *values in zip(timestamps, opens, highs, lows, closes, volumes)
+    ]
+
+
+async def feed(symbols, history, updates):
+    from bitget.trader import Trader
+
+    traders = [Trader(symbol=symbol, compact=True) for symbol in symbols]
+    for trader in traders:
+        trader.timeframes_seeded = True
+        trader.candles.upsert(history)
+        trader.snapshot_received = True
+
+    started = time.perf_counter()
+    for row in updates:
+        for trader in traders:
+            await trader.handle_update({"data": [row]})
+    return time.perf_counter() - started
+
+
+def run_shard(symbols, n_history, n_updates):
+    rows = random_walk_rows(n_history + n_updates)
+    return asyncio.run(feed(symbols, rows[:n_history], rows[n_history:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=32)
+    parser.add_argument("--history", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    symbols = [f"S{i}USDT" for i in range(args.symbols)]
+    context = multiprocessing.get_context("spawn")
+    print(f"{args.symbols} symbols x {args.updates} updates, {os.cpu_count()} cores")
+
+    baseline = None
+    for n_workers in args.workers:
+        shards = shard_symbols(symbols, n_workers)
+        with context.Pool(len(shards)) as pool:
+            # Shards feed at the same time; the slowest one sets the rate
+            elapsed = max(
+                pool.starmap(
+                    run_shard,
+                    [(shard, args.history, args.updates) for shard in shards],
+                )
+            )
+
+        rate = args.symbols * args.updates / elapsed
+        baseline = baseline or rate
+        print(
+            f"  {len(shards):>2} workers: {rate:10.0f} updates/s "
+            f"({rate / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
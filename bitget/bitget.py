@@ -1,107 +1,117 @@
 import os
 import time
-import hmac
-import hashlib
-import base64
 import asyncio
-from asyncio import Queue
 
 import websockets
 import json
 from dotenv import load_dotenv
 from asyncio import Condition
+from bitget.candle_store import CandleStore
+from bitget.heartbeat import Heartbeat
+from bitget.message_bus import COALESCE, MessageBus
+from bitget.order_client import bracket_prices, sign
+from bitget.order_book import BOOK_CHANNELS, DepthJournal, OrderBook
 from bitget.utils import (
-    convert_to_dataframe,
-    update_dataframe_with_new_data,
+    check_entry_conditions,
+    check_trigger_conditions,
     format_trigger_stats,
     format_entry_stats,
 )
-
-# Place configurations and constants here
-RATE_LIMIT_CONNECTIONS = 100
-RATE_LIMIT_SUBSCRIPTIONS = 240
-
-# Load environment variables from .env file
-load_dotenv()
+from bitget.rate_limiter import rate_limiter as shared_rate_limiter
 
 
 class BitGet:
-    def __init__(self) -> None:
+    def __init__(self, rate_limiter=None, book_channel=None, journal_path=None):
         load_dotenv()
         self.api_key = os.getenv("API_KEY")
         self.secret_key = os.getenv("SECRET_KEY")
         self.passphrase = os.getenv("PASSPHRASE")
 
-        # Rate Limiting Variables
-        self.connection_count = 0
-        self.subscription_count = 0
-        self.connection_timestamps = []
-        self.subscription_timestamps = []
+        # Connection and subscription budget shared with every other client
+        self.rate_limiter = rate_limiter or shared_rate_limiter
 
         self.snapshot_received = False
         self.is_subscribed = False
 
-        self.candle_data = []
+        self.ws = None
+        self.heartbeat = None
+        self.candles = CandleStore(max_size=1000)
         self.update_received = Condition()
         self.trigger_conditions_met = False
 
         self.curr_trigger_stats = None
         self.curr_entry_stats = None
 
-        # pubsub implementation
-        self.message_queue = Queue()
-
-    # Remember to call check_rate_limits before making additional
-    # subscriptions in other parts of your code to ensure
-    # you don't exceed the rate limits.
-    def check_rate_limits(self):
-        current_time = time.time()
-
-        # Check Connection Limit
-        self.connection_timestamps = [
-            t for t in self.connection_timestamps if current_time - t <= 3600
-        ]
-        if len(self.connection_timestamps) >= RATE_LIMIT_CONNECTIONS:
-            raise Exception(
-                "Connection limit reached: 100 connections per IP per hour."
+        # pubsub implementation: bounded, keeps only the latest state per candle
+        self.symbol = "BTCUSDT"
+        self.message_bus = MessageBus(policy=COALESCE, name="bitget.bus")
+
+        # Optional depth subscription ("books5" or "books15")
+        self.book_channel = book_channel
+        self.order_book = None
+        if book_channel is not None:
+            depth = BOOK_CHANNELS[book_channel]
+            journal = DepthJournal(journal_path, depth) if journal_path else None
+            self.order_book = OrderBook(depth, journal=journal)
+
+    def subscription_args(self):
+        args = [{"instType": "mc", "channel": "candle1m", "instId": self.symbol}]
+        if self.book_channel is not None:
+            args.append(
+                {"instType": "mc", "channel": self.book_channel, "instId": self.symbol}
             )
+        return args
 
-        # Check Subscription Limit
-        self.subscription_timestamps = [
-            t for t in self.subscription_timestamps if current_time - t <= 3600
-        ]
-        if len(self.subscription_timestamps) >= RATE_LIMIT_SUBSCRIPTIONS:
-            raise Exception("Subscription limit reached: 240 subscriptions per hour.")
+    def book_features(self, levels=5):
+        """Mid, spread and top-`levels` imbalance of the latest depth snapshot."""
+        if self.order_book is None:
+            return {}
+        return self.order_book.features(levels)
 
     def generate_signature(self):
         timestamp = str(int(time.time()))
-        content = f"{timestamp}GET/user/verify"
-
-        h = hmac.new(
-            self.secret_key.encode(), msg=content.encode(), digestmod=hashlib.sha256
+        return timestamp, sign(self.secret_key, f"{timestamp}GET/user/verify")
+
+    async def send_ping(self, ws=None):
+        # Pings on schedule for as long as the client runs, across reconnects
+        self.heartbeat = Heartbeat(
+            lambda: (ws or self.ws).send("ping"),
+            name="bitget",
+            on_stall=self.handle_stall,
         )
-        hashed_content = h.digest()
-
-        signature = base64.b64encode(hashed_content).decode()
-        return timestamp, signature
-
-    async def send_ping(self):
-        while not self.is_subscribed:
-            await self.ws.send("ping")
-            await asyncio.sleep(30)
+        while True:
+            try:
+                await self.heartbeat.run()
+            except websockets.exceptions.ConnectionClosed:
+                if ws is not None:
+                    raise
+                # listen() is replacing the connection
+                await asyncio.sleep(1)
+
+    async def handle_stall(self):
+        # Closing makes listen() reconnect
+        await self.ws.close()
 
     async def unsubscribe(self):
-        unsubscribe_msg = {
-            "op": "unsubscribe",
-            "args": [{"instType": "mc", "channel": "candle1m", "instId": "BTCUSDT"}],
-        }
+        unsubscribe_msg = {"op": "unsubscribe", "args": self.subscription_args()}
         await self.ws.send(json.dumps(unsubscribe_msg))
         print("Unsubscribed successfully.")
 
-    async def listen(self):
+    async def listen(self, ws=None):
         print("Listening...")
         while True:
-            message = await asyncio.wait_for(self.ws.recv(), timeout=60)
+            try:
+                message = await (ws or self.ws).recv()
+            except websockets.exceptions.ConnectionClosed as e:
+                if ws is not None:
+                    raise
+                print(f"Connection lost ({e}), reconnecting...")
+                await self.open_connection()
+                continue
+
+            if self.heartbeat:
+                self.heartbeat.on_message(message)
+
             if message == "pong":
                 continue
             else:
@@ -109,8 +119,18 @@ class BitGet:
                     parsed_message = json.loads(message)
                     event_type = parsed_message.get("event", "")
                     action_type = parsed_message.get("action", "")
-
-                    if event_type == "subscribe":
+                    channel = parsed_message.get("arg", {}).get("channel")
+
+                    if (
+                        self.order_book is not None
+                        and channel == self.book_channel
+                        and "data" in parsed_message
+                    ):
+                        # Depth messages are full snapshots of the top levels
+                        for data in parsed_message["data"]:
+                            self.order_book.apply(data)
+
+                    elif event_type == "subscribe":
                         self.is_subscribed = True
                         print(
                             f"Successfully subscribed to {parsed_message['arg']['channel']} for {parsed_message['arg']['instId']}"
@@ -123,41 +143,54 @@ class BitGet:
 
                     elif action_type == "snapshot":
                         self.snapshot_received = True
-                        self.df = convert_to_dataframe(parsed_message["data"])
+                        self.candles.upsert(parsed_message["data"])
+                        self.df = self.candles.df
 
                         if self.check_trigger_conditions(self.df):
                             print("Conditions met on snapshot! Incredible!!")
-                            await self.message_queue.put("Trigger condition met")
-
-                        self.update_received.set()
+                            self.publish_signal("Trigger condition met")
 
                     elif action_type == "update":
-                        latest_candle = parsed_message["data"][0]
-                        # Check if new_candle is different from the last candle in the DataFrame
-                        if (
-                            latest_candle != self.df.iloc[-1].to_dict()
-                        ):  # Changed the condition here to !=
-                            self.df = self.update_dataframe_with_new_data(
-                                self.df, latest_candle
-                            )
-
-                            if self.trigger_conditions_met:
-                                if self.check_entry_conditions(self.df):
-                                    await self.message_queue.put("Entry condition met")
-                                    # self.place_order()
-                                    self.trigger_conditions_met = False
-
-                            elif self.check_trigger_conditions(self.df):
-                                await self.message_queue.put("Trigger condition met")
-                                self.trigger_conditions_met = True
-                            else:
+                        self.candles.upsert(parsed_message["data"])
+                        self.df = self.candles.df
+                        self.publish_candles(parsed_message["data"])
+
+                        if self.trigger_conditions_met:
+                            if self.check_entry_conditions(self.df):
+                                self.publish_signal("Entry condition met")
+                                # self.place_order()
                                 self.trigger_conditions_met = False
 
+                        elif self.check_trigger_conditions(self.df):
+                            self.publish_signal("Trigger condition met")
+                            self.trigger_conditions_met = True
+                        else:
+                            self.trigger_conditions_met = False
+
                 except json.JSONDecodeError:
                     print(f"Could not parse message: {message}")
 
-    async def connect(self, duration=60):
-        self.check_rate_limits()
+    def publish_candles(self, candles):
+        for candle in candles:
+            self.message_bus.publish(
+                {"type": "candle", "symbol": self.symbol, "candle": candle},
+                key=(self.symbol, int(candle[0])),
+            )
+
+    def publish_signal(self, message):
+        # Signals are never coalesced
+        self.message_bus.publish(
+            {
+                "type": "signal",
+                "symbol": self.symbol,
+                "timestamp": self.candles.last_timestamp(),
+                "message": message,
+                "book": self.book_features(),
+            }
+        )
+
+    async def open_connection(self):
+        await self.rate_limiter.acquire("connections")
         timestamp, signature = self.generate_signature()
         uri = "wss://ws.bitget.com/mix/v1/stream"
 
@@ -171,15 +204,16 @@ class BitGet:
         self.ws = await websockets.connect(uri, extra_headers=headers)
         print(f"Connected to {uri}")
 
-        self.subscription_timestamps.append(time.time())
-        self.subscription_count += 1
-
-        subscription_msg = {
-            "op": "subscribe",
-            "args": [{"instType": "mc", "channel": "candle1m", "instId": "BTCUSDT"}],
-        }
+        subscription_msg = {"op": "subscribe", "args": self.subscription_args()}
 
+        await self.rate_limiter.acquire(
+            "subscriptions", weight=len(subscription_msg["args"])
+        )
         await self.ws.send(json.dumps(subscription_msg))
+        return self.ws
+
+    async def connect(self, duration=60):
+        await self.open_connection()
 
         listener_task = asyncio.create_task(self.listen())
         ping_task = asyncio.create_task(self.send_ping())
@@ -209,108 +243,29 @@ class BitGet:
         return False
 
     def check_trigger_conditions(self, df_to_check):
-        # Check if the last candle touches or penetrates the lower red Bollinger band
-        last_candle = df_to_check.iloc[-1]
-        lower_bollinger = last_candle["Bollinger_Lower_2"]
-
-        touch_or_penetrate = any(
-            [
-                last_candle["Open"] <= lower_bollinger,
-                last_candle["Close"] <= lower_bollinger,
-                last_candle["Low"] <= lower_bollinger,
-                last_candle["High"] <= lower_bollinger,
-            ]
+        # Rules live in bitget.strategy, shared with the Trader and the backtest
+        trigger_conditions_met, self.curr_trigger_stats = check_trigger_conditions(
+            df_to_check
         )
 
-        # Check if both RSI and stochastic are below the 20 level for the last candle
-        rsi_val = last_candle["RSI"]
-        rsi_below_20 = rsi_val < 20
-
-        last_candle_stoch = last_candle["Stochastic"]
-        stochastic_below_20 = last_candle_stoch < 20
-
-        # if touch_or_penetrate:
-        #     print("Touch or penetrate")
-        # if rsi_below_20:
-        #     print("RSI below 20")
-        # if stochastic_below_20:
-        #     print("Stochastic below 20")
-
-        self.curr_trigger_stats = {
-            "touch_or_penetrate": touch_or_penetrate,
-            "rsi_val": rsi_val,
-            "rsi_below_20": rsi_below_20,
-            "stoch_val": last_candle_stoch,
-            "stochastic_below_20": stochastic_below_20,
-        }
-
-        # Both conditions must be met
-        if touch_or_penetrate and (rsi_below_20 or stochastic_below_20):
-            # Debug / pretty print for understanding
-
+        if trigger_conditions_met:
             self.trigger_conditions_met = True
             return True
         return False
 
     def check_entry_conditions(self, df_to_check):
-        last_candle = df_to_check.iloc[-1]
-        second_last_candle = df_to_check.iloc[-2]
-
-        # The next candle retraces and closes back through the red Bollinger band.
-        retraces_through_band = last_candle["Close"] > last_candle["Bollinger_Lower_2"]
-
-        # RSI goes above 20
-        rsi_val = last_candle["RSI"]
-        rsi_above_20 = rsi_val > 20
-
-        # Stochastic lines cross between the 20 and 40 levels
-        last_candle_stoch = last_candle["Stochastic"]
-
-        stochastic_cross = (second_last_candle["Stochastic"] < 20) and (
-            last_candle_stoch > 20
+        entry_conditions_met, self.curr_entry_stats = check_entry_conditions(
+            df_to_check
         )
-        stochastic_between_20_and_40 = 20 < last_candle["Stochastic"] < 40
-
-        self.curr_entry_stats = {
-            "retraces_through_band": retraces_through_band,
-            "rsi_above_20": rsi_above_20,
-            "rsi_val": rsi_val,
-            "stochastic_cross": stochastic_cross,
-            "stochastic_between_20_and_40": stochastic_between_20_and_40,
-            "last_candle_stoch": last_candle_stoch,
-        }
 
         print(format_trigger_stats(self.curr_trigger_stats))
         print(format_entry_stats(self.curr_entry_stats))
 
-        if (
-            retraces_through_band
-            and rsi_above_20
-            and stochastic_cross
-            and stochastic_between_20_and_40
-        ):
-            return True
-
-        return False
+        return entry_conditions_met
 
     def get_order(self):
-        last_candle = self.df.iloc[-1]
-        buy_price = last_candle[
-            "Close"
-        ]  # Assuming you are buying at the close price of the last candle
-        stop_loss_level = last_candle[
-            "Bollinger_Lower_3"
-        ]  # Yellow Bollinger band, adjust as needed
-        risk_amount = buy_price - stop_loss_level  # The risk for this trade
-
-        take_profit_level = buy_price + risk_amount  # One-to-one risk-reward ratio
-
-        # TODO: Place the buy order using your trading API here
-
-        # TODO: Set the stop loss using your trading API here
-
-        # TODO: Set the take profit using your trading API here
-
+        # Orders are placed by bitget.order_client.BitGetOrderClient.place_bracket
+        buy_price, stop_loss_level, take_profit_level = bracket_prices(self.df.iloc[-1])
         return (
             f"Buy order placed at {buy_price}\n"
             + f"Stop loss set at {stop_loss_level}\n"
@@ -366,11 +321,20 @@ class BitGet:
         print(f"Total rows checked: {n_rows}")  # Debug statement
 
     async def subscribe_conditions(self, duration):
+        subscription = self.message_bus.subscribe()
         end_time = time.time() + duration
-        while time.time() < end_time:
-            message = await self.message_queue.get()
-            print(f"Received message: {message}")
-            # You can also include additional logic to process the message here
+        try:
+            while time.time() < end_time:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), timeout=end_time - time.time()
+                    )
+                except asyncio.TimeoutError:
+                    break
+                print(f"Received message: {message}")
+                # You can also include additional logic to process the message here
+        finally:
+            subscription.close()
 
         async with self.update_received:
             self.update_received.notify_all()
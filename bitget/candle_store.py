@@ -0,0 +1,242 @@
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+from bitget.compact import CompactCandles
+from bitget.utils import calc_indicators, candles_to_frame
+from logger_config import utils_logger
+from market_data import as_candle_batch
+
+# Rows needed before a changed candle for the indicators to be exact again:
+# 20 for the Bollinger window, 14 (+1 for the diff) for RSI, 14 for stochastic.
+INDICATOR_WARMUP = 20
+
+CANDLE_INTERVAL_MS = 60_000
+
+# Default calc_indicators parameters, which the stored columns are computed with
+INDICATOR_PARAMS = (20, 14, 14)  # Bollinger window, RSI window, stochastic window
+
+RAW_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Timestamp"]
+
+INDICATOR_CACHE_SIZE = 8  # Parameter variants kept by indicators()
+
+# Newest rows a compact store keeps at full precision; older ones are compacted
+# once twice as many have accumulated
+HOT_ROWS = 64
+CHANGE_LOG_SIZE = 256  # Upserts remembered for catching variants up
+
+
+class CandleStore:
+    """
+    Holds the candles of one feed, keyed by their open time (ms), together with
+    their indicator columns.
+
+    Incoming candles are merged into the existing frame: rows older than the
+    first changed candle are kept as they are, and indicators are recomputed
+    only over the changed suffix plus a warm-up of INDICATOR_WARMUP rows.
+
+    Every change bumps `version`. Indicators with other parameters are computed
+    on request by `indicators()`, memoized per parameters, and caught up with
+    the same suffix recompute when the candles have changed since.
+
+    With `compact=True` only the newest HOT_ROWS candles are kept as a frame;
+    older ones are held as CompactCandles (see bitget.compact), at about a
+    third of the memory. Live updates only touch the full-precision rows, and
+    `tail()` reads them without decoding anything. `df` decodes the whole store,
+    so reading it is for on-demand queries, not for every tick.
+    """
+
+    def __init__(
+        self,
+        max_size=1000,
+        interval_ms=CANDLE_INTERVAL_MS,
+        compact=False,
+        price_decimals=None,
+    ):
+        self.max_size = max_size
+        self.interval_ms = interval_ms
+        self.recent = None  # Full-precision rows: all of them unless compact
+        self.history = CompactCandles.empty(price_decimals) if compact else None
+        self.version = 0  # Bumped on every change, e.g. to key cached results
+
+        # (version, open time of the first candle that version changed)
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+        # parameters -> (version, frame)
+        self.indicator_cache = OrderedDict()
+
+        # Called with the rows changed by each upsert (e.g. SharedCandleFeed.publish)
+        self.listeners = []
+
+    def __len__(self):
+        history = 0 if self.history is None else len(self.history)
+        return history + (0 if self.recent is None else len(self.recent))
+
+    @property
+    def df(self):
+        if not self.history:
+            return self.recent
+        return pd.concat([self.history.to_frame(), self.recent])
+
+    def tail(self, n):
+        """The last `n` candles, decoding compact rows only if `n` reaches them."""
+        if self.recent is None or n <= 0:
+            return self.recent.iloc[:0] if self.recent is not None else None
+        if not self.history or n <= len(self.recent):
+            return self.recent.iloc[-n:]
+        start = max(len(self.history) - (n - len(self.recent)), 0)
+        return pd.concat([self.history.to_frame(start), self.recent])
+
+    def last_timestamp(self):
+        if self.recent is None or self.recent.empty:
+            return None
+        return int(self.recent.index[-1])
+
+    def compact(self, price_decimals=None):
+        """A CompactCandles copy of the store, for holding it at ~1/3 the memory."""
+        return CompactCandles.from_frame(self.df, price_decimals)
+
+    def find_gap(self, candles):
+        """
+        Return (start, end) in ms of the candles missing between the store and
+        the first of `candles`, or None if they connect.
+        """
+        last_timestamp = self.last_timestamp()
+        if last_timestamp is None or not candles:
+            return None
+
+        candles = as_candle_batch(candles)
+        first_timestamp = int(candles.timestamps.min())
+        if first_timestamp - last_timestamp <= self.interval_ms:
+            return None
+
+        return last_timestamp + self.interval_ms, first_timestamp - self.interval_ms
+
+    def upsert(self, candles):
+        """
+        Insert new candles and overwrite existing ones with the same timestamp.
+        :param candles: A CandleBatch, or raw candle rows
+            ([ts, open, high, low, close, volume, ...]).
+        :return: Number of rows whose indicators were recomputed.
+        """
+        if not len(candles):
+            return 0
+
+        new_rows = candles_to_frame(candles)
+        new_rows = new_rows[~new_rows.index.duplicated(keep="last")].sort_index()
+
+        if self.history and (
+            self.recent.index.searchsorted(new_rows.index[0]) < INDICATOR_WARMUP
+        ):
+            # Reaches into (or needs warm-up from) the compact rows: merge into
+            # the decoded store, which _trim() compacts again
+            self.recent = self.df
+            self.history = self.history[:0]
+        self.recent, recomputed = merge_candles(self.recent, new_rows)
+
+        self._trim()
+        self._notify(recomputed, int(new_rows.index[0]))
+
+        utils_logger.debug(
+            f"Merged {len(new_rows)} candles, recomputed {recomputed} rows."
+        )
+        return recomputed
+
+    def indicators(self, window_size=20, rsi_window=14, stochastic_window=14):
+        """
+        The candles with indicators computed for these parameters. Results are
+        memoized per parameters and reused while the version is unchanged; after
+        upserts only the changed suffix (plus warm-up) is recomputed.
+        """
+        params = (window_size, rsi_window, stochastic_window)
+        if params == INDICATOR_PARAMS or self.df is None:
+            return self.df
+
+        cached = self.indicator_cache.get(params)
+        if cached is not None:
+            self.indicator_cache.move_to_end(params)
+            version, df = cached
+            if version == self.version:
+                return df
+            df = self._catch_up(df, version, params)
+        else:
+            df = self._compute(0, params)
+
+        self.indicator_cache[params] = (self.version, df)
+        if len(self.indicator_cache) > INDICATOR_CACHE_SIZE:
+            self.indicator_cache.popitem(last=False)
+        return df
+
+    def _catch_up(self, df, version, params):
+        if not self.changes or self.changes[0][0] > version + 1:
+            return self._compute(0, params)  # Too old for the change log
+
+        # Everything before the first candle changed since `version` is still valid
+        first_changed = min(ts for v, ts in self.changes if v > version)
+        split = int(self.df.index.searchsorted(first_changed))
+        head = df[(df.index >= self.df.index[0]) & (df.index < first_changed)]
+        if len(head) != split:
+            return self._compute(0, params)
+
+        tail = self._compute(split, params)
+        utils_logger.debug(f"Caught up {params} indicators on {len(tail)} rows.")
+        return pd.concat([head, tail]) if len(head) else tail
+
+    def _compute(self, start, params):
+        """Indicators for `params` from row `start` on, seeded with warm-up rows."""
+        window_size, rsi_window, stochastic_window = params
+        warmup = max(window_size, rsi_window + 1, stochastic_window)
+        warmup_start = max(start - warmup, 0)
+
+        raw = self.df.iloc[warmup_start:][RAW_COLUMNS].copy()
+        return calc_indicators(raw, *params).iloc[start - warmup_start :]
+
+    def _notify(self, changed, first_changed):
+        self.version += 1
+        self.changes.append((self.version, first_changed))
+        if self.listeners:
+            changed = self.tail(changed)
+        for listener in self.listeners:
+            listener(changed)
+
+    def _trim(self):
+        excess = len(self) - self.max_size
+        if excess > 0 and self.history:
+            dropped = min(excess, len(self.history))
+            self.history = self.history[dropped:]
+            excess -= dropped
+        if excess > 0:
+            self.recent = self.recent.iloc[excess:]
+
+        if self.history is not None and len(self.recent) >= 2 * HOT_ROWS:
+            older = CompactCandles.from_frame(
+                self.recent.iloc[:-HOT_ROWS], self.history.price_decimals
+            )
+            self.history = CompactCandles.concat([self.history, older])
+            self.recent = self.recent.iloc[-HOT_ROWS:]
+
+
+def merge_candles(df, new_rows):
+    """
+    `new_rows` merged into the indicator frame `df`: rows before the first
+    changed candle are kept as they are, and indicators are recomputed over the
+    rest plus INDICATOR_WARMUP rows.
+    :return: (merged frame, number of rows recomputed)
+    """
+    if df is None or df.empty:
+        df = calc_indicators(new_rows)
+        return df, len(df)
+
+    # Everything before the first changed candle stays untouched
+    split = int(df.index.searchsorted(new_rows.index[0]))
+    head = df.iloc[:split]
+
+    tail = df.iloc[split:][RAW_COLUMNS]
+    tail = pd.concat([tail[~tail.index.isin(new_rows.index)], new_rows])
+    tail.sort_index(inplace=True)
+
+    # Recompute indicators over the tail, seeded with the warm-up rows
+    warmup_start = max(split - INDICATOR_WARMUP, 0)
+    window = pd.concat([df.iloc[warmup_start:split][RAW_COLUMNS], tail])
+    window = calc_indicators(window).iloc[split - warmup_start :]
+
+    return (pd.concat([head, window]) if len(head) else window), len(window)
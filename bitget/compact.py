@@ -0,0 +1,169 @@
+"""
+Compact in-memory and CSV representation of indicator candle frames.
+
+A frame from calc_indicators holds 16 float64/datetime columns per candle plus
+its index (~136 bytes a row). CompactCandles keeps:
+
+- the open time as int64 epoch ms (the tz-aware Timestamp is rebuilt on read),
+- OHLC as float32, or as fixed-point integers with `price_decimals` decimals,
+- Volume, SMA, Rolling_STD, RSI and Stochastic as float32,
+
+and derives the six Bollinger columns from SMA and Rolling_STD when they are
+read. That is 44 bytes a row.
+
+Error bounds against the float64 frame it was built from (eps = 2**-24):
+
+- float32 prices: |error| <= |price| * eps, under $0.004 at $60,000, well
+  below BTCUSDT's $0.1 tick.
+- fixed-point prices: exact for prices with at most `price_decimals` decimals,
+  otherwise |error| <= 0.5 * 10**-price_decimals.
+- Volume, SMA, Rolling_STD: relative error <= eps.
+- RSI and Stochastic (0-100): |error| <= 100 * eps, about 6e-6.
+- Bollinger bands SMA +/- k * STD: |error| <= (|SMA| + k * STD) * eps plus one
+  float64 rounding.
+
+Rules comparing two nearly equal values (e.g. a close exactly on a band) can
+therefore come out differently on decoded data. Keep trading decisions on
+full-precision frames and use this for holding and shipping history.
+"""
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+FLOAT_COLUMNS = ["Volume", "SMA", "Rolling_STD", "RSI", "Stochastic"]
+BAND_STD_DEVS = (2, 3, 4)
+
+# Column order of calc_indicators frames, rebuilt by to_frame()
+FRAME_COLUMNS = (
+    PRICE_COLUMNS
+    + ["Volume", "Timestamp", "SMA", "Rolling_STD"]
+    + [
+        f"Bollinger_{side}_{std_dev}"
+        for std_dev in BAND_STD_DEVS
+        for side in ("Upper", "Lower")
+    ]
+    + ["RSI", "Stochastic"]
+)
+
+
+class CompactCandles:
+    def __init__(self, timestamps, prices, floats, price_decimals=None):
+        self.timestamps = timestamps  # int64 epoch ms, shape (n,)
+        self.prices = prices  # float32 or fixed-point ints, shape (n, 4)
+        self.floats = floats  # float32, shape (n, len(FLOAT_COLUMNS))
+        self.price_decimals = price_decimals
+
+    @classmethod
+    def from_frame(cls, df, price_decimals=None):
+        """
+        :param df: Frame indexed by UnixTimestamp (ms) with the calc_indicators columns.
+        :param price_decimals: Store prices as fixed-point integers with this
+            many decimals instead of float32.
+        """
+        return cls(
+            df.index.to_numpy(dtype=np.int64),
+            encode_prices(df[PRICE_COLUMNS].to_numpy(np.float64), price_decimals),
+            df[FLOAT_COLUMNS].to_numpy(dtype=np.float32),
+            price_decimals,
+        )
+
+    @classmethod
+    def empty(cls, price_decimals=None):
+        prices = encode_prices(np.zeros((0, len(PRICE_COLUMNS))), price_decimals)
+        floats = np.zeros((0, len(FLOAT_COLUMNS)), dtype=np.float32)
+        return cls(np.zeros(0, dtype=np.int64), prices, floats, price_decimals)
+
+    @classmethod
+    def concat(cls, parts):
+        return cls(
+            np.concatenate([part.timestamps for part in parts]),
+            np.concatenate([part.prices for part in parts]),
+            np.concatenate([part.floats for part in parts]),
+            parts[0].price_decimals,
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, rows):
+        """The candles of a slice, as views."""
+        return CompactCandles(
+            self.timestamps[rows],
+            self.prices[rows],
+            self.floats[rows],
+            self.price_decimals,
+        )
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.prices.nbytes + self.floats.nbytes
+
+    def column(self, name, start=None, stop=None):
+        """One column as float64, decoding prices and deriving bands as needed."""
+        rows = slice(start, stop)
+
+        if name in PRICE_COLUMNS:
+            values = self.prices[rows, PRICE_COLUMNS.index(name)].astype(np.float64)
+            if self.price_decimals is not None:
+                values /= 10**self.price_decimals
+            return values
+
+        if name in FLOAT_COLUMNS:
+            return self.floats[rows, FLOAT_COLUMNS.index(name)].astype(np.float64)
+
+        if name.startswith("Bollinger_"):
+            _, side, std_dev = name.split("_")
+            sma = self.column("SMA", start, stop)
+            std = self.column("Rolling_STD", start, stop)
+            sign = 1 if side == "Upper" else -1
+            return sma + sign * std * int(std_dev)
+
+        raise KeyError(name)
+
+    def to_frame(self, start=None, stop=None):
+        """The rows [start:stop] as a full-width calc_indicators frame."""
+        index = pd.Index(self.timestamps[start:stop], name="UnixTimestamp")
+        data = {}
+        for name in FRAME_COLUMNS:
+            if name == "Timestamp":
+                data[name] = pd.to_datetime(index, unit="ms", utc=True).tz_convert(
+                    "America/Los_Angeles"
+                )
+            else:
+                data[name] = self.column(name, start, stop)
+        return pd.DataFrame(data, index=index)
+
+    def to_csv(self, path):
+        """Write without the derived columns; float32 values keep their shortest repr."""
+        df = pd.DataFrame(
+            self.floats,
+            columns=FLOAT_COLUMNS,
+            index=pd.Index(self.timestamps, name="UnixTimestamp"),
+        )
+        for i, name in enumerate(PRICE_COLUMNS):
+            if self.price_decimals is None:
+                df.insert(i, name, self.prices[:, i])
+            else:
+                decimals = self.price_decimals
+                prices = self.column(name)
+                df.insert(i, name, [f"{price:.{decimals}f}" for price in prices])
+        df.to_csv(path)
+
+    @classmethod
+    def read_csv(cls, path, price_decimals=None):
+        return cls.from_frame(
+            pd.read_csv(path, index_col="UnixTimestamp"), price_decimals
+        )
+
+
+def encode_prices(prices, price_decimals=None):
+    if price_decimals is None:
+        return np.ascontiguousarray(prices, dtype=np.float32)
+
+    if np.isnan(prices).any():
+        raise ValueError("Fixed-point prices cannot hold NaN; use float32.")
+
+    scaled = np.round(prices * 10**price_decimals)
+    fits_int32 = np.abs(scaled).max(initial=0) < 2**31 - 1
+    return np.ascontiguousarray(scaled, dtype=np.int32 if fits_int32 else np.int64)
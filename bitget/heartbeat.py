@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from logger_config import trader_logger
+from metrics import metrics as shared_metrics
+
+PING_INTERVAL = 30  # Bitget drops connections that stay silent for 2 minutes
+STALL_INTERVALS = 3  # Ping intervals without data before a feed counts as stalled
+
+
+class Heartbeat:
+    """
+    Keeps one websocket connection alive and watches its feed.
+
+    `run()` sends a ping every `interval` seconds. Every received message must be
+    passed to `on_message()`: pongs are timed for the round-trip metric, anything
+    else counts as data. If no data arrives for `stall_intervals` intervals,
+    `on_stall` is called so the owner can reconnect; pinging carries on after it.
+    """
+
+    def __init__(
+        self,
+        send_ping,
+        name="bitget",
+        interval=PING_INTERVAL,
+        stall_intervals=STALL_INTERVALS,
+        on_stall=None,
+        metrics=None,
+        clock=time.monotonic,
+    ):
+        self.send_ping = send_ping
+        self.name = name
+        self.interval = interval
+        self.stall_intervals = stall_intervals
+        self.on_stall = on_stall
+        self.metrics = metrics or shared_metrics
+        self.clock = clock
+
+        self.ping_sent_at = None
+        self.last_data_at = clock()
+        self.last_rtt = None
+
+    def on_message(self, message):
+        now = self.clock()
+
+        if message == "pong":
+            if self.ping_sent_at is not None:
+                self.last_rtt = now - self.ping_sent_at
+                self.metrics.observe(f"{self.name}.rtt_ms", self.last_rtt * 1000)
+                self.ping_sent_at = None
+            return
+
+        self.last_data_at = now
+
+    def is_stalled(self):
+        silent_for = self.clock() - self.last_data_at
+        return silent_for > self.interval * self.stall_intervals
+
+    async def run(self):
+        while True:
+            if self.is_stalled():
+                self.metrics.incr(f"{self.name}.stalls")
+                trader_logger.warning(
+                    f"{self.name} feed stalled: no data for "
+                    f"{self.clock() - self.last_data_at:.0f}s, reconnecting."
+                )
+                self.last_data_at = self.clock()
+                self.ping_sent_at = None
+
+                if self.on_stall:
+                    await self.on_stall()
+
+            if self.ping_sent_at is not None:
+                self.metrics.incr(f"{self.name}.missed_pongs")
+
+            self.ping_sent_at = self.clock()
+            await self.send_ping()
+            await asyncio.sleep(self.interval)
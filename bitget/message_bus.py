@@ -0,0 +1,131 @@
+import asyncio
+
+from metrics import metrics as shared_metrics
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+
+MESSAGE_BUS_SIZE = 1000
+
+
+class Subscription:
+    """
+    One reader of a MessageBus, with its own cursor into the bus's ring buffer.
+    """
+
+    def __init__(self, bus, cursor):
+        self.bus = bus
+        self.cursor = cursor
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+
+    @property
+    def depth(self):
+        return min(self.bus.next_seq - self.cursor, self.bus.maxsize)
+
+    def get_nowait(self):
+        bus = self.bus
+
+        # Messages overwritten before this subscriber got to them are lost
+        oldest = bus.next_seq - bus.maxsize
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            bus.dropped += oldest - self.cursor
+            bus.metrics.incr(f"{bus.name}.dropped", oldest - self.cursor)
+            self.cursor = oldest
+
+        if self.cursor == bus.next_seq:
+            raise asyncio.QueueEmpty
+
+        _, _, message = bus.buffer[self.cursor % bus.maxsize]
+        self.cursor += 1
+        return message
+
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+    def close(self):
+        self.bus.subscribers.remove(self)
+
+
+class MessageBus:
+    """
+    Bounded publish/subscribe buffer with independent subscribers.
+
+    Messages live in a fixed-size ring; every subscriber reads it through its
+    own cursor, so a slow reader only loses its oldest unread messages and never
+    grows memory. With the COALESCE policy, a message published with the same
+    key as one no subscriber has read yet replaces it in place, e.g. keyed by
+    (symbol, candle_ts) only the latest state of a forming candle is kept.
+    """
+
+    def __init__(
+        self,
+        maxsize=MESSAGE_BUS_SIZE,
+        policy=DROP_OLDEST,
+        name="bitget.bus",
+        metrics=None,
+    ):
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self.metrics = metrics or shared_metrics
+
+        self.buffer = [None] * maxsize  # (seq, key, message)
+        self.next_seq = 0
+        self.latest_by_key = {}
+        self.subscribers = []
+
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def depth(self):
+        return max((sub.depth for sub in self.subscribers), default=0)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.next_seq)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def publish(self, message, key=None):
+        if self.policy == COALESCE and key is not None and self.coalesce(key, message):
+            return
+
+        slot = self.next_seq % self.maxsize
+        overwritten = self.buffer[slot]
+        if overwritten is not None:
+            old_seq, old_key, _ = overwritten
+            if self.latest_by_key.get(old_key) == old_seq:
+                del self.latest_by_key[old_key]
+
+        self.buffer[slot] = (self.next_seq, key, message)
+        if key is not None:
+            self.latest_by_key[key] = self.next_seq
+        self.next_seq += 1
+
+        self.metrics.gauge(f"{self.name}.depth", self.depth)
+        for subscription in self.subscribers:
+            subscription.wakeup.set()
+
+    def coalesce(self, key, message):
+        seq = self.latest_by_key.get(key)
+        if seq is None:
+            return False
+
+        # Only replace a message that no subscriber has read yet
+        if any(subscription.cursor > seq for subscription in self.subscribers):
+            return False
+
+        self.buffer[seq % self.maxsize] = (seq, key, message)
+        self.coalesced += 1
+        self.metrics.incr(f"{self.name}.coalesced")
+        return True
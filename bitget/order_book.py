@@ -0,0 +1,146 @@
+"""
+Top-of-book depth from Bitget's `books5` / `books15` channels.
+
+Both channels push the full top N levels on every message, so the book is not
+diffed: each message overwrites preallocated NumPy arrays in place. Levels are
+(price, size) rows, best first; unused rows are NaN.
+
+    book = OrderBook(depth=15)
+    book.apply(message["data"][0])
+    book.mid(), book.spread_bps(), book.imbalance(5)
+"""
+
+import os
+
+import numpy as np
+
+BOOK_CHANNELS = {"books5": 5, "books15": 15}
+
+# Candle columns the book features are published under (see with_book_features)
+BOOK_COLUMNS = ["Spread_bps", "Book_imbalance"]
+
+
+class OrderBook:
+    def __init__(self, depth=15, journal=None):
+        self.depth = depth
+        self.bids = np.full((depth, 2), np.nan)
+        self.asks = np.full((depth, 2), np.nan)
+        self.timestamp = None  # ms
+        self.updates = 0
+
+        # Optional DepthJournal every applied snapshot is appended to
+        self.journal = journal
+
+    def apply(self, data):
+        """Overwrite the book with one books5/books15 data entry."""
+        self._fill(self.bids, data["bids"])
+        self._fill(self.asks, data["asks"])
+        self.timestamp = int(data["ts"])
+        self.updates += 1
+
+        if self.journal is not None:
+            self.journal.append(self)
+
+    def _fill(self, side, levels):
+        n = min(len(levels), self.depth)
+        if n:
+            # Levels arrive as strings; NumPy parses them in one call
+            side[:n] = np.asarray(levels[:n], dtype=np.float64)[:, :2]
+        side[n:] = np.nan
+
+    def best_bid(self):
+        return self.bids[0, 0]
+
+    def best_ask(self):
+        return self.asks[0, 0]
+
+    def mid(self):
+        return (self.bids[0, 0] + self.asks[0, 0]) / 2
+
+    def spread(self):
+        return self.asks[0, 0] - self.bids[0, 0]
+
+    def spread_bps(self):
+        return self.spread() / self.mid() * 10_000
+
+    def imbalance(self, levels=5):
+        """
+        (bid size - ask size) / (bid size + ask size) over the top `levels`:
+        +1 is all bids, -1 all asks. NaN for an empty book.
+        """
+        bid_size = np.nansum(self.bids[:levels, 1])
+        ask_size = np.nansum(self.asks[:levels, 1])
+        total = bid_size + ask_size
+        return (bid_size - ask_size) / total if total else np.nan
+
+    def features(self, levels=5):
+        if self.timestamp is None:
+            return {}
+        return {
+            "timestamp": self.timestamp,
+            "mid": float(self.mid()),
+            "spread": float(self.spread()),
+            "spread_bps": float(self.spread_bps()),
+            "imbalance": float(self.imbalance(levels)),
+        }
+
+
+def with_book_features(df, book, rows=2, levels=5):
+    """
+    `df` with BOOK_COLUMNS added: the latest snapshot's spread and imbalance on
+    the last `rows` candles (the one that just closed and the forming one), NaN
+    before them since no book is kept for older candles.
+    """
+    df = df.copy()
+    for column in BOOK_COLUMNS:
+        df[column] = np.nan
+    if book.timestamp is not None and len(df):
+        rows = min(rows, len(df))
+        df.iloc[-rows:, df.columns.get_loc("Spread_bps")] = book.spread_bps()
+        df.iloc[-rows:, df.columns.get_loc("Book_imbalance")] = book.imbalance(levels)
+    return df
+
+
+class DepthJournal:
+    """
+    Append-only binary journal of depth snapshots: one fixed-size record per
+    snapshot (int64 ms timestamp, then bids and asks as float32 price/size
+    rows), so a journal is read back with a single `np.fromfile`.
+    """
+
+    def __init__(self, path, depth=15):
+        self.path = path
+        self.dtype = record_dtype(depth)
+        self.record = np.zeros(1, dtype=self.dtype)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "ab")
+
+    def append(self, book):
+        self.record["timestamp"] = book.timestamp
+        self.record["bids"] = book.bids
+        self.record["asks"] = book.asks
+        self.file.write(self.record.tobytes())
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def read(path, depth=15):
+        """All snapshots in a journal, as a structured array."""
+        return np.fromfile(path, dtype=record_dtype(depth))
+
+
+def record_dtype(depth):
+    return np.dtype(
+        [
+            ("timestamp", "<i8"),
+            ("bids", "<f4", (depth, 2)),
+            ("asks", "<f4", (depth, 2)),
+        ]
+    )
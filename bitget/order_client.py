@@ -0,0 +1,396 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+import aiohttp
+
+from bitget.rest_client import BITGET_REST_URL, BitGetAPIError, BitGetRestClient
+from logger_config import trader_logger
+from metrics import metrics as shared_metrics
+
+# Order states
+PENDING = "pending"  # Sent, not acknowledged yet
+ACKNOWLEDGED = "acknowledged"
+PARTIALLY_FILLED = "partially_filled"
+FILLED = "filled"
+CANCELLED = "cancelled"
+REJECTED = "rejected"
+
+# Bitget's order detail states
+BITGET_STATES = {
+    "new": ACKNOWLEDGED,
+    "init": ACKNOWLEDGED,
+    "partially_filled": PARTIALLY_FILLED,
+    "filled": FILLED,
+    "canceled": CANCELLED,
+}
+
+# Keep-alive connections held open to the API
+ORDER_POOL_SIZE = 8
+KEEPALIVE_TIMEOUT = 60
+
+# Extra attempts for a rejected stop or target before the position is closed
+PROTECTIVE_RETRIES = 2
+
+
+def sign(secret_key, content):
+    """Base64 HMAC-SHA256 of `content`, as Bitget expects in `sign`/`ACCESS-SIGN`."""
+    digest = hmac.new(
+        secret_key.encode(), msg=content.encode(), digestmod=hashlib.sha256
+    ).digest()
+    return base64.b64encode(digest).decode()
+
+
+def bracket_prices(row):
+    """
+    Entry, stop and target of a long on the candle `row`: buy at the close,
+    stop at the yellow Bollinger band, target at one-to-one risk-reward.
+    """
+    buy_price = float(row["Close"])
+    stop_loss_level = float(row["Bollinger_Lower_3"])
+    take_profit_level = buy_price + (buy_price - stop_loss_level)
+    return buy_price, stop_loss_level, take_profit_level
+
+
+def client_oid(leg):
+    return f"{leg}-{uuid.uuid4().hex[:16]}"
+
+
+def round_to_tick(price, decimals, end_step):
+    """`price` rounded to a contract's tick of `end_step` * 10**-decimals."""
+    steps = round(price * 10**decimals / end_step)
+    return round(steps * end_step / 10**decimals, decimals)
+
+
+class Order:
+    def __init__(self, leg, path, body):
+        self.leg = leg  # "entry", "stop", "target" or "close"
+        self.path = path
+        self.body = body
+        self.client_oid = body.get("clientOid")
+        self.status = PENDING
+        self.order_id = None
+        self.error = None
+        self.submitted_at = None
+        self.acked_at = None
+
+    def latency_ms(self):
+        if self.acked_at is None:
+            return None
+        return (self.acked_at - self.submitted_at) * 1000
+
+    def format(self):
+        line = f"{self.leg}: {self.status}"
+        if self.order_id:
+            line += f" (#{self.order_id})"
+        if self.error:
+            line += f" - {self.error}"
+        return line
+
+
+class Bracket:
+    """
+    An entry order with its stop-loss and take-profit legs, and the order that
+    closed the position if a leg could not be placed.
+    """
+
+    def __init__(self, entry, stop, target, signal_time=None):
+        self.entry = entry
+        self.stop = stop
+        self.target = target
+        self.close = None
+        self.signal_time = signal_time
+
+    @property
+    def orders(self):
+        orders = [self.entry, self.stop, self.target]
+        return orders if self.close is None else orders + [self.close]
+
+    def signal_to_ack_ms(self):
+        """Time from the entry signal to the entry being acknowledged."""
+        if self.signal_time is None or self.entry.acked_at is None:
+            return None
+        return (self.entry.acked_at - self.signal_time) * 1000
+
+    def format(self):
+        return "\n".join(order.format() for order in self.orders)
+
+
+class BitGetOrderClient(BitGetRestClient):
+    """
+    Signed order requests to Bitget's mix (futures) API.
+
+    Requests go over one aiohttp session with a pool of keep-alive
+    connections, so an order never waits for a TCP/TLS handshake once
+    `warm_up()` has run. A bracket's stop and target are sent concurrently
+    once the entry is acknowledged; a position is never left without them.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        secret_key,
+        passphrase,
+        base_url=BITGET_REST_URL,
+        rate_limiter=None,
+        metrics=None,
+        margin_coin="USDT",
+        pool_size=ORDER_POOL_SIZE,
+    ):
+        super().__init__(base_url=base_url, rate_limiter=rate_limiter)
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+        self.margin_coin = margin_coin
+        self.pool_size = pool_size
+        self.metrics = metrics or shared_metrics
+
+        self.orders = {}  # client_oid -> Order
+        self.contracts = {}  # symbol -> (pricePlace, priceEndStep)
+
+    async def get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size, keepalive_timeout=KEEPALIVE_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def warm_up(self, connections=None, symbols=()):
+        """
+        Open keep-alive connections ahead of the first order, and load the
+        price precision of `symbols`.
+        """
+        await asyncio.gather(
+            *(
+                self.get("/api/mix/v1/market/time")
+                for _ in range(connections or self.pool_size)
+            )
+        )
+        for symbol in symbols:
+            await self.price_precision(symbol)
+
+    async def price_precision(self, symbol):
+        """(decimals, step) of `symbol`'s prices, from the contract specs."""
+        if symbol not in self.contracts:
+            product_type = symbol.rpartition("_")[2].lower() or "umcbl"
+            contracts = await self.get(
+                "/api/mix/v1/market/contracts", params={"productType": product_type}
+            )
+            for contract in contracts:
+                self.contracts[contract["symbol"]] = (
+                    int(contract["pricePlace"]),
+                    int(contract["priceEndStep"]),
+                )
+        if symbol not in self.contracts:
+            raise BitGetAPIError(f"Unknown contract: {symbol}")
+        return self.contracts[symbol]
+
+    def headers(self, method, path, query="", body=""):
+        timestamp = str(int(time.time() * 1000))
+        request_path = f"{path}?{query}" if query else path
+        return {
+            "ACCESS-KEY": self.api_key,
+            "ACCESS-SIGN": sign(
+                self.secret_key, f"{timestamp}{method}{request_path}{body}"
+            ),
+            "ACCESS-TIMESTAMP": timestamp,
+            "ACCESS-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json",
+            "locale": "en-US",
+        }
+
+    async def signed_request(self, method, path, params=None, body=None):
+        await self.rate_limiter.acquire("rest")
+
+        query = "&".join(f"{key}={value}" for key, value in (params or {}).items())
+        data = json.dumps(body) if body is not None else ""
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else "")
+
+        session = await self.get_session()
+        async with session.request(
+            method,
+            url,
+            data=data or None,
+            headers=self.headers(method, path, query, data),
+        ) as response:
+            payload = await response.json(content_type=None)
+
+        if payload.get("code") != "00000":
+            raise BitGetAPIError(
+                f"{path} failed: {payload.get('msg')} (Code: {payload.get('code')})"
+            )
+        return payload.get("data")
+
+    def new_order(self, leg, path, **fields):
+        body = {"marginCoin": self.margin_coin, **fields}
+        body["clientOid"] = client_oid(leg)
+        return Order(leg, path, body)
+
+    async def submit(self, order):
+        self.orders[order.client_oid] = order
+        order.submitted_at = time.perf_counter()
+        try:
+            data = await self.signed_request("POST", order.path, body=order.body)
+        except (BitGetAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            order.status = REJECTED
+            order.error = str(e)
+            self.metrics.incr("orders.rejected")
+            trader_logger.error(f"{order.leg} order {order.client_oid} failed: {e}")
+            return order
+
+        order.acked_at = time.perf_counter()
+        order.order_id = data.get("orderId")
+        order.status = ACKNOWLEDGED
+        self.metrics.incr("orders.acknowledged")
+        self.metrics.observe("orders.ack_ms", order.latency_ms())
+        return order
+
+    async def place_bracket(
+        self, symbol, size, stop_price, target_price, signal_time=None, **kwargs
+    ):
+        """
+        Open a long at market, then place its stop-loss and take-profit plans.
+        A plan still rejected after PROTECTIVE_RETRIES retries gets the
+        position closed at market (see flatten).
+        :param stop_price: Rounded to the contract's tick, like target_price.
+        :param signal_time: time.perf_counter() of the entry signal, for the
+            signal-to-acknowledgement latency.
+        :param kwargs: Extra entry order fields, e.g. orderType and price.
+        """
+        size = str(size)
+        decimals, end_step = await self.price_precision(symbol)
+        stop_price = round_to_tick(stop_price, decimals, end_step)
+        target_price = round_to_tick(target_price, decimals, end_step)
+        bracket = Bracket(
+            self.new_order(
+                "entry",
+                "/api/mix/v1/order/placeOrder",
+                symbol=symbol,
+                size=size,
+                **{"side": "open_long", "orderType": "market", **kwargs},
+            ),
+            self.new_order(
+                "stop",
+                "/api/mix/v1/plan/placeTPSL",
+                symbol=symbol,
+                size=size,
+                planType="loss_plan",
+                holdSide="long",
+                triggerPrice=str(stop_price),
+            ),
+            self.new_order(
+                "target",
+                "/api/mix/v1/plan/placeTPSL",
+                symbol=symbol,
+                size=size,
+                planType="profit_plan",
+                holdSide="long",
+                triggerPrice=str(target_price),
+            ),
+            signal_time=signal_time,
+        )
+
+        # Plans need the position the entry opens, so they wait for its ack
+        await self.submit(bracket.entry)
+        if bracket.entry.status == REJECTED:
+            for order in [bracket.stop, bracket.target]:
+                order.status = CANCELLED
+                order.error = "not sent: entry rejected"
+        else:
+            await asyncio.gather(
+                self.submit_protective(bracket.stop),
+                self.submit_protective(bracket.target),
+            )
+            if REJECTED in (bracket.stop.status, bracket.target.status):
+                await self.flatten(bracket)
+
+        latency = bracket.signal_to_ack_ms()
+        if latency is not None:
+            self.metrics.observe("orders.signal_to_ack_ms", latency)
+        trader_logger.info(f"Bracket for {symbol}:\n{bracket.format()}")
+        return bracket
+
+    async def submit_protective(self, order):
+        """Submit a stop or target plan, retrying it if it is rejected."""
+        for attempt in range(PROTECTIVE_RETRIES + 1):
+            if attempt:
+                # A new clientOid, since Bitget refuses reused ones
+                order.client_oid = order.body["clientOid"] = client_oid(order.leg)
+                order.error = None
+                trader_logger.warning(f"Retrying {order.leg} order ({attempt})")
+            await self.submit(order)
+            if order.status != REJECTED:
+                break
+        return order
+
+    async def flatten(self, bracket):
+        """
+        Close an unprotected bracket's position at market and cancel the plan
+        that was placed.
+        """
+        entry = bracket.entry
+        bracket.close = self.new_order(
+            "close",
+            "/api/mix/v1/order/placeOrder",
+            symbol=entry.body["symbol"],
+            size=entry.body["size"],
+            side="close_long",
+            orderType="market",
+        )
+        plans = [o for o in [bracket.stop, bracket.target] if o.status == ACKNOWLEDGED]
+        await asyncio.gather(
+            self.submit(bracket.close), *(self.cancel_plan(plan) for plan in plans)
+        )
+
+        self.metrics.incr("orders.flattened")
+        if bracket.close.status == REJECTED:
+            trader_logger.critical(
+                f"Position of {entry.client_oid} is open without a stop or target "
+                f"and could not be closed: {bracket.close.error}"
+            )
+
+    async def cancel_plan(self, order):
+        try:
+            await self.signed_request(
+                "POST",
+                "/api/mix/v1/plan/cancelPlan",
+                body={
+                    "symbol": order.body["symbol"],
+                    "marginCoin": self.margin_coin,
+                    "orderId": order.order_id,
+                    "planType": order.body["planType"],
+                },
+            )
+        except (BitGetAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            trader_logger.error(f"Cancelling {order.leg} plan failed: {e}")
+            return order
+        order.status = CANCELLED
+        return order
+
+    async def refresh(self, order):
+        """Update a placed order's state from the exchange."""
+        data = await self.signed_request(
+            "GET",
+            "/api/mix/v1/order/detail",
+            params={"symbol": order.body["symbol"], "orderId": order.order_id},
+        )
+        order.status = BITGET_STATES.get(data.get("state"), order.status)
+        return order
+
+    async def cancel(self, order):
+        await self.signed_request(
+            "POST",
+            "/api/mix/v1/order/cancel-order",
+            body={
+                "symbol": order.body["symbol"],
+                "marginCoin": self.margin_coin,
+                "orderId": order.order_id,
+            },
+        )
+        order.status = CANCELLED
+        return order
@@ -0,0 +1,188 @@
+"""
+Paper trading: entry signals become simulated long positions with the stop and
+one-to-one target of bitget.order_client.bracket_prices, filled from the live
+candle stream instead of the exchange.
+
+Positions live in flat NumPy arrays, one slot per position. Each (symbol,
+strategy) book also keeps running aggregates of its open positions: total size,
+total cost, the highest stop and the lowest target. A tick is marked to market
+from those alone, so its cost does not depend on how many positions are open;
+the positions themselves are only scanned when the tick reaches a stop or a
+target.
+"""
+
+import numpy as np
+
+from bitget.order_client import bracket_prices
+
+# Position status
+OPEN = 0
+STOPPED = 1
+TARGET = 2
+
+POSITION_CAPACITY = 256  # Initial slots; doubled when full
+
+
+class PaperTrader:
+    def __init__(self, capacity=POSITION_CAPACITY):
+        self.count = 0
+        self.book_ids = {}  # (symbol, strategy) -> book id
+        self.books = []  # book id -> (symbol, strategy)
+        self.symbol_books = {}  # symbol -> book ids
+
+        # Per position
+        self.book = np.zeros(capacity, dtype=np.int32)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.size = np.zeros(capacity)
+        self.entry = np.zeros(capacity)
+        self.stop = np.zeros(capacity)
+        self.target = np.zeros(capacity)
+        self.exit = np.full(capacity, np.nan)
+        self.opened_at = np.zeros(capacity, dtype=np.int64)
+        self.closed_at = np.zeros(capacity, dtype=np.int64)
+
+        # Per book, over its open positions
+        self.open_size = np.zeros(0)
+        self.open_cost = np.zeros(0)
+        self.max_stop = np.zeros(0)
+        self.min_target = np.zeros(0)
+        self.realized = np.zeros(0)
+        self.last_price = np.zeros(0)
+
+    def book_id(self, symbol, strategy):
+        key = (symbol, strategy)
+        book = self.book_ids.get(key)
+        if book is None:
+            book = self.book_ids[key] = len(self.books)
+            self.books.append(key)
+            self.symbol_books.setdefault(symbol, []).append(book)
+            self.open_size = np.append(self.open_size, 0.0)
+            self.open_cost = np.append(self.open_cost, 0.0)
+            self.max_stop = np.append(self.max_stop, -np.inf)
+            self.min_target = np.append(self.min_target, np.inf)
+            self.realized = np.append(self.realized, 0.0)
+            self.last_price = np.append(self.last_price, np.nan)
+        return book
+
+    def open(self, symbol, strategy, row, size=1.0, timestamp=0):
+        """Open a long at the close of the entry candle `row`."""
+        entry, stop, target = bracket_prices(row)
+        book = self.book_id(symbol, strategy)
+        if self.count == len(self.size):
+            self._grow()
+
+        i = self.count
+        self.count += 1
+        self.book[i] = book
+        self.status[i] = OPEN
+        self.size[i] = size
+        self.entry[i] = entry
+        self.stop[i] = stop
+        self.target[i] = target
+        self.opened_at[i] = timestamp
+
+        self.open_size[book] += size
+        self.open_cost[book] += size * entry
+        self.max_stop[book] = max(self.max_stop[book], stop)
+        self.min_target[book] = min(self.min_target[book], target)
+        self.last_price[book] = entry
+        return i
+
+    def mark(self, symbol, high, low, close, timestamp=0):
+        """
+        Mark every strategy's positions in `symbol` to a tick's prices, closing
+        those whose stop or target was reached.
+        :return: Number of positions closed.
+        """
+        closed = 0
+        for book in self.symbol_books.get(symbol, ()):
+            self.last_price[book] = close
+            if low <= self.max_stop[book] or high >= self.min_target[book]:
+                closed += self._settle(book, high, low, timestamp)
+        return closed
+
+    def _settle(self, book, high, low, timestamp):
+        slots = np.flatnonzero(
+            (self.book[: self.count] == book) & (self.status[: self.count] == OPEN)
+        )
+        # A candle reaching both is assumed to have hit the stop first
+        stopped = slots[self.stop[slots] >= low]
+        hit = slots[(self.target[slots] <= high) & (self.stop[slots] < low)]
+
+        self.status[stopped] = STOPPED
+        self.exit[stopped] = self.stop[stopped]
+        self.status[hit] = TARGET
+        self.exit[hit] = self.target[hit]
+
+        done = np.concatenate((stopped, hit))
+        self.closed_at[done] = timestamp
+        self.realized[book] += np.sum(
+            (self.exit[done] - self.entry[done]) * self.size[done]
+        )
+
+        # Rebuild the aggregates from what is still open
+        still_open = slots[self.status[slots] == OPEN]
+        self.open_size[book] = self.size[still_open].sum()
+        self.open_cost[book] = (self.size[still_open] * self.entry[still_open]).sum()
+        self.max_stop[book] = self.stop[still_open].max(initial=-np.inf)
+        self.min_target[book] = self.target[still_open].min(initial=np.inf)
+        return len(done)
+
+    def _grow(self):
+        for name in [
+            "book",
+            "status",
+            "size",
+            "entry",
+            "stop",
+            "target",
+            "exit",
+            "opened_at",
+            "closed_at",
+        ]:
+            values = getattr(self, name)
+            fill = np.nan if name == "exit" else 0
+            grown = np.full(len(values) * 2, fill, dtype=values.dtype)
+            grown[: len(values)] = values
+            setattr(self, name, grown)
+
+    def unrealized(self):
+        """Open PnL per book at the last marked prices."""
+        return self.open_size * self.last_price - self.open_cost
+
+    def summary(self):
+        status = self.status[: self.count]
+        books = self.book[: self.count]
+        unrealized = self.unrealized()
+        rows = []
+        for book, (symbol, strategy) in enumerate(self.books):
+            mine = books == book
+            rows.append(
+                {
+                    "symbol": symbol,
+                    "strategy": strategy,
+                    "open": int(np.sum(mine & (status == OPEN))),
+                    "wins": int(np.sum(mine & (status == TARGET))),
+                    "losses": int(np.sum(mine & (status == STOPPED))),
+                    "open_size": float(self.open_size[book]),
+                    "unrealized": float(np.nan_to_num(unrealized[book])),
+                    "realized": float(self.realized[book]),
+                }
+            )
+        return rows
+
+    def format(self):
+        rows = self.summary()
+        if not rows:
+            return "No paper positions yet."
+
+        lines = []
+        for row in rows:
+            lines.append(
+                f"{row['symbol']} {row['strategy']}: {row['open']} open "
+                f"({row['open_size']:g}), {row['wins']}W/{row['losses']}L | "
+                f"uPnL {row['unrealized']:+.2f} | PnL {row['realized']:+.2f}"
+            )
+        total = sum(row["unrealized"] + row["realized"] for row in rows)
+        lines.append(f"Total: {total:+.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from logger_config import trader_logger
+
+# Bitget websocket limits (per IP, per hour)
+RATE_LIMIT_CONNECTIONS = 100
+RATE_LIMIT_SUBSCRIPTIONS = 240
+
+# Bitget REST budget (request weight per second)
+RATE_LIMIT_REST_WEIGHT = 20
+
+
+class SlidingWindowCounter:
+    """
+    Counts weighted events over a rolling time window.
+
+    The window is split into a fixed ring of buckets holding per-bucket totals,
+    so recording an event and asking for the remaining budget are O(1) and the
+    memory used never grows with the number of events. An event is kept for at
+    most one bucket longer than `window`, which errs on the side of the limit.
+    """
+
+    def __init__(self, limit, window, buckets=60, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.bucket_width = window / buckets
+        self.clock = clock
+
+        # One extra slot so an event never expires before `window` has passed
+        self.counts = [0] * (buckets + 1)
+        self.total = 0
+        self.head = self._bucket_index(clock())
+
+    def _bucket_index(self, now):
+        return int(now // self.bucket_width)
+
+    def _advance(self, now):
+        index = self._bucket_index(now)
+        steps = index - self.head
+        if steps <= 0:
+            return
+
+        n_slots = len(self.counts)
+        if steps >= n_slots:
+            self.counts = [0] * n_slots
+            self.total = 0
+        else:
+            for i in range(self.head + 1, index + 1):
+                slot = i % n_slots
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+
+        self.head = index
+
+    def used(self):
+        self._advance(self.clock())
+        return self.total
+
+    def remaining(self):
+        return max(self.limit - self.used(), 0)
+
+    def record(self, weight=1):
+        self._advance(self.clock())
+        self.counts[self.head % len(self.counts)] += weight
+        self.total += weight
+
+    def wait_time(self, weight=1):
+        """
+        Seconds until `weight` more events fit in the window (0 if they fit now).
+        """
+        if weight > self.limit:
+            raise ValueError(f"Weight {weight} exceeds the limit of {self.limit}.")
+
+        now = self.clock()
+        self._advance(now)
+
+        excess = self.total + weight - self.limit
+        if excess <= 0:
+            return 0.0
+
+        # Walk from the oldest bucket until enough weight has expired
+        n_slots = len(self.counts)
+        freed = 0
+        for index in range(self.head - n_slots + 1, self.head + 1):
+            freed += self.counts[index % n_slots]
+            if freed >= excess:
+                expires_at = (index + n_slots) * self.bucket_width
+                return max(expires_at - now, 0.0)
+
+        return self.window
+
+
+class RateLimiter:
+    """
+    Process-wide budget for exchange connections, subscriptions and REST weight.
+
+    Callers `await acquire(...)` for a slot instead of failing when the budget is
+    exhausted; `remaining()` reports what is left in each window.
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic):
+        if limits is None:
+            limits = default_limits()
+
+        self.windows = {
+            name: SlidingWindowCounter(limit, window, clock=clock)
+            for name, (limit, window) in limits.items()
+        }
+
+    async def acquire(self, name, weight=1):
+        counter = self.windows[name]
+
+        while True:
+            delay = counter.wait_time(weight)
+            if delay <= 0:
+                counter.record(weight)
+                return
+
+            trader_logger.warning(
+                f"Rate limit for {name} reached "
+                f"({counter.used()}/{counter.limit}), waiting {delay:.1f}s."
+            )
+            await asyncio.sleep(delay)
+
+    def remaining(self, name=None):
+        if name is not None:
+            return self.windows[name].remaining()
+
+        return {name: counter.remaining() for name, counter in self.windows.items()}
+
+
+def default_limits(shares=1):
+    """
+    Bitget's limits as (limit, window in s), split evenly between `shares`
+    processes that use the same IP.
+    """
+    limits = {
+        "connections": (RATE_LIMIT_CONNECTIONS, 3600),
+        "subscriptions": (RATE_LIMIT_SUBSCRIPTIONS, 3600),
+        "rest": (RATE_LIMIT_REST_WEIGHT, 1),
+    }
+    return {
+        name: (max(limit // shares, 1), window)
+        for name, (limit, window) in limits.items()
+    }
+
+
+# Shared by every exchange client in the process
+rate_limiter = RateLimiter()
@@ -0,0 +1,88 @@
+import aiohttp
+
+from bitget.rate_limiter import rate_limiter as shared_rate_limiter
+from logger_config import trader_logger
+
+BITGET_REST_URL = "https://api.bitget.com"
+
+# Bitget returns at most this many candles per history request
+CANDLE_PAGE_LIMIT = 1000
+
+
+class BitGetAPIError(Exception):
+    pass
+
+
+class BitGetRestClient:
+    def __init__(self, base_url=BITGET_REST_URL, rate_limiter=None):
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.session = None
+
+    async def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get(self, path, params=None, weight=1):
+        await self.rate_limiter.acquire("rest", weight=weight)
+
+        session = await self.get_session()
+        async with session.get(f"{self.base_url}{path}", params=params) as response:
+            payload = await response.json(content_type=None)
+
+        # Some endpoints wrap the result in {"code": ..., "msg": ..., "data": ...}
+        if isinstance(payload, dict):
+            if payload.get("code") not in (None, "00000"):
+                raise BitGetAPIError(
+                    f"{path} failed: {payload.get('msg')} (Code: {payload.get('code')})"
+                )
+            payload = payload.get("data")
+
+        return payload
+
+    async def get_candles(
+        self, symbol, start_time, end_time, granularity="1m", interval_ms=60_000
+    ):
+        """
+        Fetch candle history between two open times (ms, inclusive), paging
+        forward until the range is covered.
+        :return: Raw candle rows sorted by timestamp.
+        """
+        candles = []
+        page_start = start_time
+
+        while page_start <= end_time:
+            page = await self.get(
+                "/api/mix/v1/market/candles",
+                params={
+                    "symbol": symbol,
+                    "granularity": granularity,
+                    "startTime": page_start,
+                    "endTime": end_time,
+                    "limit": CANDLE_PAGE_LIMIT,
+                },
+            )
+            if not page:
+                break
+
+            page = sorted(page, key=lambda candle: int(candle[0]))
+            candles.extend(
+                candle for candle in page if page_start <= int(candle[0]) <= end_time
+            )
+
+            last_timestamp = int(page[-1][0])
+            if len(page) < CANDLE_PAGE_LIMIT or last_timestamp < page_start:
+                break
+            page_start = last_timestamp + interval_ms
+
+        trader_logger.info(
+            f"Fetched {len(candles)} {granularity} candles for {symbol} "
+            f"between {start_time} and {end_time}."
+        )
+        return candles
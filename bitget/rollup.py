@@ -0,0 +1,156 @@
+import numpy as np
+
+from bitget.candle_store import CandleStore
+from bitget.timeframes import BITGET_GRANULARITY, TIMEFRAMES
+from logger_config import utils_logger
+
+ROLLUP_TIMEFRAMES = ("5m", "15m", "1h", "4h")
+
+# More changed 1m rows than this (snapshots, backfills) are re-aggregated in bulk
+INCREMENTAL_MAX_ROWS = 2
+
+
+class RollupState:
+    __slots__ = ("bucket", "closed", "minute_ts", "minute", "pending")
+
+    def __init__(self):
+        self.bucket = None  # Open time of the forming higher-timeframe candle
+        self.closed = None  # [o, h, l, c, v] of its finished 1m candles
+        self.minute_ts = None  # The 1m candle that may still change...
+        self.minute = None  # ...and its [o, h, l, c, v]
+        self.pending = None  # Forming candle not yet written to the store
+
+
+def merge_ohlcv(first, second):
+    if first is None:
+        return list(second)
+    return [
+        first[0],
+        max(first[1], second[1]),
+        min(first[2], second[2]),
+        second[3],
+        first[4] + second[4],
+    ]
+
+
+class CandleRollup:
+    """
+    Builds higher-timeframe candles from a 1m CandleStore.
+
+    Each 1m update is folded into every timeframe in constant time, and the
+    forming candle is only written to that timeframe's CandleStore (and its
+    indicators updated) when its bucket closes or when someone reads it through
+    `frame()`. Live ticks therefore cost a few float operations per timeframe.
+    """
+
+    def __init__(
+        self, source, timeframes=ROLLUP_TIMEFRAMES, max_size=1000, compact=False
+    ):
+        self.source = source
+        self.stores = {
+            tf: CandleStore(max_size, TIMEFRAMES[tf], compact=compact)
+            for tf in timeframes
+        }
+        self.states = {tf: RollupState() for tf in timeframes}
+        self.closed_buckets = set()
+
+        source.listeners.append(self.on_candles)
+
+    def on_candles(self, changed):
+        timestamps = changed.index.to_numpy(dtype=np.int64)
+        values = changed[["Open", "High", "Low", "Close", "Volume"]].to_numpy()
+
+        for tf, state in self.states.items():
+            in_order = state.minute_ts is None or timestamps[0] >= state.minute_ts
+            if len(changed) > INCREMENTAL_MAX_ROWS or not in_order:
+                self.rebuild(tf, int(timestamps[0]))
+                continue
+
+            for timestamp, row in zip(timestamps, values):
+                self.update(tf, int(timestamp), row.tolist())
+
+    def update(self, tf, timestamp, ohlcv):
+        state = self.states[tf]
+        bucket = timestamp - timestamp % TIMEFRAMES[tf]
+
+        if bucket != state.bucket:
+            # The previous candle of this timeframe is final now
+            self.flush(tf)
+            if state.bucket is not None:
+                self.closed_buckets.add(tf)
+            state.bucket = bucket
+            state.closed = None
+            state.minute_ts = None
+
+        if state.minute_ts is not None and timestamp != state.minute_ts:
+            state.closed = merge_ohlcv(state.closed, state.minute)
+
+        state.minute_ts = timestamp
+        state.minute = ohlcv
+        state.pending = [bucket] + merge_ohlcv(state.closed, ohlcv)
+
+    def flush(self, tf):
+        state = self.states[tf]
+        if state.pending is not None:
+            self.stores[tf].upsert([state.pending])
+            state.pending = None
+
+    def frame(self, tf):
+        """Candles and indicators of `tf`, including the forming candle."""
+        self.flush(tf)
+        return self.stores[tf].df
+
+    def pop_closed(self, tf):
+        """True once after a candle of `tf` has closed."""
+        if tf in self.closed_buckets:
+            self.closed_buckets.discard(tf)
+            return True
+        return False
+
+    def rebuild(self, tf, since):
+        """Re-aggregate every `tf` bucket from the one holding `since` onwards."""
+        source = self.source.df
+        interval = TIMEFRAMES[tf]
+        bucket = since - since % interval
+
+        # A bucket is only rebuilt if the 1m history covers it from its start
+        first = int(source.index[0])
+        bucket = max(bucket, first + (-first % interval))
+
+        minutes = source[source.index >= bucket]
+        if minutes.empty:
+            return
+
+        timestamps = minutes.index.to_numpy(dtype=np.int64)
+        buckets = timestamps - timestamps % interval
+        grouped = minutes.groupby(buckets)
+        aggregated = grouped.agg(
+            Open=("Open", "first"),
+            High=("High", "max"),
+            Low=("Low", "min"),
+            Close=("Close", "last"),
+            Volume=("Volume", "sum"),
+        )
+
+        rows = [
+            [int(ts)] + row
+            for ts, row in zip(aggregated.index, aggregated.values.tolist())
+        ]
+        self.stores[tf].upsert(rows)
+
+        # Resume incremental updates inside the last (forming) bucket
+        state = self.states[tf]
+        if state.bucket is not None and buckets[-1] > state.bucket:
+            self.closed_buckets.add(tf)
+
+        last_bucket = minutes[buckets == buckets[-1]]
+        values = last_bucket[["Open", "High", "Low", "Close", "Volume"]].values.tolist()
+        state.bucket = int(buckets[-1])
+        state.closed = None
+        for ohlcv in values[:-1]:
+            state.closed = merge_ohlcv(state.closed, ohlcv)
+        state.minute_ts = int(timestamps[-1])
+        state.minute = values[-1]
+        state.pending = None
+
+        utils_logger.debug(f"Rebuilt {len(rows)} {tf} candles from {len(minutes)} 1m.")
@@ -0,0 +1,122 @@
+"""
+Trigger and entry conditions of many symbols at once.
+
+The scanner keeps the fields the strategy reads for every watched symbol in two
+(symbols x fields) arrays, one for the forming candle and one for the candle
+before it. A scan evaluates the strategy's rules over the columns of those
+arrays (see Rule.scan), so its cost is a few NumPy operations per rule no
+matter how many symbols are watched.
+"""
+
+import numpy as np
+
+from bitget.strategy import BOLLINGER_REVERSAL
+
+SCANNER_CAPACITY = 64  # Initial symbol slots; doubled when full
+
+
+class Scanner:
+    def __init__(self, strategy=BOLLINGER_REVERSAL, capacity=SCANNER_CAPACITY):
+        self.strategy = strategy
+        self.fields = sorted(strategy.trigger.fields() | strategy.entry.fields())
+        self.symbols = []
+        self.slots = {}  # symbol -> row
+
+        # Column-major, so each field is a contiguous array over the symbols
+        self.current = np.full((capacity, len(self.fields)), np.nan, order="F")
+        self.previous = np.full((capacity, len(self.fields)), np.nan, order="F")
+        self.armed = np.zeros(capacity, dtype=bool)  # The last closed candle triggered
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def slot(self, symbol):
+        i = self.slots.get(symbol)
+        if i is None:
+            if len(self.symbols) == len(self.armed):
+                self._grow()
+            i = self.slots[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return i
+
+    def _grow(self):
+        for name in ["current", "previous", "armed"]:
+            values = getattr(self, name)
+            fill = False if name == "armed" else np.nan
+            shape = (len(values) * 2,) + values.shape[1:]
+            grown = np.full(shape, fill, values.dtype, order="F")
+            grown[: len(values)] = values
+            setattr(self, name, grown)
+
+    def update(self, symbol, df, armed=False):
+        """
+        Latest values of `symbol` from its candle frame with indicators: the
+        forming candle is the last row, the one before it the previous candle.
+        """
+        if len(df) < 2:
+            return
+        i = self.slot(symbol)
+        # Fields a frame lacks (e.g. book features without a book) are NaN
+        values = df.iloc[-2:].reindex(columns=self.fields).to_numpy(np.float64)
+        self.previous[i] = values[0]
+        self.current[i] = values[1]
+        self.armed[i] = armed
+
+    def snapshot(self):
+        n = len(self.symbols)
+        return {
+            "symbols": list(self.symbols),
+            "current": self.current[:n].copy(),
+            "previous": self.previous[:n].copy(),
+            "armed": self.armed[:n].copy(),
+        }
+
+    def merge(self, snapshot):
+        """Take over the symbols of another scanner's snapshot()."""
+        rows = [self.slot(symbol) for symbol in snapshot["symbols"]]
+        self.current[rows] = snapshot["current"]
+        self.previous[rows] = snapshot["previous"]
+        self.armed[rows] = snapshot["armed"]
+
+    def columns(self, values):
+        return {name: values[:, i] for i, name in enumerate(self.fields)}
+
+    def scan(self):
+        """
+        Per symbol, in the order of `symbols`: whether the forming candle meets
+        the trigger and the entry (if it closed now), and its distance to the
+        trigger (see Rule.distance).
+        """
+        n = len(self.symbols)
+        row = self.columns(self.current[:n])
+        prev = self.columns(self.previous[:n])
+
+        trigger = self.strategy.trigger.scan(row, prev)
+        entry = self.armed[:n] & self.strategy.entry.scan(row, prev)
+        distance = self.strategy.trigger.distance(row, prev)
+        return trigger, entry, distance
+
+    def rank(self, top=None):
+        """Symbols nearest to their trigger first."""
+        trigger, entry, distance = self.scan()
+        order = np.argsort(distance, kind="stable")[:top]
+        return [
+            {
+                "symbol": self.symbols[i],
+                "trigger": bool(trigger[i]),
+                "entry": bool(entry[i]),
+                "distance": float(distance[i]),
+            }
+            for i in order
+        ]
+
+    def format(self, top=20):
+        rows = self.rank(top)
+        if not rows:
+            return "No symbols scanned yet."
+
+        lines = []
+        for row in rows:
+            flags = " ".join(flag for flag in ["trigger", "entry"] if row[flag]).upper()
+            lines.append(f"{row['symbol']:<14} {row['distance']:8.2%} {flags}")
+        return "\n".join(lines)
@@ -0,0 +1,221 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from logger_config import utils_logger
+
+FEED_FIELDS = [
+    "UnixTimestamp",
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Volume",
+    "SMA",
+    "Rolling_STD",
+    "Bollinger_Upper_2",
+    "Bollinger_Lower_2",
+    "Bollinger_Upper_3",
+    "Bollinger_Lower_3",
+    "Bollinger_Upper_4",
+    "Bollinger_Lower_4",
+    "RSI",
+    "Stochastic",
+]
+
+# Header slots (int64): rows published so far, capacity, field count, version
+HEADER_COUNT, HEADER_CAPACITY, HEADER_FIELDS, HEADER_VERSION = range(4)
+HEADER_SIZE = 8
+
+READ_RETRIES = 100
+
+
+def _layout(buffer, capacity, n_fields):
+    """
+    Map the shared block onto numpy arrays:
+      header   int64[HEADER_SIZE]
+      row_ids  int64[capacity]   absolute row number held by each slot
+      versions int64[capacity]   odd while the slot is being written
+      rows     float64[capacity, n_fields]
+    """
+    offset = 0
+    header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=buffer, offset=offset)
+    offset += header.nbytes
+    row_ids = np.ndarray((capacity,), dtype=np.int64, buffer=buffer, offset=offset)
+    offset += row_ids.nbytes
+    versions = np.ndarray((capacity,), dtype=np.int64, buffer=buffer, offset=offset)
+    offset += versions.nbytes
+    rows = np.ndarray(
+        (capacity, n_fields), dtype=np.float64, buffer=buffer, offset=offset
+    )
+    return header, row_ids, versions, rows
+
+
+def _block_size(capacity, n_fields):
+    return 8 * (HEADER_SIZE + 2 * capacity + capacity * n_fields)
+
+
+class SharedCandleFeed:
+    """
+    Publishes a CandleStore into a shared memory ring buffer so other processes
+    (renderer, backtester, strategy workers) can read live candles without
+    pickling them through a pipe.
+
+    Protocol: every slot carries the absolute row number it holds and a version
+    that is odd while the writer changes it. Readers copy the slots they want and
+    keep the copy only if the versions were even and unchanged around the copy.
+    Rows are rewritten in place when a candle is revised and appended otherwise.
+    """
+
+    def __init__(self, name, capacity=1000, fields=FEED_FIELDS):
+        self.fields = fields
+        self.capacity = capacity
+        size = _block_size(capacity, len(fields))
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a writer that crashed: take the name over
+            utils_logger.warning(f"Replacing stale shared candle feed {name}.")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self.header, self.row_ids, self.versions, self.rows = _layout(
+            self.shm.buf, capacity, len(fields)
+        )
+
+        self.header[:] = 0
+        self.header[HEADER_CAPACITY] = capacity
+        self.header[HEADER_FIELDS] = len(fields)
+        self.row_ids[:] = -1
+        self.versions[:] = 0
+
+    def publish(self, df):
+        """
+        Write candles (indexed by UnixTimestamp, ascending) into the ring.
+        Candles already in the ring are rewritten, later ones are appended.
+        """
+        if df is None or df.empty:
+            return
+
+        timestamps = df.index.to_numpy(dtype=np.int64)
+        values = df.reset_index()[self.fields].to_numpy(dtype=np.float64)
+
+        count = int(self.header[HEADER_COUNT])
+        start = self.find_row(timestamps[0], count)
+        if start is None:
+            # Older than anything still in the ring: keep only what fits after it
+            start = count
+            keep = timestamps > self.last_timestamp(count)
+            timestamps, values = timestamps[keep], values[keep]
+            if not len(values):
+                return
+
+        for offset, row in enumerate(values):
+            row_id = start + offset
+            slot = row_id % self.capacity
+
+            self.versions[slot] += 1  # odd: write in progress
+            self.rows[slot] = row
+            self.row_ids[slot] = row_id
+            self.versions[slot] += 1
+
+        self.header[HEADER_COUNT] = max(count, start + len(values))
+        self.header[HEADER_VERSION] += 1
+
+    def find_row(self, timestamp, count):
+        """Absolute row number holding `timestamp`, or where it would go."""
+        oldest = max(count - self.capacity, 0)
+        if count == oldest:
+            return count
+
+        slots = np.arange(oldest, count) % self.capacity
+        retained = self.rows[slots, 0]
+        if timestamp < retained[0]:
+            return None
+        return oldest + int(np.searchsorted(retained, timestamp))
+
+    def last_timestamp(self, count):
+        if count == 0:
+            return -np.inf
+        return self.rows[(count - 1) % self.capacity, 0]
+
+    def close(self):
+        self.header = self.row_ids = self.versions = self.rows = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class SharedCandleReader:
+    """
+    Read side of a SharedCandleFeed, for use from another process.
+    """
+
+    def __init__(self, name, fields=FEED_FIELDS):
+        self.fields = fields
+        # Attaching must not make this process own (and later unlink) the block
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always registers the block with the resource tracker
+            self.shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        capacity = int(header[HEADER_CAPACITY])
+        self.header, self.row_ids, self.versions, self.rows = _layout(
+            self.shm.buf, capacity, int(header[HEADER_FIELDS])
+        )
+        self.capacity = capacity
+
+    @property
+    def version(self):
+        """Bumped by the writer on every publish; poll it to detect changes."""
+        return int(self.header[HEADER_VERSION])
+
+    def read_array(self, n=None):
+        """
+        Consistent copy of the last `n` rows (all retained rows by default).
+        """
+        for _ in range(READ_RETRIES):
+            count = int(self.header[HEADER_COUNT])
+            oldest = max(count - self.capacity, 0)
+            if n is not None:
+                oldest = max(oldest, count - n)
+
+            row_ids = np.arange(oldest, count)
+            slots = row_ids % self.capacity
+
+            versions_before = self.versions[slots].copy()
+            rows = self.rows[slots].copy()
+            ids = self.row_ids[slots].copy()
+            versions_after = self.versions[slots]
+
+            if (
+                not (versions_before & 1).any()
+                and np.array_equal(versions_before, versions_after)
+                and np.array_equal(ids, row_ids)
+            ):
+                return rows
+
+        utils_logger.warning("Shared candle feed kept changing during read.")
+        raise BlockingIOError("Could not get a consistent read of the candle feed.")
+
+    def read(self, n=None):
+        rows = self.read_array(n)
+        df = pd.DataFrame(rows, columns=self.fields)
+        df["UnixTimestamp"] = df["UnixTimestamp"].astype("int64")
+        df["Timestamp"] = (
+            pd.to_datetime(df["UnixTimestamp"], unit="ms")
+            .dt.tz_localize("UTC")
+            .dt.tz_convert("America/Los_Angeles")
+        )
+        return df.set_index("UnixTimestamp")
+
+    def close(self):
+        self.header = self.row_ids = self.versions = self.rows = None
+        self.shm.close()
@@ -0,0 +1,385 @@
+"""
+Small rule language for trading strategies.
+
+A rule is written once, e.g.
+
+    touch(BOLLINGER_LOWER_2) & ((RSI < 20) | (STOCHASTIC < 20))
+
+and can then be evaluated two ways that always agree:
+
+- `rule.mask(df)`: vectorized over a whole frame, for backtests.
+- `rule.evaluate(row, prev)`: on the latest candle and the one before it, for
+  live ticks. Constant work no matter how much history is stored.
+- `rule.scan(row, prev)`: like evaluate, but `row` and `prev` map each field to
+  an array with one value per symbol, for scanning many symbols at once.
+
+Comparisons involving NaN (e.g. indicators still warming up) are False in both.
+"""
+
+import operator
+
+import numpy as np
+
+
+class Expr:
+    """A numeric value per candle."""
+
+    def values(self, df):
+        raise NotImplementedError
+
+    def value(self, row, prev):
+        raise NotImplementedError
+
+    def column(self, row, prev):
+        raise NotImplementedError
+
+    def fields(self):
+        return set()
+
+    def _compare(self, other, op, symbol):
+        return Compare(self, as_expr(other), op, symbol)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt, "<")
+
+    def __le__(self, other):
+        return self._compare(other, operator.le, "<=")
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt, ">")
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge, ">=")
+
+
+class Field(Expr):
+    def __init__(self, name):
+        self.name = name
+
+    def values(self, df):
+        return df[self.name].to_numpy(dtype=np.float64)
+
+    def value(self, row, prev):
+        return float(row[self.name])
+
+    def column(self, row, prev):
+        return row[self.name]
+
+    def fields(self):
+        return {self.name}
+
+    def __repr__(self):
+        return self.name
+
+
+class BookField(Field):
+    """
+    A live order book feature (see bitget.order_book.with_book_features).
+    Candles without a book, e.g. in backtests, have NaN, so rules on it fail.
+    """
+
+    def values(self, df):
+        if self.name not in df:
+            return np.full(len(df), np.nan)
+        return super().values(df)
+
+    def value(self, row, prev):
+        return float(row.get(self.name, np.nan))
+
+
+class Prev(Expr):
+    """The value of a field on the previous candle."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def values(self, df):
+        values = self.field.values(df)
+        return np.concatenate(([np.nan], values[:-1]))
+
+    def value(self, row, prev):
+        if prev is None:
+            return np.nan
+        return self.field.value(prev, None)
+
+    def column(self, row, prev):
+        return self.field.column(prev, None)
+
+    def fields(self):
+        return self.field.fields()
+
+    def __repr__(self):
+        return f"prev({self.field})"
+
+
+class Const(Expr):
+    def __init__(self, constant):
+        self.constant = float(constant)
+
+    def values(self, df):
+        return np.full(len(df), self.constant)
+
+    def value(self, row, prev):
+        return self.constant
+
+    def column(self, row, prev):
+        return self.constant
+
+    def __repr__(self):
+        return f"{self.constant:g}"
+
+
+def as_expr(value):
+    return value if isinstance(value, Expr) else Const(value)
+
+
+class Rule:
+    """A True/False condition per candle, combined with &, | and ~."""
+
+    label = None
+
+    def mask(self, df):
+        raise NotImplementedError
+
+    def evaluate(self, row, prev=None):
+        raise NotImplementedError
+
+    def scan(self, row, prev):
+        raise NotImplementedError
+
+    def distance(self, row, prev):
+        """
+        Per symbol, how far the rule is from holding: 0 exactly when it holds,
+        else the largest relative gap between a comparison and its threshold
+        that still has to close (inf while values are missing).
+        """
+        raise NotImplementedError
+
+    def children(self):
+        return ()
+
+    def fields(self):
+        """Names of the fields the rule reads."""
+        return set().union(*(child.fields() for child in self.children()))
+
+    def named(self, label):
+        self.label = label
+        return self
+
+    def explain(self, row, prev=None):
+        """Result of every labelled sub-rule, e.g. for the trigger/entry stats."""
+        stats = {}
+        if self.label:
+            stats[self.label] = self.evaluate(row, prev)
+        for child in self.children():
+            stats.update(child.explain(row, prev))
+        return stats
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Compare(Rule):
+    def __init__(self, left, right, op, symbol):
+        self.left = left
+        self.right = right
+        self.op = op
+        self.symbol = symbol
+
+    def mask(self, df):
+        with np.errstate(invalid="ignore"):
+            return self.op(self.left.values(df), self.right.values(df))
+
+    def evaluate(self, row, prev=None):
+        return bool(self.op(self.left.value(row, prev), self.right.value(row, prev)))
+
+    def scan(self, row, prev):
+        with np.errstate(invalid="ignore"):
+            return self.op(self.left.column(row, prev), self.right.column(row, prev))
+
+    def distance(self, row, prev):
+        left = self.left.column(row, prev)
+        right = self.right.column(row, prev)
+        gap = left - right if self.symbol in ("<", "<=") else right - left
+        with np.errstate(invalid="ignore", divide="ignore"):
+            met = self.op(left, right)
+            # Unmet at a gap of 0 (a strict comparison of equal values) is
+            # still short of the trigger, so the smallest positive distance
+            near = np.fmax(gap / np.abs(right), np.finfo(np.float64).tiny)
+            # NaN gaps fail `gap >= 0`, so missing values are infinitely far
+            return np.where(met, 0.0, np.where(gap >= 0, near, np.inf))
+
+    def fields(self):
+        return self.left.fields() | self.right.fields()
+
+    def __repr__(self):
+        return f"({self.left} {self.symbol} {self.right})"
+
+
+class All(Rule):
+    def __init__(self, *rules):
+        self.rules = rules
+
+    def children(self):
+        return self.rules
+
+    def mask(self, df):
+        return np.logical_and.reduce([rule.mask(df) for rule in self.rules])
+
+    def evaluate(self, row, prev=None):
+        return all(rule.evaluate(row, prev) for rule in self.rules)
+
+    def scan(self, row, prev):
+        return np.logical_and.reduce([rule.scan(row, prev) for rule in self.rules])
+
+    def distance(self, row, prev):
+        return np.maximum.reduce([rule.distance(row, prev) for rule in self.rules])
+
+    def __repr__(self):
+        return "(" + " & ".join(map(repr, self.rules)) + ")"
+
+
+class Any(Rule):
+    def __init__(self, *rules):
+        self.rules = rules
+
+    def children(self):
+        return self.rules
+
+    def mask(self, df):
+        return np.logical_or.reduce([rule.mask(df) for rule in self.rules])
+
+    def evaluate(self, row, prev=None):
+        return any(rule.evaluate(row, prev) for rule in self.rules)
+
+    def scan(self, row, prev):
+        return np.logical_or.reduce([rule.scan(row, prev) for rule in self.rules])
+
+    def distance(self, row, prev):
+        return np.minimum.reduce([rule.distance(row, prev) for rule in self.rules])
+
+    def __repr__(self):
+        return "(" + " | ".join(map(repr, self.rules)) + ")"
+
+
+class Not(Rule):
+    def __init__(self, rule):
+        self.rule = rule
+
+    def children(self):
+        return (self.rule,)
+
+    def mask(self, df):
+        return ~self.rule.mask(df)
+
+    def evaluate(self, row, prev=None):
+        return not self.rule.evaluate(row, prev)
+
+    def scan(self, row, prev):
+        return ~self.rule.scan(row, prev)
+
+    def distance(self, row, prev):
+        # How far a negation is from holding has no threshold to measure
+        return np.where(self.scan(row, prev), 0.0, np.inf)
+
+    def __repr__(self):
+        return f"~{self.rule}"
+
+
+OPEN = Field("Open")
+HIGH = Field("High")
+LOW = Field("Low")
+CLOSE = Field("Close")
+RSI = Field("RSI")
+STOCHASTIC = Field("Stochastic")
+BOLLINGER_LOWER_2 = Field("Bollinger_Lower_2")
+BOLLINGER_LOWER_3 = Field("Bollinger_Lower_3")
+SPREAD_BPS = BookField("Spread_bps")
+BOOK_IMBALANCE = BookField("Book_imbalance")
+
+
+def touch(band):
+    """The candle touches or penetrates `band` (any of its prices at or below it)."""
+    band = as_expr(band)
+    return Any(OPEN <= band, CLOSE <= band, LOW <= band, HIGH <= band)
+
+
+def crosses_above(expr, level):
+    """`expr` was below `level` on the previous candle and is above it now."""
+    return All(Prev(expr) < level, expr > level)
+
+
+class Strategy:
+    """
+    A trigger rule followed by an entry rule: an entry fires on the candle right
+    after a candle that met the trigger, if the entry rule holds on it.
+    """
+
+    def __init__(self, name, trigger, entry):
+        self.name = name
+        self.trigger = trigger
+        self.entry = entry
+
+    def masks(self, df):
+        """Vectorized (trigger, entry) masks over every candle of `df`."""
+        trigger = self.trigger.mask(df)
+        entry = self.entry.mask(df)
+
+        # A candle needs a predecessor to be evaluated
+        if len(df):
+            trigger[0] = False
+            entry[0] = False
+        entry[1:] &= trigger[:-1]
+
+        return trigger, entry
+
+    def live(self):
+        return LiveStrategy(self)
+
+
+class LiveStrategy:
+    """
+    Incremental evaluator of a Strategy, fed one closed candle at a time.
+    Produces the same signals as Strategy.masks over the same candles.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.armed = False  # The previous candle met the trigger
+        self.prev = None
+
+    def check(self, row, prev):
+        """Evaluate `row` without changing state: (trigger met, entry met)."""
+        if prev is None:
+            return False, False
+
+        entry_met = self.armed and self.strategy.entry.evaluate(row, prev)
+        trigger_met = self.strategy.trigger.evaluate(row, prev)
+        return trigger_met, entry_met
+
+    def on_candle(self, row):
+        trigger_met, entry_met = self.check(row, self.prev)
+        self.armed = trigger_met
+        self.prev = row
+        return trigger_met, entry_met
+
+
+# Bollinger band reversal: the trigger and entry rules the bot trades on
+TRIGGER = touch(BOLLINGER_LOWER_2).named("touch_or_penetrate") & (
+    (RSI < 20).named("rsi_below_20") | (STOCHASTIC < 20).named("stochastic_below_20")
+)
+
+ENTRY = (
+    (CLOSE > BOLLINGER_LOWER_2).named("retraces_through_band")
+    & (RSI > 20).named("rsi_above_20")
+    & crosses_above(STOCHASTIC, 20).named("stochastic_cross")
+    & ((STOCHASTIC > 20) & (STOCHASTIC < 40)).named("stochastic_between_20_and_40")
+)
+
+BOLLINGER_REVERSAL = Strategy("bollinger_reversal", TRIGGER, ENTRY)
@@ -0,0 +1,272 @@
+"""
+Runs Traders for many symbols in worker processes.
+
+Symbols are sharded across the workers; each worker runs one Trader (own
+websocket, candle stores and strategy) per symbol on its own event loop and
+GIL, with its share of the rate limits. Trader options (order size, depth
+channel) are passed on to every worker. Workers report to the bot process over
+a one-way pipe:
+
+    ("alert", symbol, message)    an entry alert, for the AlertDispatcher
+    ("metrics", None, snapshot)   the worker's Metrics.snapshot()
+    ("state", symbol, state)      a Trader.checkpoint()
+    ("scan", None, snapshot)      the worker's Scanner.snapshot()
+
+The supervisor reads the pipes from its event loop (no polling thread). When a
+worker exits, it is restarted with backoff and its Traders restore the last
+checkpoint of each symbol.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+
+from bitget.scanner import Scanner
+from logger_config import trader_logger
+from metrics import metrics as shared_metrics
+
+SCAN_INTERVAL = 1  # Seconds between worker scanner reports
+METRICS_INTERVAL = 10  # Seconds between worker metric reports
+CHECKPOINT_INTERVAL = 60  # Seconds between Trader checkpoints
+
+RESTART_BACKOFF_MIN = 1
+RESTART_BACKOFF_MAX = 60
+HEALTHY_RUNTIME = 300  # A worker up this long restarts with the minimum backoff
+
+
+def shard_symbols(symbols, n_workers):
+    """Deal the symbols round-robin into at most `n_workers` shards."""
+    symbols = sorted(set(symbols))
+    n_shards = max(min(n_workers, len(symbols)), 1)
+    return [symbols[i::n_shards] for i in range(n_shards)]
+
+
+class WorkerChannel:
+    """The worker's end of the pipe to the supervisor."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def alert(self, symbol, message):
+        self.conn.send(("alert", symbol, message))
+
+    def metrics(self, snapshot):
+        self.conn.send(("metrics", None, snapshot))
+
+    def checkpoint(self, symbol, state):
+        self.conn.send(("state", symbol, state))
+
+    def scan(self, snapshot):
+        self.conn.send(("scan", None, snapshot))
+
+
+def run_worker(worker_id, symbols, conn, states, n_workers, **options):
+    """Process entry point: Traders for `symbols` until the process is stopped."""
+    asyncio.run(
+        worker_main(
+            worker_id, symbols, WorkerChannel(conn), states, n_workers, **options
+        )
+    )
+
+
+async def worker_main(
+    worker_id,
+    symbols,
+    channel,
+    states,
+    n_workers,
+    order_size=None,
+    book_channel=None,
+    journal_path=None,
+):
+    """
+    :param order_size: Contracts per entry; live bracket orders are sent when set.
+    :param book_channel: Depth channel of every Trader (see Trader).
+    :param journal_path: Prefix of the per-symbol depth journals.
+    """
+    from bitget.rate_limiter import RateLimiter, default_limits
+    from bitget.trader import Trader
+
+    rate_limiter = RateLimiter(default_limits(n_workers))
+    order_client = None
+    if order_size:
+        from bitget.order_client import BitGetOrderClient
+
+        order_client = BitGetOrderClient(
+            os.getenv("API_KEY"),
+            os.getenv("SECRET_KEY"),
+            os.getenv("PASSPHRASE"),
+            rate_limiter=rate_limiter,
+        )
+        await order_client.warm_up(symbols=[f"{s}_UMCBL" for s in symbols])
+
+    scanner = Scanner()
+    traders = {}
+    for symbol in symbols:
+        trader = Trader(
+            entry_point_callback=functools.partial(channel.alert, symbol),
+            rate_limiter=rate_limiter,
+            order_client=order_client,
+            order_size=order_size,
+            symbol=symbol,
+            scanner=scanner,
+            compact=True,  # Many symbols per process
+            book_channel=book_channel,
+            journal_path=f"{journal_path}.{symbol}" if journal_path else None,
+        )
+        if symbol in states:
+            trader.restore(states[symbol])
+        traders[symbol] = trader
+
+    trader_logger.info(f"Worker {worker_id} running {', '.join(symbols)}")
+    tasks = [asyncio.create_task(trader.connect()) for trader in traders.values()]
+
+    last_metrics = last_checkpoint = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(SCAN_INTERVAL)
+            if len(scanner):
+                channel.scan(scanner.snapshot())
+
+            if time.monotonic() - last_metrics >= METRICS_INTERVAL:
+                last_metrics = time.monotonic()
+                channel.metrics(shared_metrics.snapshot())
+
+            if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                last_checkpoint = time.monotonic()
+                for symbol, trader in traders.items():
+                    channel.checkpoint(symbol, trader.checkpoint())
+    finally:
+        for task in tasks:
+            task.cancel()
+        if order_client is not None:
+            await order_client.close()
+
+
+class Worker:
+    def __init__(self, worker_id, symbols):
+        self.id = worker_id
+        self.symbols = symbols
+        self.process = None
+        self.conn = None
+        self.started_at = None
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF_MIN
+
+    def format(self):
+        alive = self.process is not None and self.process.is_alive()
+        uptime = time.monotonic() - self.started_at if alive else 0
+        return (
+            f"worker {self.id} ({'up' if alive else 'down'} {uptime:.0f}s, "
+            f"{self.restarts} restarts): {', '.join(self.symbols)}"
+        )
+
+
+class Supervisor:
+    def __init__(
+        self,
+        symbols,
+        workers=None,
+        on_alert=None,
+        target=run_worker,
+        metrics=None,
+        options=None,
+    ):
+        self.shards = shard_symbols(symbols, workers or os.cpu_count() or 1)
+        self.workers = [Worker(i, shard) for i, shard in enumerate(self.shards)]
+        self.on_alert = on_alert
+        self.target = target
+        self.metrics = metrics or shared_metrics
+        self.options = options or {}  # Keyword arguments of every worker
+
+        # Fresh interpreters: forking a process with a running loop is unsafe
+        self.context = multiprocessing.get_context("spawn")
+        self.states = {}  # symbol -> last checkpoint
+        self.worker_metrics = {}  # worker id -> last snapshot
+        self.scanner = Scanner()  # Every worker's symbols, for !scan
+        self.loop = None
+        self.stopping = False
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            self.spawn(worker)
+
+    def spawn(self, worker):
+        if self.stopping:
+            return
+
+        conn, child_conn = self.context.Pipe(duplex=False)
+        states = {s: self.states[s] for s in worker.symbols if s in self.states}
+        worker.process = self.context.Process(
+            target=self.target,
+            args=(worker.id, worker.symbols, child_conn, states, len(self.workers)),
+            kwargs=self.options,
+            name=f"trader-worker-{worker.id}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()  # Only the worker writes; EOF then means it exited
+
+        worker.conn = conn
+        worker.started_at = time.monotonic()
+        self.loop.add_reader(conn.fileno(), self.on_readable, worker)
+
+    def on_readable(self, worker):
+        try:
+            while worker.conn.poll():
+                kind, symbol, payload = worker.conn.recv()
+                self.handle(worker, kind, symbol, payload)
+        except (EOFError, OSError):
+            self.on_exit(worker)
+
+    def handle(self, worker, kind, symbol, payload):
+        if kind == "alert":
+            self.metrics.incr("supervisor.alerts")
+            if self.on_alert:
+                self.on_alert(f"[{symbol}] {payload}")
+        elif kind == "metrics":
+            self.worker_metrics[worker.id] = payload
+            for name, value in payload["counters"].items():
+                self.metrics.gauge(f"worker{worker.id}.{name}", value)
+        elif kind == "state":
+            self.states[symbol] = payload
+        elif kind == "scan":
+            self.scanner.merge(payload)
+
+    def on_exit(self, worker):
+        self.loop.remove_reader(worker.conn.fileno())
+        worker.conn.close()
+        worker.process.join(timeout=1)
+        if self.stopping:
+            return
+
+        if time.monotonic() - worker.started_at >= HEALTHY_RUNTIME:
+            worker.backoff = RESTART_BACKOFF_MIN
+        delay = worker.backoff
+        worker.backoff = min(worker.backoff * 2, RESTART_BACKOFF_MAX)
+        worker.restarts += 1
+        self.metrics.incr("supervisor.restarts")
+
+        trader_logger.error(
+            f"Worker {worker.id} exited ({worker.process.exitcode}), "
+            f"restarting in {delay}s"
+        )
+        self.loop.call_later(delay, self.spawn, worker)
+
+    def stop(self):
+        self.stopping = True
+        for worker in self.workers:
+            if worker.conn is not None and not worker.conn.closed:
+                self.loop.remove_reader(worker.conn.fileno())
+                worker.conn.close()
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+
+    def format(self):
+        return "\n".join(worker.format() for worker in self.workers)
@@ -0,0 +1,11 @@
+# Candle length in ms for each supported timeframe
+TIMEFRAMES = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+}
+
+# Bitget's name for each timeframe in the candle-history endpoint
+BITGET_GRANULARITY = {"1m": "1m", "5m": "5m", "15m": "15m", "1h": "1H", "4h": "4H"}
@@ -1,10 +1,10 @@
 import asyncio
+from collections import OrderedDict
+import inspect
+import random
 import websockets
 import json
 import time
-import hmac
-import hashlib
-import base64
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -12,41 +12,90 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
+from bitget.candle_store import CandleStore
+from bitget.heartbeat import Heartbeat
+from bitget.order_book import (
+    BOOK_CHANNELS,
+    DepthJournal,
+    OrderBook,
+    with_book_features,
+)
+from bitget.order_client import bracket_prices, sign
+from bitget.rest_client import BitGetRestClient
+from bitget.rollup import BITGET_GRANULARITY, TIMEFRAMES, CandleRollup
+from bitget.strategy import BOLLINGER_REVERSAL
 from bitget.utils import (
-    convert_to_dataframe,
     format_trigger_stats,
     format_entry_stats,
-    check_entry_conditions,
-    check_trigger_conditions,
+    entry_stats,
+    trigger_stats,
 )
 
+from bitget.rate_limiter import rate_limiter as shared_rate_limiter
 from logger_config import trader_logger
+from market_data import BitgetAdapter
 
-# Load environment variables from .env file
-load_dotenv()
-
-RATE_LIMIT_CONNECTIONS = 100
-RATE_LIMIT_SUBSCRIPTIONS = 240
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+QUERY_CACHE_SIZE = 16  # Slices kept by get_data_last_n_hours()
 
 
 class Trader:
-    def __init__(self, entry_point_callback=None):
+    def __init__(
+        self,
+        entry_point_callback=None,
+        rate_limiter=None,
+        rest_client=None,
+        shared_feed=None,
+        strategy=BOLLINGER_REVERSAL,
+        timeframe="1m",
+        order_client=None,
+        order_size=None,
+        paper=None,
+        symbol="BTCUSDT",
+        scanner=None,
+        compact=False,
+        book_channel=None,
+        journal_path=None,
+    ):
+        # Load environment variables from .env file
+        load_dotenv()
+
         # Default Variables
         self.api_key = os.getenv("API_KEY")
         self.secret_key = os.getenv("SECRET_KEY")
         self.passphrase = os.getenv("PASSPHRASE")
 
-        self.connection_count = 0
-        self.subscription_count = 0
-        self.connection_timestamps = []
-        self.subscription_timestamps = []
+        # Connection and subscription budget shared with every other client
+        self.rate_limiter = rate_limiter or shared_rate_limiter
 
         self.uri = "wss://ws.bitget.com/mix/v1/stream"
+        self.symbol = symbol
         self.subscribed = False
         self.snapshot_received = False
-        self.df = None
         self.ws = None
-        self.data = []
+        self.heartbeat = None
+
+        # Candles survive reconnects; gaps are filled over REST
+        # Compact stores keep older candles at reduced precision (see bitget.compact)
+        self.candles = CandleStore(max_size=1000, compact=compact)
+        if shared_feed is not None:
+            # Lets other processes read the candles (see bitget.shared_feed)
+            self.candles.listeners.append(shared_feed.publish)
+
+        # 5m/15m/1h/4h candles built from the 1m stream
+        self.rollup = CandleRollup(self.candles, compact=compact)
+        self.timeframes_seeded = False
+        self.rest_client = rest_client or BitGetRestClient(
+            rate_limiter=self.rate_limiter
+        )
+
+        # Rules are evaluated once per closed candle, like in the backtest
+        self.strategy = strategy.live()
+        self.timeframe = timeframe
+        self.last_evaluated_timestamp = None
+        # (hours, timeframe, params) -> (version, frame), least recently used first
+        self.query_cache = OrderedDict()
 
         self.trigger_conditions_met = False
         self.curr_trigger_stats = None
@@ -54,15 +103,46 @@ class Trader:
 
         self.entry_point_callback = entry_point_callback
 
+        # Live orders are only sent with an order client (BitGetOrderClient)
+        self.order_client = order_client
+        self.order_size = order_size
+        self.brackets = []
+        self.order_tasks = set()
+
+        # Paper trading: entries open simulated positions (see bitget.paper)
+        self.paper = paper
+
+        # Latest indicator values are published for !scan (see bitget.scanner)
+        self.scanner = scanner
+
+        # Optional depth subscription ("books5" or "books15"); its features
+        # are added to the candles the strategy sees (see bitget.order_book)
+        self.book_channel = book_channel
+        self.order_book = None
+        if book_channel is not None:
+            depth = BOOK_CHANNELS[book_channel]
+            journal = DepthJournal(journal_path, depth) if journal_path else None
+            self.order_book = OrderBook(depth, journal=journal)
+
+    @property
+    def df(self):
+        return self.candles.df
+
     async def connect(self):
-        retries = 0
+        try:
+            await self.run_connection()
+        finally:
+            if self.order_book is not None and self.order_book.journal is not None:
+                self.order_book.journal.close()
+
+    async def run_connection(self):
+        backoff = RECONNECT_BACKOFF_MIN
 
-        while retries < 5:
+        while True:
             try:
-                # Add this line to keep track of connections
-                self.connection_timestamps.append(time.time())
+                # Wait for a connection slot instead of tripping the limit
+                await self.rate_limiter.acquire("connections")
 
-                self.check_rate_limits()
                 timestamp, signature = self.generate_signature()
                 headers = {
                     "apiKey": self.api_key,
@@ -73,40 +153,90 @@ class Trader:
 
                 self.ws = await websockets.connect(self.uri, extra_headers=headers)
 
+                # Every connection starts with a fresh snapshot
+                self.subscribed = False
+                self.snapshot_received = False
+
+                ping_task = None
                 try:
                     await self.subscribe()
-                    asyncio.create_task(self.send_ping())
+                    self.heartbeat = Heartbeat(
+                        lambda: self.ws.send("ping"),
+                        name="trader",
+                        on_stall=self.handle_stall,
+                    )
+                    ping_task = asyncio.create_task(self.send_ping())
 
                     # Use async for to handle incoming messages
                     async for msg in self.ws:
                         await self.handle_message(msg)
 
+                        # A snapshot means the connection is healthy again
+                        if self.snapshot_received:
+                            backoff = RECONNECT_BACKOFF_MIN
+
+                except websockets.exceptions.ConnectionClosed as e:
+                    trader_logger.error(f"Connection closed: {e}")
+
                 except Exception as e:
                     trader_logger.error(f"Error occurred: {e}")
 
                 finally:
+                    if ping_task:
+                        ping_task.cancel()
+                    if (
+                        self.order_book is not None
+                        and self.order_book.journal is not None
+                    ):
+                        self.order_book.journal.flush()
                     await self.ws.close()
 
-            except (websockets.exceptions.ConnectionClosed, ConnectionError) as e:
-                trader_logger.error(f"Connection failed: {e}. Retrying...")
-                retries += 1
-                await asyncio.sleep(5)  # Wait 5 seconds before retrying
+            except (
+                websockets.exceptions.WebSocketException,
+                ConnectionError,
+                OSError,
+            ) as e:
+                trader_logger.error(f"Connection failed: {e}")
+
+            # Exponential backoff with jitter so reconnects don't stampede
+            delay = backoff * random.uniform(0.5, 1.0)
+            trader_logger.info(f"Reconnecting in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
 
     async def send_ping(self):
-        await self.ws.send("ping")
-        await asyncio.sleep(30)
+        # Pings on schedule until the connection closes
+        try:
+            await self.heartbeat.run()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def handle_stall(self):
+        # Closing ends the message loop in connect(), which reconnects
+        await self.ws.close()
+
+    def subscription_args(self):
+        args = [{"instType": "mc", "channel": "candle1m", "instId": self.symbol}]
+        if self.book_channel is not None:
+            args.append(
+                {"instType": "mc", "channel": self.book_channel, "instId": self.symbol}
+            )
+        return args
 
     async def subscribe(self):
-        subscription_msg = {
-            "op": "subscribe",
-            "args": [{"instType": "mc", "channel": "candle1m", "instId": "BTCUSDT"}],
-        }
+        subscription_msg = {"op": "subscribe", "args": self.subscription_args()}
 
+        await self.rate_limiter.acquire(
+            "subscriptions", weight=len(subscription_msg["args"])
+        )
         await self.ws.send(json.dumps(subscription_msg))
 
     async def handle_message(self, msg):
         trader_logger.debug(f"Received message: {msg}")
 
+        if self.heartbeat:
+            self.heartbeat.on_message(msg)
+
         if not msg or msg == "pong":
             trader_logger.debug("Received empty or pong message. Ignoring.")
             return
@@ -122,6 +252,13 @@ class Trader:
             trader_logger.info("Successfully subscribed.")
             return
 
+        channel = parsed_msg.get("arg", {}).get("channel")
+        if self.order_book is not None and channel == self.book_channel:
+            # Depth messages are full snapshots of the top levels
+            for data in parsed_msg.get("data", []):
+                self.order_book.apply(data)
+            return
+
         if not self.snapshot_received:
             trader_logger.info("Snapshot not received yet.")
             await self.handle_snapshot(parsed_msg)
@@ -136,66 +273,234 @@ class Trader:
             self.snapshot_received = True
             trader_logger.debug(f"parsed_msg: {parsed_msg}")
 
-            self.data = parsed_msg["data"]
-            self.df = convert_to_dataframe(parsed_msg["data"])
+            # Parsed once here; the store and gap check take the batch as is
+            snapshot = BitgetAdapter.candles(parsed_msg["data"])
+
+            # After a reconnect, fill the candles missed while disconnected
+            gap = self.candles.find_gap(snapshot)
+            if gap:
+                await self.backfill(*gap)
+
+            self.candles.upsert(snapshot)
             trader_logger.info(f"Snapshot received.")
 
+            if not self.timeframes_seeded:
+                await self.seed_timeframes()
+
+    async def seed_timeframes(self):
+        """
+        Load history for the higher timeframes, which the 1m stream alone would
+        take days to build up, and make sure the 1m candles reach back to the
+        start of the longest forming candle so the rollups are complete.
+        """
+        self.timeframes_seeded = True
+        latest = self.candles.last_timestamp()
+
+        longest = max(TIMEFRAMES[tf] for tf in self.rollup.stores)
+        bucket_start = latest - latest % longest
+        first = int(self.df.index[0])
+        if first > bucket_start:
+            await self.backfill(bucket_start, first - TIMEFRAMES["1m"])
+
+        for tf, store in self.rollup.stores.items():
+            interval = TIMEFRAMES[tf]
+            try:
+                history = await self.rest_client.get_candles(
+                    f"{self.symbol}_UMCBL",
+                    latest - interval * store.max_size,
+                    bucket_start - 1,
+                    granularity=BITGET_GRANULARITY[tf],
+                    interval_ms=interval,
+                )
+            except Exception as e:
+                trader_logger.error(f"Loading {tf} history failed: {e}")
+                continue
+
+            store.upsert(history)
+
+    async def backfill(self, start_time, end_time):
+        trader_logger.info(f"Candle gap detected: {start_time} to {end_time}")
+        try:
+            missing = await self.rest_client.get_candles(
+                f"{self.symbol}_UMCBL", start_time, end_time
+            )
+        except Exception as e:
+            trader_logger.error(f"Backfill failed: {e}")
+            return
+
+        self.candles.upsert(missing)
+
     async def handle_update(self, parsed_msg):
         if "data" in parsed_msg:
-            new_data = parsed_msg["data"][0]
-            new_timestamp = new_data[0]
-            new_close_value = new_data[4]
-
-            existing_rows = {(row[0], row[4]): row for row in self.data}
-
-            key = (new_timestamp, new_close_value)
-            if key not in existing_rows:
-                trader_logger.info(f"New update, df regenerating with: {new_timestamp}")
-                self.data.append(new_data)
-            else:
-                trader_logger.info(
-                    f"Updating existing row with timestamp: {new_timestamp}"
+            update = BitgetAdapter.candles(parsed_msg["data"])
+            new_timestamp = int(update.timestamps[-1])
+            trader_logger.info(f"Merging update with timestamp: {new_timestamp}")
+            self.candles.upsert(update)
+
+            if self.paper is not None:
+                self.paper.mark(
+                    self.symbol,
+                    update.high[-1],
+                    update.low[-1],
+                    update.close[-1],
+                    new_timestamp,
                 )
-                existing_rows[key] = new_data
-                self.data = list(existing_rows.values())
 
-            self.df = convert_to_dataframe(self.data)
+            # Higher timeframes are only evaluated when one of their candles closes
+            frame = None
+            if self.timeframe == "1m":
+                frame = self.unevaluated_candles()
+            elif self.rollup.pop_closed(self.timeframe):
+                frame = self.get_frame(self.timeframe)
 
-            if self.trigger_conditions_met:
-                entry_conditions_met, curr_entry_stats = check_entry_conditions(self.df)
-                if entry_conditions_met:
-                    trader_logger.info("Entry conditions met, placing order...")
-                    await self.place_order(curr_entry_stats)
-                    self.trigger_conditions_met = False
+            if frame is not None:
+                if self.order_book is not None:
+                    frame = with_book_features(frame, self.order_book)
+                await self.evaluate_closed_candles(frame)
 
-            if check_trigger_conditions(self.df):
-                self.trigger_conditions_met = True
-            else:
-                self.trigger_conditions_met = False
-
-            await self.maintain_data_size()
+            if self.scanner is not None and frame is not None:
+                self.scanner.update(self.symbol, frame, self.strategy.armed)
         else:
             trader_logger.debug("[WARNING WARNING] data: MISSING")
 
-    async def place_order(self, curr_entry_stats):
+    def unevaluated_candles(self):
+        """The 1m candles evaluate_closed_candles() has not seen, and the one before."""
+        latest = self.candles.last_timestamp()
+        if self.last_evaluated_timestamp is None or latest is None:
+            return self.candles.tail(3)
+        missed = (latest - self.last_evaluated_timestamp) // self.candles.interval_ms
+        return self.candles.tail(int(missed) + 3)
+
+    async def evaluate_closed_candles(self, df):
+        # The last candle is still forming; every candle before it is final
+        closed = df.iloc[:-1]
+        if len(closed) < 2:
+            return
+
+        if self.last_evaluated_timestamp is None:
+            start = len(closed) - 1
+        else:
+            start = int(
+                closed.index.searchsorted(self.last_evaluated_timestamp, side="right")
+            )
+            start = max(start, 1)
+        if start >= len(closed):
+            return
+
+        rows = closed.iloc[start - 1 :].to_dict("records")
+        self.strategy.prev = rows[0]
+
+        for i, row in enumerate(rows[1:], start=1):
+            trigger_met, entry_met = self.strategy.on_candle(row)
+
+            # Only the newest candle may place an order, not a backfilled one
+            if entry_met and i == len(rows) - 1:
+                trader_logger.info("Entry conditions met, placing order...")
+                await self.place_order(entry_stats(row, rows[i - 1]), row)
+
+            if trigger_met:
+                self.curr_trigger_stats = trigger_stats(row, rows[i - 1])
+
+        self.trigger_conditions_met = self.strategy.armed
+        self.last_evaluated_timestamp = int(closed.index[-1])
+
+    async def place_order(self, curr_entry_stats, row=None):
         trader_logger.info("Placing order...")
+        if self.paper is not None and row is not None:
+            self.paper.open(
+                self.symbol,
+                self.strategy.strategy.name,
+                row,
+                size=float(self.order_size or 1),
+                timestamp=self.candles.last_timestamp() or 0,
+            )
+
+        if self.order_client is not None and row is not None:
+            # Sent in the background so ticks are never held up by the exchange
+            task = asyncio.create_task(
+                self.submit_bracket(row, signal_time=time.perf_counter())
+            )
+            self.order_tasks.add(task)
+            task.add_done_callback(self.order_tasks.discard)
+
         if self.entry_point_callback:
-            await self.entry_point_callback(
+            # AlertDispatcher.submit only enqueues the alert, so the message
+            # handler never waits on Discord; async callbacks are still awaited
+            result = self.entry_point_callback(
                 format_trigger_stats(self.curr_trigger_stats)
+                + "\n"
+                + format_entry_stats(curr_entry_stats)
             )
-            await self.entry_point_callback(format_entry_stats(curr_entry_stats))
+            if inspect.isawaitable(result):
+                await result
+
+    async def submit_bracket(self, row, signal_time=None):
+        _, stop_loss_level, take_profit_level = bracket_prices(row)
+        bracket = await self.order_client.place_bracket(
+            f"{self.symbol}_UMCBL",
+            self.order_size,
+            stop_loss_level,  # Rounded to the contract's tick by the client
+            take_profit_level,
+            signal_time=signal_time,
+        )
+        self.brackets.append(bracket)
+        return bracket
+
+    def checkpoint(self, candles=300):
+        """State to restart from: the last `candles` 1m candles and the strategy."""
+        rows = []
+        if len(self.candles):
+            raw = self.candles.tail(candles)[["Open", "High", "Low", "Close", "Volume"]]
+            rows = [
+                [int(ts), *values] for ts, values in zip(raw.index, raw.values.tolist())
+            ]
+        return {
+            "candles": rows,
+            "armed": self.strategy.armed,
+            "last_evaluated_timestamp": self.last_evaluated_timestamp,
+        }
 
-    async def maintain_data_size(self):
-        if len(self.df) > 1000:  # Limit data size to 1000 records
-            self.df = self.df[-1000:]
+    def restore(self, state):
+        """
+        Resume from a checkpoint(): the next snapshot only fills the gap since,
+        and candles already evaluated are not evaluated again.
+        """
+        self.candles.upsert(state["candles"])
+        self.strategy.armed = state["armed"]
+        self.trigger_conditions_met = state["armed"]
+        self.last_evaluated_timestamp = state["last_evaluated_timestamp"]
 
     def get_data(self):
         # print(self.df.describe())
         return self.df
 
-    def get_data_last_n_hours(self, hours):
+    def get_store(self, timeframe="1m"):
+        if timeframe == "1m":
+            return self.candles
+        self.rollup.flush(timeframe)
+        return self.rollup.stores[timeframe]
+
+    def get_frame(self, timeframe="1m", **indicator_params):
+        return self.get_store(timeframe).indicators(**indicator_params)
+
+    def data_version(self, timeframe="1m"):
+        """Changes whenever the candles of `timeframe` change."""
+        return self.get_store(timeframe).version
+
+    def get_data_last_n_hours(self, hours, timeframe="1m", **indicator_params):
+        # Repeated queries on unchanged candles return the same slice
+        key = (hours, timeframe, tuple(sorted(indicator_params.items())))
+        version = self.data_version(timeframe)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            self.query_cache.move_to_end(key)
+            if cached[0] == version:
+                return cached[1]
+
+        df = self.get_frame(timeframe, **indicator_params)
+
         # Get the latest timestamp in the DataFrame
-        latest_timestamp = self.df["Timestamp"].max()
+        latest_timestamp = df["Timestamp"].max()
 
         # Convert the number of hours into a timedelta
         time_delta = timedelta(hours=hours)
@@ -204,37 +509,13 @@ class Trader:
         oldest_time_of_interest = latest_timestamp - time_delta
 
         # Filter the DataFrame to only include data from the last 'hours' hours
-        filtered_df = self.df[self.df["Timestamp"] >= oldest_time_of_interest]
+        filtered_df = df[df["Timestamp"] >= oldest_time_of_interest]
 
+        self.query_cache[key] = (version, filtered_df)
+        if len(self.query_cache) > QUERY_CACHE_SIZE:
+            self.query_cache.popitem(last=False)
         return filtered_df
 
     def generate_signature(self):
         timestamp = str(int(time.time()))
-        content = f"{timestamp}GET/user/verify"
-
-        h = hmac.new(
-            self.secret_key.encode(), msg=content.encode(), digestmod=hashlib.sha256
-        )
-        hashed_content = h.digest()
-
-        signature = base64.b64encode(hashed_content).decode()
-        return timestamp, signature
-
-    def check_rate_limits(self):
-        current_time = time.time()
-
-        # Check Connection Limit
-        self.connection_timestamps = [
-            t for t in self.connection_timestamps if current_time - t <= 3600
-        ]
-        if len(self.connection_timestamps) >= RATE_LIMIT_CONNECTIONS:
-            raise Exception(
-                "Connection limit reached: 100 connections per IP per hour."
-            )
-
-        # Check Subscription Limit
-        self.subscription_timestamps = [
-            t for t in self.subscription_timestamps if current_time - t <= 3600
-        ]
-        if len(self.subscription_timestamps) >= RATE_LIMIT_SUBSCRIPTIONS:
-            raise Exception("Subscription limit reached: 240 subscriptions per hour.")
+        return timestamp, sign(self.secret_key, f"{timestamp}GET/user/verify")
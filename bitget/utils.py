@@ -1,59 +1,149 @@
+import numpy as np
 import pandas as pd
 
 
+from bitget.strategy import BOLLINGER_REVERSAL
 from logger_config import utils_logger
+from market_data import as_candle_batch
 
+# The indicators work on float64 arrays and return arrays by column name; the
+# calc_* functions write them into a candle frame.
 
-def calc_bollinger_bands(df, window_size=20):
-    df["SMA"] = df["Close"].rolling(window=window_size).mean().ffill()
-    df["Rolling_STD"] = df["Close"].rolling(window=window_size).std().ffill()
 
+def bollinger_bands(close, window_size=20):
+    close = pd.Series(close, dtype=np.float64)
+    sma = close.rolling(window=window_size).mean().ffill().to_numpy()
+    std = close.rolling(window=window_size).std().ffill().to_numpy()
+
+    columns = {"SMA": sma, "Rolling_STD": std}
     for std_dev in [2, 3, 4]:
-        upper_col = f"Bollinger_Upper_{std_dev}"
-        lower_col = f"Bollinger_Lower_{std_dev}"
-        df[upper_col] = df["SMA"] + (df["Rolling_STD"] * std_dev)
-        df[lower_col] = df["SMA"] - (df["Rolling_STD"] * std_dev)
+        columns[f"Bollinger_Upper_{std_dev}"] = sma + (std * std_dev)
+        columns[f"Bollinger_Lower_{std_dev}"] = sma - (std * std_dev)
+    return columns
+
+
+def rsi(close, window=14):
+    delta = pd.Series(close, dtype=np.float64).diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean().ffill()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean().ffill()
+    return (100 - (100 / (1 + (gain / loss)))).to_numpy()
+
+
+def stochastic(close, high, low, window=14):
+    low_min = pd.Series(low, dtype=np.float64).rolling(window=window).min().ffill()
+    high_max = pd.Series(high, dtype=np.float64).rolling(window=window).max().ffill()
+    low_min, high_max = low_min.to_numpy(), high_max.to_numpy()
+    return (
+        (np.asarray(close, dtype=np.float64) - low_min) / (high_max - low_min)
+    ) * 100
+
 
+def indicator_arrays(
+    close, high, low, window_size=20, rsi_window=14, stochastic_window=14
+):
+    """Every indicator column of calc_indicators, from the price arrays."""
+    columns = bollinger_bands(close, window_size)
+    columns["RSI"] = rsi(close, rsi_window)
+    columns["Stochastic"] = stochastic(close, high, low, stochastic_window)
+    return columns
+
+
+def prices(df):
+    return [df[name].to_numpy(dtype=np.float64) for name in ["Close", "High", "Low"]]
+
+
+def calc_bollinger_bands(df, window_size=20):
+    for name, values in bollinger_bands(prices(df)[0], window_size).items():
+        df[name] = values
     return df
 
 
 def calc_RSI(df, window=14):
-    delta = df["Close"].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean().ffill()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean().ffill()
-    df["RSI"] = 100 - (100 / (1 + (gain / loss)))
+    df["RSI"] = rsi(prices(df)[0], window)
     return df
 
 
 def calc_stochastic(df, window=14):
-    low_min = df["Low"].rolling(window=window).min().ffill()
-    high_max = df["High"].rolling(window=window).max().ffill()
-    df["Stochastic"] = ((df["Close"] - low_min) / (high_max - low_min)) * 100
+    df["Stochastic"] = stochastic(*prices(df), window)
     return df
 
 
-def convert_to_dataframe(candle_data):
-    utils_logger.info("Converting to dataframe...")
-    df = pd.DataFrame(
-        candle_data, columns=["UnixTimestamp", "Open", "High", "Low", "Close", "Volume"]
-    )
+def candles_to_frame(candle_data):
+    """
+    Raw candle frame (UnixTimestamp ms index, OHLCV, Timestamp in PST) from a
+    CandleBatch or raw Bitget candle rows.
+    """
+    return as_candle_batch(candle_data).to_frame()
 
-    # Convert to DateTime in PST
-    df["Timestamp"] = pd.to_datetime(df["UnixTimestamp"].astype("int64"), unit="ms")
-    df["Timestamp"] = (
-        df["Timestamp"].dt.tz_localize("UTC").dt.tz_convert("America/Los_Angeles")
-    )
 
-    df.set_index(["UnixTimestamp"], inplace=True)
+def calc_indicators(df, window_size=20, rsi_window=14, stochastic_window=14):
+    # Calculate Bollinger Bands, RSI, and Stochastic
+    params = (window_size, rsi_window, stochastic_window)
+    for name, values in indicator_arrays(*prices(df), *params).items():
+        df[name] = values
+    return df
 
-    df[["Open", "High", "Low", "Close", "Volume"]] = df[
-        ["Open", "High", "Low", "Close", "Volume"]
-    ].apply(pd.to_numeric, errors="coerce")
 
-    # Calculate Bollinger Bands, RSI, and Stochastic
-    df = calc_bollinger_bands(df)
-    df = calc_RSI(df)
-    df = calc_stochastic(df)
+def indicator_frame(candles, **indicator_params):
+    """
+    Candle frame with indicators, computed from the arrays of a CandleBatch or
+    of raw Bitget candle rows. A frame is returned as it is. Backtests and
+    plots take their candles through here.
+    """
+    if isinstance(candles, pd.DataFrame):
+        return candles
+    batch = as_candle_batch(candles)
+    df = batch.to_frame()
+    arrays = indicator_arrays(batch.close, batch.high, batch.low, **indicator_params)
+    for name, values in arrays.items():
+        df[name] = values
+    return df
+
+
+def rolling_reduce(values, window, reducer, **kwargs):
+    """`reducer` over each trailing window of `values`; NaN until the first full one."""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        result[window - 1 :] = reducer(windows, axis=-1, **kwargs)
+    return result
+
+
+def calc_indicators_local(df, window_size=20, rsi_window=14, stochastic_window=14):
+    """
+    The columns of calc_indicators, with every value computed from its own
+    window only. Results are bit-for-bit the same wherever the frame starts,
+    so slices with enough warm-up rows can be computed independently.
+
+    Unlike calc_indicators, nothing is forward-filled: a NaN price makes the
+    windows containing it NaN. On gap-free candles both agree to ~1e-12.
+    """
+    close = df["Close"].to_numpy(dtype=np.float64)
+    high = df["High"].to_numpy(dtype=np.float64)
+    low = df["Low"].to_numpy(dtype=np.float64)
+
+    df["SMA"] = rolling_reduce(close, window_size, np.mean)
+    df["Rolling_STD"] = rolling_reduce(close, window_size, np.std, ddof=1)
+    for std_dev in [2, 3, 4]:
+        df[f"Bollinger_Upper_{std_dev}"] = df["SMA"] + (df["Rolling_STD"] * std_dev)
+        df[f"Bollinger_Lower_{std_dev}"] = df["SMA"] - (df["Rolling_STD"] * std_dev)
+
+    delta = np.diff(close, prepend=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gain = rolling_reduce(np.where(delta > 0, delta, 0), rsi_window, np.mean)
+        loss = rolling_reduce(np.where(delta < 0, -delta, 0), rsi_window, np.mean)
+        df["RSI"] = 100 - (100 / (1 + (gain / loss)))
+
+        low_min = rolling_reduce(low, stochastic_window, np.min)
+        high_max = rolling_reduce(high, stochastic_window, np.max)
+        df["Stochastic"] = ((close - low_min) / (high_max - low_min)) * 100
+
+    return df
+
+
+def convert_to_dataframe(candle_data):
+    utils_logger.info("Converting to dataframe...")
+    df = indicator_frame(as_candle_batch(candle_data))
 
     # utils_logger.info(df.describe())
     return df
@@ -114,7 +204,21 @@ def format_entry_stats(entry_stats: dict):
     return "\n".join(lines)
 
 
-def check_trigger_conditions(df_to_check):
+def trigger_stats(row, prev=None, strategy=BOLLINGER_REVERSAL):
+    stats = strategy.trigger.explain(row, prev)
+    stats["rsi_val"] = row["RSI"]
+    stats["stoch_val"] = row["Stochastic"]
+    return stats
+
+
+def entry_stats(row, prev=None, strategy=BOLLINGER_REVERSAL):
+    stats = strategy.entry.explain(row, prev)
+    stats["rsi_val"] = row["RSI"]
+    stats["last_candle_stoch"] = row["Stochastic"]
+    return stats
+
+
+def check_trigger_conditions(df_to_check, strategy=BOLLINGER_REVERSAL):
     """
     Check if trigger conditions are met for trading.
     :param df_to_check: DataFrame containing market data.
@@ -125,43 +229,15 @@ def check_trigger_conditions(df_to_check):
 
     # Get the last row (last candle) from the DataFrame
     last_candle = df_to_check.iloc[-1]
+    second_last_candle = df_to_check.iloc[-2] if len(df_to_check) > 1 else None
 
-    # Check if the last candle touches or penetrates the lower red Bollinger band
-    lower_bollinger = last_candle["Bollinger_Lower_2"]
-
-    touch_or_penetrate = any(
-        [
-            last_candle["Open"] <= lower_bollinger,
-            last_candle["Close"] <= lower_bollinger,
-            last_candle["Low"] <= lower_bollinger,
-            last_candle["High"] <= lower_bollinger,
-        ]
-    )
-
-    # Check if both RSI and stochastic are below the 20 level for the last candle
-    rsi_val = last_candle["RSI"]
-    rsi_below_20 = rsi_val < 20
-
-    last_candle_stoch = last_candle["Stochastic"]
-    stochastic_below_20 = last_candle_stoch < 20
-
-    # Create a dictionary to store the current trigger stats
-    curr_trigger_stats = {
-        "touch_or_penetrate": touch_or_penetrate,
-        "rsi_val": rsi_val,
-        "rsi_below_20": rsi_below_20,
-        "stoch_val": last_candle_stoch,
-        "stochastic_below_20": stochastic_below_20,
-    }
-
-    trigger_conditions_met = touch_or_penetrate and (
-        rsi_below_20 or stochastic_below_20
+    trigger_conditions_met = strategy.trigger.evaluate(last_candle, second_last_candle)
+    return trigger_conditions_met, trigger_stats(
+        last_candle, second_last_candle, strategy
     )
 
-    return trigger_conditions_met, curr_trigger_stats
-
 
-def check_entry_conditions(df_to_check):
+def check_entry_conditions(df_to_check, strategy=BOLLINGER_REVERSAL):
     """
     Check if entry conditions are met for trading.
     :param df_to_check: DataFrame containing market data.
@@ -173,37 +249,8 @@ def check_entry_conditions(df_to_check):
     last_candle = df_to_check.iloc[-1]
     second_last_candle = df_to_check.iloc[-2]
 
-    # The next candle retraces and closes back through the red Bollinger band.
-    retraces_through_band = last_candle["Close"] > last_candle["Bollinger_Lower_2"]
-
-    # RSI goes above 20
-    rsi_val = last_candle["RSI"]
-    rsi_above_20 = rsi_val > 20
-
-    # Stochastic lines cross between the 20 and 40 levels
-    last_candle_stoch = last_candle["Stochastic"]
-    second_last_candle_stoch = second_last_candle["Stochastic"]
-
-    stochastic_cross = (second_last_candle_stoch < 20) and (last_candle_stoch > 20)
-    stochastic_between_20_and_40 = 20 < last_candle_stoch < 40
-
-    curr_entry_stats = {
-        "retraces_through_band": retraces_through_band,
-        "rsi_above_20": rsi_above_20,
-        "rsi_val": rsi_val,
-        "stochastic_cross": stochastic_cross,
-        "stochastic_between_20_and_40": stochastic_between_20_and_40,
-        "last_candle_stoch": last_candle_stoch,
-    }
-
-    entry_conditions_met = (
-        retraces_through_band
-        and rsi_above_20
-        and stochastic_cross
-        and stochastic_between_20_and_40
-    )
-
-    return entry_conditions_met, curr_entry_stats
+    entry_conditions_met = strategy.entry.evaluate(last_candle, second_last_candle)
+    return entry_conditions_met, entry_stats(last_candle, second_last_candle, strategy)
 
 
 def format_backtest_results(results):
@@ -231,59 +278,48 @@ def format_backtest_results(results):
     ]  # Limiting characters to 4000 to avoid Discord's message length limit
 
 
-def run_backtest(df, check_trigger_conditions, check_entry_conditions):
-    utils_logger.info("Starting backtest...")
+def backtest_events(df, entries, strategy=BOLLINGER_REVERSAL, progress=None):
+    """Trigger and entry events for the entry candles at positions `entries`."""
     backtest_results = []
-    trigger_conditions_met = False
-    temp_trigger_event = None  # Temporary variable to hold the trigger event
+    for n, i in enumerate(entries):
+        if progress is not None:
+            progress(0.5 + 0.5 * n / len(entries), f"entry {n + 1}/{len(entries)}")
 
-    utils_logger.info(f"Total data points for backtest: {len(df)}")
+        trigger_row, trigger_prev = df.iloc[i - 1], df.iloc[i - 2] if i > 1 else None
+        entry_row, entry_prev = df.iloc[i], df.iloc[i - 1]
 
-    for i in range(1, len(df)):
-        temp_df = df.iloc[: i + 1].copy()
-
-        utils_logger.info(f"Checking data point {i+1}/{len(df)}...")
-
-        if trigger_conditions_met:
-            utils_logger.info(
-                "Trigger conditions previously met, checking entry conditions."
-            )
-            entry_conditions_met, curr_entry_stats = check_entry_conditions(temp_df)
-
-            if entry_conditions_met:
-                entry_time = temp_df.iloc[-1]["Timestamp"]
-                utils_logger.info(f"Entry condition met at {entry_time}")
-
-                # Add the trigger event since entry is now confirmed
-                if temp_trigger_event:
-                    backtest_results.append(temp_trigger_event)
-                    temp_trigger_event = None  # Reset the temp trigger event
-
-                backtest_results.append(
-                    {
-                        "event": "entry",
-                        "timestamp": entry_time,
-                        "conditions": curr_entry_stats,
-                    }
-                )
-                trigger_conditions_met = False
-            else:
-                utils_logger.info("Entry conditions not met.")
-
-        trigger_conditions_met, curr_trigger_stats = check_trigger_conditions(temp_df)
-
-        if trigger_conditions_met:
-            trigger_time = temp_df.iloc[-1]["Timestamp"]
-            utils_logger.info(f"Trigger condition met at {trigger_time}")
-
-            # Store the trigger event in the temporary variable
-            temp_trigger_event = {
+        utils_logger.info(f"Entry condition met at {entry_row['Timestamp']}")
+        backtest_results.append(
+            {
                 "event": "trigger",
-                "timestamp": trigger_time,
-                "conditions": curr_trigger_stats,
+                "timestamp": trigger_row["Timestamp"],
+                "conditions": trigger_stats(trigger_row, trigger_prev, strategy),
+            }
+        )
+        backtest_results.append(
+            {
+                "event": "entry",
+                "timestamp": entry_row["Timestamp"],
+                "conditions": entry_stats(entry_row, entry_prev, strategy),
             }
-        else:
-            utils_logger.info("Trigger conditions not met.")
+        )
 
-    utils_logger.info("Backtest completed.")
+    return backtest_results
+
+
+def run_backtest(df, strategy=BOLLINGER_REVERSAL, progress=None):
+    df = indicator_frame(df)
+    utils_logger.info("Starting backtest...")
+    utils_logger.info(f"Total data points for backtest: {len(df)}")
+
+    # Evaluate the rules over the whole window at once
+    trigger_mask, entry_mask = strategy.masks(df)
+
+    entries = np.flatnonzero(entry_mask)
+    backtest_results = backtest_events(df, entries, strategy, progress)
+
+    utils_logger.info(
+        f"Backtest completed: {int(trigger_mask.sum())} triggers, "
+        f"{len(backtest_results) // 2} entries."
+    )
     return backtest_results
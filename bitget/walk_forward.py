@@ -0,0 +1,132 @@
+"""
+Walk-forward backtests over long candle histories, in parallel.
+
+History is cut into consecutive shards. Each shard is handed to a worker
+process together with a halo of the HALO candles before it, so its indicators
+and its first trigger/entry pair are computed from the same rows as in one
+sequential run. Indicators come from calc_indicators_local, whose values do
+not depend on where a slice starts, so the stitched events are identical to
+`run_backtest(calc_indicators_local(candles))`.
+
+    python -m bitget.walk_forward output/1T/*.csv --shard-hours 24 --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from bitget.candle_store import INDICATOR_WARMUP
+from bitget.strategy import BOLLINGER_REVERSAL
+from bitget.utils import backtest_events, calc_indicators_local
+from logger_config import utils_logger
+
+# Warm-up for the indicators plus the candle an entry looks back on
+HALO = INDICATOR_WARMUP + 1
+
+SHARD_SIZE = 1440  # One day of 1m candles
+
+RAW_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def load_candle_csvs(paths):
+    """
+    Raw 1m candles from the per-day CSVs under output/ (Timestamp in seconds),
+    indexed by UnixTimestamp in ms like CandleStore frames.
+    """
+    frames = [pd.read_csv(path) for path in sorted(paths)]
+    df = pd.concat(frames).rename(columns={"Volume_sum": "Volume"})
+
+    df["UnixTimestamp"] = df["Timestamp"].astype("int64") * 1000
+    df = df.drop_duplicates("UnixTimestamp", keep="last").set_index("UnixTimestamp")
+    df = df.sort_index()[RAW_COLUMNS]
+
+    df["Timestamp"] = pd.to_datetime(df.index, unit="ms", utc=True).tz_convert(
+        "America/Los_Angeles"
+    )
+    return df
+
+
+def make_shards(n_rows, shard_size=SHARD_SIZE, halo=HALO):
+    """(halo start, start, stop) row positions covering `n_rows` rows."""
+    return [
+        (max(start - halo, 0), start, min(start + shard_size, n_rows))
+        for start in range(0, n_rows, shard_size)
+    ]
+
+
+def backtest_shard(candles, offset, strategy=BOLLINGER_REVERSAL):
+    """
+    Backtest one shard. The first `offset` rows of `candles` are its halo: they
+    feed the indicators but no entry is reported on them.
+    """
+    df = calc_indicators_local(candles.copy())
+    trigger_mask, entry_mask = strategy.masks(df)
+
+    entries = np.flatnonzero(entry_mask[offset:]) + offset
+    return {
+        "start": df["Timestamp"].iloc[offset],
+        "end": df["Timestamp"].iloc[-1],
+        "candles": len(df) - offset,
+        "triggers": int(trigger_mask[offset:].sum()),
+        "entries": len(entries),
+        "events": backtest_events(df, entries, strategy),
+    }
+
+
+def walk_forward(
+    candles, shard_size=SHARD_SIZE, workers=None, strategy=BOLLINGER_REVERSAL
+):
+    """
+    Backtest `candles` (raw OHLCV with a Timestamp column) shard by shard.
+    :return: (events in run_backtest's format, per-shard summaries)
+    """
+    columns = RAW_COLUMNS + ["Timestamp"]
+    shards = make_shards(len(candles), shard_size)
+    slices = [candles.iloc[halo_start:stop][columns] for halo_start, _, stop in shards]
+    offsets = [start - halo_start for halo_start, start, _ in shards]
+
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+    if workers == 1 or len(shards) == 1:
+        summaries = list(map(backtest_shard, slices, offsets, repeat(strategy)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(
+                executor.map(backtest_shard, slices, offsets, repeat(strategy))
+            )
+
+    events = [event for summary in summaries for event in summary.pop("events")]
+    utils_logger.info(
+        f"Walk-forward over {len(candles)} candles in {len(shards)} shards "
+        f"({workers} workers): {len(events) // 2} entries in "
+        f"{time.perf_counter() - started:.2f}s"
+    )
+    return events, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest")
+    parser.add_argument("paths", nargs="+", help="1m candle CSVs")
+    parser.add_argument("--shard-hours", type=int, default=SHARD_SIZE // 60)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    candles = load_candle_csvs(args.paths)
+    events, summaries = walk_forward(candles, args.shard_hours * 60, args.workers)
+
+    for summary in summaries:
+        print(
+            f"{summary['start']:%Y-%m-%d %H:%M} - {summary['end']:%Y-%m-%d %H:%M}: "
+            f"{summary['candles']} candles, {summary['triggers']} triggers, "
+            f"{summary['entries']} entries"
+        )
+    print(f"Total: {len(events) // 2} entries")
+
+
+if __name__ == "__main__":
+    main()
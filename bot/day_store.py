@@ -0,0 +1,311 @@
+import asyncio
+import json
+import logging
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from bitget.candle_store import INDICATOR_WARMUP
+from bitget.utils import calc_bollinger_bands, calc_RSI, calc_stochastic
+from market_data import TradeBatch, as_trade_batch
+
+CANDLE_COLUMNS = ["Timestamp", "Open", "High", "Low", "Close", "Volume_sum"]
+
+# DayStoreWriter appends buffered trades this often, or sooner once this many
+# are waiting
+FLUSH_INTERVAL = 5  # Seconds
+FLUSH_TRADES = 5000
+
+
+def trades_to_candles(trades, freq):
+    """
+    OHLC and volume per `freq` bucket of a TradeBatch (or Kraken trade frame),
+    indexed by Timestamp in seconds. Buckets without trades have NaN prices.
+    """
+    candles = as_trade_batch(trades).to_candles(
+        int(pd.Timedelta(freq).total_seconds() * 1000)
+    )
+
+    timestamps = candles.timestamps // 1000
+    return pd.DataFrame(
+        {
+            "Timestamp": timestamps,
+            "Open": candles.open,
+            "High": candles.high,
+            "Low": candles.low,
+            "Close": candles.close,
+            "Volume_sum": candles.volume,
+        },
+        index=pd.Index(timestamps, name="Timestamp"),
+    )
+
+
+class DayStore:
+    """
+    One day of candles built from Kraken trades, persisted append-only.
+
+    `output/<date>.csv` only ever grows, except for its tail: the last candle,
+    which may still receive trades, and the empty buckets before it that are
+    filled from it. The tail is truncated and rewritten, after a copy of it is
+    saved to `output/<date>.tail`, so a crash mid-rewrite can be undone. The manifest
+    `output/<date>.manifest.json` records the last stored trade ID and
+    timestamp, so a re-run fetches only the missing tail, and a checksum of the
+    committed tail, so a rewrite of the same size is undone too. Indicators are
+    recomputed over the new candles plus INDICATOR_WARMUP stored ones.
+    """
+
+    def __init__(self, date_str, directory="output", freq="5min"):
+        self.freq = freq
+        self.csv_path = os.path.join(directory, f"{date_str}.csv")
+        self.manifest_path = os.path.join(directory, f"{date_str}.manifest.json")
+        self.tail_path = os.path.join(directory, f"{date_str}.tail")
+
+        self.manifest = {
+            "last_trade_id": None,
+            "last_timestamp": None,
+            "candles": 0,
+            "bytes": 0,
+            "tail_offset": 0,  # Where the rows that can still change start...
+            "tail_rows": 0,  # ...and how many there are
+            "tail_crc": None,  # CRC-32 of the tail's bytes
+            "complete": False,
+        }
+        self.ohlc = pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    @property
+    def complete(self):
+        return self.manifest["complete"]
+
+    @property
+    def last_timestamp(self):
+        return self.manifest["last_timestamp"]
+
+    def load(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest.update(json.load(f))
+
+            # Undo anything written after the last manifest (an interrupted append)
+            size = (
+                os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+            )
+            if size != self.manifest["bytes"] or not self.tail_matches():
+                self.restore_tail()
+        elif os.path.exists(self.csv_path):
+            # A full day written before manifests existed
+            self.manifest["complete"] = True
+
+        if os.path.exists(self.csv_path) and os.path.getsize(self.csv_path):
+            self.ohlc = pd.read_csv(self.csv_path)
+        return self
+
+    def append(self, trades):
+        """
+        Store trades newer than the last stored one.
+        :param trades: A TradeBatch or a Kraken trade frame.
+        :return: Number of new trades.
+        """
+        trades = as_trade_batch(trades)
+        trades = trades[np.argsort(trades.trade_id, kind="stable")]
+        last_trade_id = self.manifest["last_trade_id"]
+        if last_trade_id is not None:
+            trades = trades[trades.trade_id > last_trade_id]
+        if not len(trades):
+            return 0
+        trades = trades[np.r_[True, np.diff(trades.trade_id) != 0]]
+
+        new = trades_to_candles(trades, self.freq)
+        stored = len(self.ohlc)
+        head = self.ohlc.iloc[: stored - self.manifest["tail_rows"]]
+
+        if stored:
+            # The stored tail (the last candle and the empty buckets filled from
+            # it) changes when that candle receives more trades
+            tail = self.ohlc.iloc[len(head) :]
+            last = tail.iloc[-1]
+            step = int(pd.Timedelta(self.freq).total_seconds())
+            start = int(tail["Timestamp"].iloc[0])
+            new = new.reindex(range(start, int(new.index[-1]) + step, step))
+            new["Timestamp"] = new.index
+            new["Volume_sum"] = new["Volume_sum"].fillna(0)
+
+            position = (int(last["Timestamp"]) - start) // step
+            first = new.iloc[position]
+            if pd.isna(first["Open"]):
+                new.iloc[position, 1:] = last[CANDLE_COLUMNS[1:]].to_numpy()
+            else:
+                new.iloc[position, 1:] = [
+                    last["Open"],
+                    max(last["High"], first["High"]),
+                    min(last["Low"], first["Low"]),
+                    first["Close"],
+                    last["Volume_sum"] + first["Volume_sum"],
+                ]
+
+        # Forward fill gaps in the data
+        new = new.bfill().reset_index(drop=True)
+
+        # Recompute indicators over the new candles, seeded with stored warm-up rows
+        warmup = head.iloc[-INDICATOR_WARMUP:][CANDLE_COLUMNS]
+        window = pd.concat([warmup, new], ignore_index=True) if len(warmup) else new
+        window = calc_bollinger_bands(window)
+        window = calc_RSI(window)
+        window = calc_stochastic(window)
+        window = window.iloc[len(warmup) :]
+
+        self.write(window, replace_tail=stored > 0)
+        self.ohlc = (
+            pd.concat([head, window], ignore_index=True) if len(head) else window
+        )
+
+        self.manifest["last_trade_id"] = int(trades.trade_id[-1])
+        self.manifest["last_timestamp"] = int(trades.seconds().max())
+        self.manifest["candles"] = len(self.ohlc)
+        self.save_manifest()
+        if os.path.exists(self.tail_path):
+            os.remove(self.tail_path)  # The manifest now covers the new tail
+
+        logging.info(
+            f"Stored {len(trades)} trades, rewrote {len(window)} candles "
+            f"in {self.csv_path}"
+        )
+        return len(trades)
+
+    def tail_matches(self):
+        """Whether the file's tail holds the bytes the manifest committed."""
+        if self.manifest["tail_crc"] is None:
+            return True  # Written before tail checksums were recorded
+        offset, size = self.manifest["tail_offset"], self.manifest["bytes"]
+        with open(self.csv_path, "rb") as f:
+            f.seek(offset)
+            tail = f.read(size - offset)
+        return zlib.crc32(tail) == self.manifest["tail_crc"]
+
+    def restore_tail(self):
+        """Put the file back as the manifest describes it."""
+        offset, size = self.manifest["tail_offset"], self.manifest["bytes"]
+        tail = None
+        if os.path.exists(self.tail_path):
+            with open(self.tail_path, "rb") as f:
+                tail = f.read()
+        if tail is None or len(tail) != size - offset:
+            if os.path.getsize(self.csv_path) < size:
+                raise RuntimeError(
+                    f"{self.csv_path} is shorter than its manifest and its tail "
+                    f"backup is missing; delete both to rebuild the day."
+                )
+            if not self.tail_matches():
+                raise RuntimeError(
+                    f"The tail of {self.csv_path} differs from its manifest and "
+                    f"its backup is missing; delete both to rebuild the day."
+                )
+            # Only rows appended past the manifest: the tail was not rewritten
+            offset, tail = size, b""
+
+        logging.warning(f"Rolling {self.csv_path} back to its last manifest")
+        with open(self.csv_path, "r+b") as f:
+            f.seek(offset)
+            f.truncate()
+            f.write(tail)
+
+    def save_tail(self):
+        # Replaced atomically: a half-written backup must never look valid
+        with open(self.csv_path, "rb") as f:
+            f.seek(self.manifest["tail_offset"])
+            tail = f.read(self.manifest["bytes"] - self.manifest["tail_offset"])
+        tmp_path = self.tail_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(tail)
+        os.replace(tmp_path, self.tail_path)
+
+    def write(self, rows, replace_tail):
+        # The new tail: the last candle and the empty buckets just before it
+        empty = (rows["Volume_sum"].to_numpy()[:-1] == 0)[::-1]
+        tail_rows = 1 + (len(empty) if empty.all() else int(empty.argmin()))
+
+        if replace_tail:
+            self.save_tail()
+        with open(self.csv_path, "r+b" if replace_tail else "wb") as f:
+            if replace_tail:
+                rows = rows[self.ohlc.columns]
+                f.seek(self.manifest["tail_offset"])
+                f.truncate()
+            else:
+                f.write(rows.iloc[:0].to_csv(index=False).encode())
+
+            f.write(rows.iloc[:-tail_rows].to_csv(header=False, index=False).encode())
+            self.manifest["tail_offset"] = f.tell()
+            self.manifest["tail_rows"] = tail_rows
+            tail = rows.iloc[-tail_rows:].to_csv(header=False, index=False).encode()
+            f.write(tail)
+            self.manifest["bytes"] = f.tell()
+            self.manifest["tail_crc"] = zlib.crc32(tail)
+
+    def mark_complete(self):
+        self.manifest["complete"] = True
+        self.save_manifest()
+
+    def save_manifest(self):
+        # Replace atomically so a crash never leaves a half-written manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+
+class DayStoreWriter:
+    """
+    Buffers trades for a DayStore and appends them in a worker thread, every
+    `interval` seconds or once `max_trades` are waiting, so the event loop
+    never waits on the CSV and indicator work of an append.
+
+        writer = DayStoreWriter(store)
+        task = asyncio.create_task(writer.run())
+        ...feed writer.add(trades)...
+        await writer.close()  # Appends whatever is still buffered
+    """
+
+    def __init__(self, store, interval=FLUSH_INTERVAL, max_trades=FLUSH_TRADES):
+        self.store = store
+        self.interval = interval
+        self.max_trades = max_trades
+        self.pending = []
+        self.pending_trades = 0
+        self.wake = asyncio.Event()
+        self.lock = asyncio.Lock()  # One append at a time
+        self.closed = False
+        self.flushes = 0
+
+    def add(self, trades):
+        if not len(trades):
+            return
+        self.pending.append(trades)
+        self.pending_trades += len(trades)
+        if self.pending_trades >= self.max_trades:
+            self.wake.set()
+
+    async def run(self):
+        while not self.closed:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            trades = TradeBatch.concat(self.pending)
+            self.pending = []
+            self.pending_trades = 0
+            await asyncio.to_thread(self.store.append, trades)
+            self.flushes += 1
+
+    async def close(self):
+        self.closed = True
+        self.wake.set()
+        await self.flush()
@@ -0,0 +1,222 @@
+"""
+Exports of candles with their indicators, streamed in chunks.
+
+Each export reads one source (EXPORT_SOURCES), oldest first: the DayStore
+history (5-minute candles of Kraken trades in `output/<date>.csv`, read with
+`chunksize`) or the live candle frame (Bitget 1m candles). Sources are never
+mixed, so an export has a single exchange and interval. Rows are written one
+chunk at a time as gzip-compressed CSV or Parquet. Memory stays bounded by the
+chunk size whatever the range. Whenever the next chunk could push the current
+file over the attachment limit, a new part file is started; every part is a
+complete file with its own header.
+"""
+
+import datetime
+import gzip
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from logger_config import main_logger
+
+ATTACHMENT_LIMIT = 8 * 1024 * 1024  # Discord's attachment limit without boosts
+EXPORT_CHUNK_ROWS = 10_000
+
+EXPORT_SOURCES = {
+    "live": "Bitget 1m candles",
+    "history": "Kraken 5min DayStore candles",
+}
+
+EXPORT_COLUMNS = [
+    "UnixTimestamp",  # Candle open time, ms
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Volume",
+    "SMA",
+    "Rolling_STD",
+    "Bollinger_Upper_2",
+    "Bollinger_Lower_2",
+    "Bollinger_Upper_3",
+    "Bollinger_Lower_3",
+    "Bollinger_Upper_4",
+    "Bollinger_Lower_4",
+    "RSI",
+    "Stochastic",
+]
+
+DAY_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.csv$")
+
+
+def parse_range(text, now_ms):
+    """
+    Export range in ms as [start, end). Either a duration up to now ("8h",
+    "2d", "90min"), a date ("2023-09-26") or two dates ("2023-09-26..2023-09-28",
+    both included). Dates are UTC days.
+    """
+    if ".." in text or re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+        first, _, last = text.partition("..")
+        start = pd.Timestamp(first, tz="UTC")
+        end = pd.Timestamp(last or first, tz="UTC") + pd.Timedelta(days=1)
+        return start.value // 1_000_000, end.value // 1_000_000
+
+    duration = pd.Timedelta(text)
+    if duration <= pd.Timedelta(0):
+        raise ValueError(f"Empty export range: {text}")
+    return now_ms - duration.value // 1_000_000, now_ms + 1
+
+
+def normalize(df):
+    """Rows of a DayStore CSV or a candle frame, in EXPORT_COLUMNS."""
+    if "UnixTimestamp" not in df.columns:
+        if df.index.name == "UnixTimestamp":
+            df = df.reset_index()
+        else:
+            # DayStore rows: Timestamp in seconds and Volume_sum
+            df = df.rename(columns={"Volume_sum": "Volume"})
+            df["UnixTimestamp"] = df["Timestamp"].astype(np.int64) * 1000
+    df = df.reindex(columns=EXPORT_COLUMNS)
+    df["UnixTimestamp"] = df["UnixTimestamp"].astype(np.int64)
+    return df
+
+
+def history_chunks(directory, start_ms, end_ms, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stored DayStore candles in [start_ms, end_ms), file by file."""
+    if not os.path.isdir(directory):
+        return
+
+    # Day files are named after local dates, so look one day further each way
+    first_day = datetime.date.fromtimestamp(start_ms // 1000) - datetime.timedelta(1)
+    last_day = datetime.date.fromtimestamp(end_ms // 1000) + datetime.timedelta(1)
+    for name in sorted(os.listdir(directory)):
+        match = DAY_FILE.match(name)
+        if not match:
+            continue
+        day = datetime.date.fromisoformat(match.group(1))
+        if not first_day <= day <= last_day:
+            continue
+
+        path = os.path.join(directory, name)
+        if not os.path.getsize(path):
+            continue
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            chunk = normalize(chunk)
+            timestamps = chunk["UnixTimestamp"].to_numpy()
+            chunk = chunk[(timestamps >= start_ms) & (timestamps < end_ms)]
+            if len(chunk):
+                yield chunk
+
+
+def frame_chunks(df, start_ms, end_ms, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Rows of an in-memory candle frame (UnixTimestamp index) in the range."""
+    if df is None or not len(df):
+        return
+    timestamps = df.index.to_numpy(dtype=np.int64)
+    first, last = np.searchsorted(timestamps, [start_ms, end_ms])
+    for i in range(first, last, chunk_rows):
+        yield normalize(df.iloc[i : min(i + chunk_rows, last)])
+
+
+class CsvPart:
+    suffix = ".csv.gz"
+
+    def __init__(self, path):
+        self.raw = open(path, "wb")
+        self.file = gzip.GzipFile(fileobj=self.raw, mode="wb")
+        self.header = True
+
+    def write(self, chunk):
+        self.file.write(chunk.to_csv(index=False, header=self.header).encode())
+        # Flushed per chunk, so the size on disk is exact
+        self.file.flush()
+        self.header = False
+
+    def size(self):
+        return self.raw.tell()
+
+    def close(self):
+        self.file.close()
+        self.raw.close()
+
+
+class ParquetPart:
+    suffix = ".parquet"
+
+    def __init__(self, path):
+        # Optional dependency, only needed for Parquet exports
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError("Parquet exports need pyarrow installed") from e
+
+        self.pa = pyarrow
+        self.raw = open(path, "wb")
+        self.writer = None
+
+    def write(self, chunk):
+        table = self.pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pa.parquet.ParquetWriter(
+                self.raw, table.schema, compression="zstd"
+            )
+        self.writer.write_table(table)  # One row group per chunk
+
+    def size(self):
+        return self.raw.tell()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.raw.close()
+
+
+EXPORT_FORMATS = {"csv": CsvPart, "parquet": ParquetPart}
+
+
+def export_chunks(chunks, path_prefix, fmt="csv", limit=ATTACHMENT_LIMIT, report=None):
+    """
+    Write `chunks` to `<path_prefix>.partN<suffix>` files of at most about
+    `limit` bytes each.
+    :param report: Called after every chunk with the rows written so far and
+        the last timestamp written.
+    :return: Paths of the parts, in order.
+    """
+    part_class = EXPORT_FORMATS[fmt]
+    paths = []
+    part = None
+    rows = 0
+    largest_chunk = 0  # Compressed bytes
+    try:
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            # A new part when the next chunk, sized like the largest so far,
+            # would not fit
+            if part is not None and part.size() + largest_chunk > limit:
+                part.close()
+                part = None
+            if part is None:
+                paths.append(f"{path_prefix}.part{len(paths) + 1}{part_class.suffix}")
+                part = part_class(paths[-1])
+
+            before = part.size()
+            part.write(chunk)
+            largest_chunk = max(part.size() - before, largest_chunk)
+            rows += len(chunk)
+            if report is not None:
+                report(rows, int(chunk["UnixTimestamp"].iloc[-1]))
+    except BaseException:
+        if part is not None:
+            part.close()
+        for path in paths:
+            os.remove(path)
+        raise
+
+    if part is not None:
+        part.close()
+    main_logger.info(f"Exported {rows} rows to {len(paths)} file(s)")
+    return paths
@@ -0,0 +1,185 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from logger_config import main_logger
+from metrics import metrics as default_metrics
+
+JOB_WORKERS = 2  # Heavy commands running at the same time
+JOB_HISTORY = 20  # Finished jobs still listed by !jobs
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    One run of a heavy command. The work function receives the job and calls
+    `report()` to publish progress; that is also where cancellation takes effect.
+    """
+
+    def __init__(self, job_id, command, key, description, requested_by):
+        self.id = job_id
+        self.command = command
+        self.key = key
+        self.description = description
+        self.requested_by = [requested_by] if requested_by else []
+
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+        self.cancel_event = threading.Event()
+        self.task = None
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def report(self, progress, message=None):
+        """Called from the worker thread. Raises JobCancelled once cancelled."""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def format(self):
+        line = f"#{self.id} {self.description} [{self.status}"
+        if self.status == RUNNING:
+            line += f" {self.progress:.0%}"
+        line += f", {self.elapsed():.1f}s]"
+        if self.message:
+            line += f" {self.message}"
+        if len(self.requested_by) > 1:
+            line += f" ({len(self.requested_by)} requests)"
+        return line
+
+
+class JobScheduler:
+    """
+    Runs CPU-bound command work in a bounded thread pool, off the event loop.
+
+    Jobs submitted with the same key while one is in flight (e.g. the same
+    command, window and data version) share that job and its result instead of
+    doing the work again.
+    """
+
+    def __init__(
+        self, max_workers=JOB_WORKERS, history=JOB_HISTORY, metrics=default_metrics
+    ):
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="job")
+        self.metrics = metrics
+        self.ids = itertools.count(1)
+        self.inflight = {}  # key -> Job
+        self.jobs = {}  # id -> Job, in-flight and recent
+        self.finished = deque(maxlen=history)
+
+    def submit(self, command, key, func, *args, description=None, requested_by=None):
+        """
+        Start `func(job, *args)` in the pool, or join the in-flight job with the
+        same key. Returns (job, joined).
+        """
+        key = (command,) + tuple(key)
+        job = self.inflight.get(key)
+        if job is not None:
+            if requested_by:
+                job.requested_by.append(requested_by)
+            self.metrics.incr("jobs.coalesced")
+            return job, True
+
+        job = Job(next(self.ids), command, key, description or command, requested_by)
+        self.inflight[key] = job
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._execute(job, func, args))
+        # Waiters get the exception through result(); don't log it as unretrieved
+        job.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        self.metrics.incr("jobs.submitted")
+        main_logger.info(f"Job {job.id} submitted: {job.description}")
+        return job, False
+
+    async def result(self, job):
+        """Wait for a job. Raises JobCancelled, or whatever the job raised."""
+        return await asyncio.shield(job.task)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+
+        job.cancel_event.set()
+        job.message = "cancelling"
+        main_logger.info(f"Job {job.id} cancellation requested")
+        return True
+
+    def list(self):
+        return sorted(self.jobs.values(), key=lambda job: job.id)
+
+    def format(self):
+        jobs = self.list()
+        if not jobs:
+            return "No jobs yet."
+        return "\n".join(job.format() for job in jobs)
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            job.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func, args):
+        job.report(0.0)  # Cancelled while still queued
+        job.status = RUNNING
+        job.started_at = time.monotonic()
+        return func(job, *args)
+
+    async def _execute(self, job, func, args):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, self._run, job, func, args
+            )
+            job.status = DONE
+            job.progress = 1.0
+            job.message = ""
+            return result
+        except JobCancelled:
+            job.status = CANCELLED
+            self.metrics.incr("jobs.cancelled")
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.message = str(e)
+            self.metrics.incr("jobs.failed")
+            main_logger.error(f"Job {job.id} failed: {e}")
+            raise
+        finally:
+            job.finished_at = time.monotonic()
+            if job.started_at is not None:
+                self.metrics.observe("jobs.duration_ms", job.elapsed() * 1000)
+            self.inflight.pop(job.key, None)
+            self._forget(job)
+
+    def _forget(self, job):
+        # Keep the last `history` finished jobs around for !jobs
+        if len(self.finished) == self.finished.maxlen:
+            self.jobs.pop(self.finished[0].id, None)
+        self.finished.append(job)
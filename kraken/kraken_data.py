@@ -9,6 +9,9 @@ from pathlib import Path
 import os
 import aiohttp
 
+from kraken.trade_feed import rest_trades_frame
+from kraken.trade_ingest import TradeIngest
+
 # Initialize a lock for thread-safe operations
 lock = asyncio.Lock()
 
@@ -38,6 +41,8 @@ class DataBot:
         self.end_timestamp = int(self.end_time.timestamp())
 
         self.temp_data_list = []
+        # Parts and pages overlap; every trade is kept once by TradeID
+        self.ingest = TradeIngest()
 
     async def initialize(self):
         # Divide the total time into parts
@@ -75,7 +80,9 @@ class DataBot:
 
             async with lock:  # Lock only for this specific operation
                 if raw_data is not None:
-                    self.temp_data_list.append(raw_data)
+                    new_trades = self.ingest.add(raw_data)
+                    if not new_trades.empty:
+                        self.temp_data_list.append(new_trades)
                     current_timestamp = new_timestamp
 
             last_pull_time = curr_time
@@ -89,23 +96,8 @@ class DataBot:
                 data = await response.json()
 
                 if "result" in data:
-                    new_data = data["result"]["XXBTZUSD"]
-                    new_df = pd.DataFrame(
-                        new_data,
-                        columns=[
-                            "Price",
-                            "Volume",
-                            "Timestamp",
-                            "Buy/Sell",
-                            "Market/Limit",
-                            "Misc",
-                            "TradeID",
-                        ],
-                    )
-                    new_df = new_df.astype(
-                        {"Price": "float64", "Volume": "float64", "Timestamp": "int64"}
-                    )
-                    return new_df, new_df["Timestamp"].max()
+                    new_df = rest_trades_frame(data["result"]["XXBTZUSD"])
+                    return new_df, int(new_df["Timestamp"].max())
                 else:
                     logging.error(f"Failed to fetch data. Response: {data}")
                     await asyncio.sleep(5)  # Wait for 5 seconds on bad response
@@ -131,8 +123,9 @@ class DataBot:
             output_dir.mkdir(exist_ok=True)
 
             df = pd.concat(self.temp_data_list, ignore_index=True)
-            # Sort the data by Timestamp
-            df = df.sort_values(by="Timestamp")
+            # Trade IDs are unique and increase with time
+            df = df.sort_values(by="TradeID")
+            self.ingest.report()
 
             csv_filename = (
                 output_dir / f"{self.last_timestamp}_to_{int(time.time())}.csv"
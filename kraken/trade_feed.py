@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import random
+
+import aiohttp
+import numpy as np
+import websockets
+
+from kraken.trade_ingest import TradeIngest
+from market_data import KrakenAdapter
+
+KRAKEN_WS_URL = "wss://ws.kraken.com/v2"
+KRAKEN_REST_URL = "https://api.kraken.com"
+
+REST_PAGE_SIZE = 1000  # Trades per REST page; a shorter page means caught up
+REST_PAGE_DELAY = 1  # Seconds between catch-up pages, for the public rate limit
+
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+
+
+def rest_trades_frame(rows):
+    """
+    Trades from a REST `Trades` result, in the Kraken trade schema. Unlike a
+    TradeBatch, the frame keeps every REST field, including Misc.
+    """
+    df = KrakenAdapter.rest_trades(rows).to_frame()
+    df["Misc"] = [row[5] for row in rows]
+    return df
+
+
+async def fetch_trades_page(session, since, pair="XBTUSD", rest_url=KRAKEN_REST_URL):
+    """
+    One page of REST trades from `since` (seconds, or the nanosecond `last`
+    cursor of the previous page).
+    :return: (TradeBatch, cursor for the next page)
+    """
+    async with session.get(
+        f"{rest_url}/0/public/Trades", params={"pair": pair, "since": str(since)}
+    ) as response:
+        data = await response.json(content_type=None)
+
+    if data.get("error"):
+        raise RuntimeError(f"Kraken Trades failed: {data['error']}")
+
+    result = data["result"]
+    last = result.pop("last")
+    # The result is keyed by Kraken's own pair name, e.g. XXBTZUSD
+    (rows,) = result.values()
+    return KrakenAdapter.rest_trades(rows), last
+
+
+class KrakenTradeFeed:
+    """
+    Live Kraken trades over the v2 websocket, delivered to `on_trades` as
+    TradeBatches (see market_data) in TradeID order.
+
+    After every (re)connect, trades since the last delivered one are fetched
+    over REST while the live trades are buffered, so a disconnect leaves no
+    hole. Overlaps between the two are dropped by TradeID.
+    """
+
+    def __init__(
+        self,
+        on_trades,
+        symbol="BTC/USD",
+        rest_pair="XBTUSD",
+        since=None,
+        uri=KRAKEN_WS_URL,
+        rest_url=KRAKEN_REST_URL,
+        page_delay=REST_PAGE_DELAY,
+    ):
+        self.on_trades = on_trades
+        self.symbol = symbol
+        self.rest_pair = rest_pair
+        self.uri = uri
+        self.rest_url = rest_url
+        self.page_delay = page_delay
+
+        # Seconds; trades from here on are fetched over REST on connect
+        self.since = since
+        self.last_timestamp = since
+        self.ingest = TradeIngest()
+        self.until = None
+
+        self.ws = None
+        self.session = None
+        self.connections = 0
+        self.catching_up = False
+        self.buffer = []  # Live trades received during a catch-up
+
+    def done(self):
+        return (
+            self.until is not None
+            and self.last_timestamp is not None
+            and self.last_timestamp >= self.until
+        )
+
+    def deliver(self, trades):
+        if self.since is not None:
+            trades = trades[trades.seconds() >= self.since]
+        trades = self.ingest.add(trades)
+        if not len(trades):
+            return
+        trades = trades[np.argsort(trades.trade_id, kind="stable")]
+        self.last_timestamp = max(
+            self.last_timestamp or 0, float(trades.seconds().max())
+        )
+        self.on_trades(trades)
+
+    async def run(self, until=None):
+        """
+        Stream trades, reconnecting as needed.
+        :param until: Stop once a trade at or after this time (s) is delivered.
+        """
+        self.until = until
+        backoff = RECONNECT_BACKOFF_MIN
+        self.session = aiohttp.ClientSession()
+        try:
+            while not self.done():
+                delivered = len(self.ingest.index)
+                try:
+                    await self.connect()
+                except (
+                    websockets.exceptions.WebSocketException,
+                    aiohttp.ClientError,
+                    RuntimeError,
+                    OSError,
+                ) as e:
+                    logging.error(f"Kraken trade feed failed: {e}")
+
+                if self.done():
+                    break
+                if len(self.ingest.index) > delivered:
+                    backoff = RECONNECT_BACKOFF_MIN
+
+                # Exponential backoff with jitter so reconnects don't stampede
+                delay = backoff * random.uniform(0.5, 1.0)
+                logging.info(f"Kraken trade feed reconnecting in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+        finally:
+            await self.session.close()
+
+    async def connect(self):
+        async with websockets.connect(self.uri) as ws:
+            self.ws = ws
+            self.connections += 1
+            await ws.send(
+                json.dumps(
+                    {
+                        "method": "subscribe",
+                        "params": {
+                            "channel": "trade",
+                            "symbol": [self.symbol],
+                            "snapshot": True,
+                        },
+                    }
+                )
+            )
+
+            self.catching_up = self.last_timestamp is not None
+            self.buffer = []
+            catch_up = asyncio.create_task(self.catch_up())
+            try:
+                async for message in ws:
+                    self.handle_message(message)
+                    if self.done():
+                        break
+            finally:
+                catch_up.cancel()
+                await asyncio.gather(catch_up, return_exceptions=True)
+
+    def handle_message(self, message):
+        parsed = json.loads(message)
+        if parsed.get("channel") == "trade" and parsed.get("data"):
+            trades = KrakenAdapter.ws_trades(parsed["data"])
+            if self.catching_up:
+                self.buffer.append(trades)
+            else:
+                self.deliver(trades)
+        elif parsed.get("success") is False:
+            logging.error(f"Kraken {parsed.get('method')} failed: {parsed['error']}")
+
+    async def catch_up(self):
+        """Fetch trades since the last delivered one, then release the buffer."""
+        # Whole seconds: the overlap with delivered trades is dropped by TradeID
+        cursor = int(self.last_timestamp or 0)
+        try:
+            while self.catching_up and not self.done():
+                trades, cursor = await fetch_trades_page(
+                    self.session, cursor, self.rest_pair, self.rest_url
+                )
+                self.deliver(trades)
+
+                first_live = int(self.buffer[0].trade_id.min()) if self.buffer else None
+                if len(trades) < REST_PAGE_SIZE or (
+                    first_live is not None and int(trades.trade_id.max()) >= first_live
+                ):
+                    break
+                await asyncio.sleep(self.page_delay)
+        except (aiohttp.ClientError, RuntimeError) as e:
+            logging.error(f"Kraken trade catch-up failed: {e}")
+            await self.ws.close()
+            return
+
+        self.catching_up = False
+        for trades in self.buffer:
+            self.deliver(trades)
+        self.buffer = []
+        if self.done():
+            await self.ws.close()
@@ -0,0 +1,185 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from market_data import as_trade_batch
+
+SESSION_SECONDS = 86400  # VWAP resets at 00:00 UTC
+PROFILE_BINS = 200
+
+
+class VolumeProfile:
+    """
+    Buy and sell volume traded at each price, in a fixed number of bins.
+
+    The bins start around the first price seen. When a trade falls outside
+    them, the bin width doubles (merging neighbouring bins) until it fits, so
+    memory stays constant however long the profile runs.
+    """
+
+    def __init__(self, n_bins=PROFILE_BINS, bin_width=None):
+        if n_bins % 2:
+            raise ValueError("n_bins must be even so bins can be merged in pairs.")
+
+        self.n_bins = n_bins
+        self.bin_width = bin_width
+        self.low = None
+        self.buy_volume = np.zeros(n_bins)
+        self.sell_volume = np.zeros(n_bins)
+
+    @property
+    def high(self):
+        return self.low + self.n_bins * self.bin_width
+
+    def _grow(self, downwards):
+        half = self.n_bins // 2
+        for volume in (self.buy_volume, self.sell_volume):
+            merged = volume.reshape(half, 2).sum(axis=1)
+            volume[:] = 0
+            if downwards:
+                volume[half:] = merged
+            else:
+                volume[:half] = merged
+
+        if downwards:
+            self.low -= self.n_bins * self.bin_width
+        self.bin_width *= 2
+
+    def add(self, prices, volumes, is_buy):
+        if not len(prices):
+            return
+
+        if self.low is None:
+            if self.bin_width is None:
+                # Start at about 0.05% of the price per bin
+                self.bin_width = max(float(np.median(prices)) * 0.0005, 1e-9)
+            self.low = float(prices[0]) - self.n_bins // 2 * self.bin_width
+
+        while prices.min() < self.low:
+            self._grow(downwards=True)
+        while prices.max() >= self.high:
+            self._grow(downwards=False)
+
+        bins = ((prices - self.low) // self.bin_width).astype(np.int64)
+        bins = np.clip(bins, 0, self.n_bins - 1)
+        self.buy_volume += np.bincount(
+            bins, weights=np.where(is_buy, volumes, 0), minlength=self.n_bins
+        )
+        self.sell_volume += np.bincount(
+            bins, weights=np.where(is_buy, 0, volumes), minlength=self.n_bins
+        )
+
+    def prices(self):
+        """Price at the middle of each bin."""
+        return self.low + (np.arange(self.n_bins) + 0.5) * self.bin_width
+
+    def point_of_control(self):
+        """Price of the bin with the most volume."""
+        total = self.buy_volume + self.sell_volume
+        return self.prices()[int(np.argmax(total))]
+
+
+class TradeFlow:
+    """
+    Streaming order-flow indicators from Kraken trade records (Price, Volume,
+    Timestamp, Buy/Sell): session VWAP, buy/sell volume and delta per candle,
+    and a volume profile.
+
+    Trades are fed in batches with `update()`, oldest first. Only the last
+    `max_candles` candles are kept, so memory does not grow with history.
+    """
+
+    def __init__(
+        self,
+        candle_seconds=60,
+        session_seconds=SESSION_SECONDS,
+        n_bins=PROFILE_BINS,
+        max_candles=1000,
+    ):
+        self.candle_seconds = candle_seconds
+        self.session_seconds = session_seconds
+        self.max_candles = max_candles
+        self.profile = VolumeProfile(n_bins)
+
+        self.session = None
+        self.session_pv = 0.0
+        self.session_volume = 0.0
+        self.cumulative_delta = 0.0
+
+        # candle start (s) -> [buy volume, sell volume, VWAP at close, cumulative delta]
+        self.candles = OrderedDict()
+
+    def update(self, trades):
+        """:param trades: A TradeBatch or a Kraken trade frame."""
+        if not len(trades):
+            return
+
+        trades = as_trade_batch(trades)
+        trades = trades[np.argsort(trades.timestamps, kind="stable")]
+        timestamps = trades.seconds()
+        prices = trades.price
+        volumes = trades.volume
+        is_buy = trades.side > 0
+
+        self.profile.add(prices, volumes, is_buy)
+
+        # Session VWAP after every trade, restarting at each session boundary
+        sessions = (timestamps // self.session_seconds).astype(np.int64)
+        pv = np.cumsum(prices * volumes)
+        v = np.cumsum(volumes)
+
+        starts = np.flatnonzero(np.diff(sessions, prepend=sessions[0] - 1))
+        segment = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(v))))
+        pv_before = np.where(starts > 0, pv[starts - 1], 0)[segment]
+        v_before = np.where(starts > 0, v[starts - 1], 0)[segment]
+        session_pv = pv - pv_before
+        session_v = v - v_before
+
+        # Carry over the running session from the previous batch
+        carried = sessions == self.session
+        session_pv[carried] += self.session_pv
+        session_v[carried] += self.session_volume
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vwap = session_pv / session_v
+
+        self.session = int(sessions[-1])
+        self.session_pv = float(session_pv[-1])
+        self.session_volume = float(session_v[-1])
+
+        # Per candle: buy and sell volume, and the VWAP at its last trade
+        buckets = (timestamps // self.candle_seconds).astype(np.int64)
+        first = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        last = np.append(first[1:], len(buckets)) - 1
+        buy = np.add.reduceat(np.where(is_buy, volumes, 0), first)
+        sell = np.add.reduceat(np.where(is_buy, 0, volumes), first)
+
+        for bucket, bucket_buy, bucket_sell, close_vwap in zip(
+            buckets[first] * self.candle_seconds, buy, sell, vwap[last]
+        ):
+            candle = self.candles.get(int(bucket))
+            if candle is None:
+                candle = self.candles[int(bucket)] = [0.0, 0.0, 0.0, 0.0]
+            candle[0] += bucket_buy
+            candle[1] += bucket_sell
+            candle[2] = close_vwap
+            self.cumulative_delta += bucket_buy - bucket_sell
+            candle[3] = self.cumulative_delta
+
+        while len(self.candles) > self.max_candles:
+            self.candles.popitem(last=False)
+
+        logging.debug(f"Trade flow updated with {len(trades)} trades.")
+
+    def frame(self):
+        """Per-candle indicators indexed by candle start time (UTC)."""
+        df = pd.DataFrame.from_dict(
+            self.candles,
+            orient="index",
+            columns=["Buy_Volume", "Sell_Volume", "VWAP", "Cumulative_Delta"],
+        )
+        df["Delta"] = df["Buy_Volume"] - df["Sell_Volume"]
+        df.index = pd.to_datetime(df.index, unit="s", utc=True)
+        return df
@@ -0,0 +1,93 @@
+import logging
+
+import numpy as np
+
+from market_data import TradeBatch
+
+
+class TradeIdIndex:
+    """
+    The set of trade IDs seen so far, stored as sorted, disjoint inclusive
+    ranges [start, end]. Kraken trade IDs are consecutive, so a download
+    without holes is a single range however many trades it holds.
+    """
+
+    def __init__(self):
+        self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        """Number of IDs held."""
+        return int((self.ends - self.starts + 1).sum())
+
+    def contains(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        pos = np.searchsorted(self.ends, ids)
+        found = pos < len(self.ends)
+        found[found] = self.starts[pos[found]] <= ids[found]
+        return found
+
+    def add(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(ids):
+            return
+
+        # Runs of consecutive IDs in the batch
+        breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+        starts = np.concatenate((self.starts, ids[np.r_[0, breaks]]))
+        ends = np.concatenate((self.ends, ids[np.r_[breaks - 1, len(ids) - 1]]))
+
+        # Merge overlapping and adjacent ranges
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], np.maximum.accumulate(ends[order])
+        new_range = np.r_[True, starts[1:] > ends[:-1] + 1]
+        group_ends = np.r_[np.flatnonzero(new_range)[1:] - 1, len(starts) - 1]
+        self.starts = starts[new_range]
+        self.ends = ends[group_ends]
+
+    def gaps(self):
+        """Missing (first, last) ID ranges between the ones held."""
+        return list(zip((self.ends[:-1] + 1).tolist(), (self.starts[1:] - 1).tolist()))
+
+
+class TradeIngest:
+    """
+    Deduplicates Kraken trade pages by TradeID before they are stored, so
+    overlapping pages (Kraken's `since` is inclusive) never repeat a trade.
+    """
+
+    def __init__(self):
+        self.index = TradeIdIndex()
+        self.duplicates = 0
+
+    def add(self, trades):
+        """
+        Return the trades not seen before and remember them.
+        :param trades: A TradeBatch or a frame with a TradeID column.
+        """
+        if isinstance(trades, TradeBatch):
+            ids = trades.trade_id
+        else:
+            ids = trades["TradeID"].to_numpy(dtype=np.int64)
+
+        # First occurrence within the page, and not in an earlier page
+        _, first = np.unique(ids, return_index=True)
+        keep = np.zeros(len(ids), dtype=bool)
+        keep[first] = True
+        keep &= ~self.index.contains(ids)
+
+        self.index.add(ids[keep])
+        self.duplicates += int(len(ids) - keep.sum())
+        return trades[keep]
+
+    def report(self):
+        gaps = self.index.gaps()
+        missing = sum(last - first + 1 for first, last in gaps)
+        summary = (
+            f"{len(self.index)} trades in {len(self.index.starts)} ID ranges, "
+            f"{self.duplicates} duplicates dropped, {missing} IDs missing"
+        )
+        if gaps:
+            logging.warning(f"Trade ID gaps: {gaps[:10]}")
+        logging.info(summary)
+        return summary
@@ -3,7 +3,7 @@ import logging
 # Setup for main.py logger
 main_logger = logging.getLogger("main")
 main_logger.setLevel(logging.INFO)
-main_file_handler = logging.FileHandler("main.log")
+main_file_handler = logging.FileHandler("main.log", delay=True)
 main_file_handler.setFormatter(
     logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 )
@@ -12,7 +12,7 @@ main_logger.addHandler(main_file_handler)
 # Setup for trader.py logger
 trader_logger = logging.getLogger("trader")
 trader_logger.setLevel(logging.DEBUG)
-trader_file_handler = logging.FileHandler("trader.log")
+trader_file_handler = logging.FileHandler("trader.log", delay=True)
 trader_file_handler.setFormatter(
     logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 )
@@ -21,7 +21,7 @@ trader_logger.addHandler(trader_file_handler)
 # Setup for plot.py logger
 plot_logger = logging.getLogger("plot")
 plot_logger.setLevel(logging.DEBUG)
-plot_file_handler = logging.FileHandler("plot.log")
+plot_file_handler = logging.FileHandler("plot.log", delay=True)
 plot_file_handler.setFormatter(
     logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 )
@@ -30,7 +30,7 @@ plot_logger.addHandler(plot_file_handler)
 # Setup for plot.py logger
 utils_logger = logging.getLogger("utils")
 utils_logger.setLevel(logging.DEBUG)
-plot_file_handler = logging.FileHandler("utils.log")
+plot_file_handler = logging.FileHandler("utils.log", delay=True)
 plot_file_handler.setFormatter(
     logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 )
@@ -2,25 +2,58 @@ import os
 from dotenv import load_dotenv
 from discord import Intents, File
 from discord.ext import commands
-from plot import plot_candlestick_with_bollinger
 import asyncio
+import collections
+import importlib
+import io
+import threading
+import time
 
-from bitget.trader import Trader
-from bitget.utils import (
-    check_entry_conditions,
-    check_trigger_conditions,
-    format_backtest_results,
-    run_backtest,
-)
+from alert_dispatcher import AlertDispatcher
+from jobs import JobCancelled, JobScheduler
+from metrics import metrics
 
+from bitget.timeframes import TIMEFRAMES
 from logger_config import main_logger
 
+# pandas, matplotlib and the bitget modules are imported by the commands that
+# use them, so the bot reaches on_ready without paying for them
+LAZY_MODULES = ("bitget.trader", "bitget.utils", "bitget.shared_feed", "plot")
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Access the DISCORD_TOKEN variable
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 
+# Channel that receives entry point alerts
+ALERT_CHANNEL_ID = int(os.getenv("ALERT_CHANNEL_ID", "1157023192024621126"))
+
+# Optional: publish live candles to shared memory for worker processes
+SHARED_FEED_NAME = os.getenv("SHARED_FEED_NAME")
+
+# Optional: contracts per entry; live bracket orders are only sent when set
+ORDER_SIZE = os.getenv("ORDER_SIZE")
+
+# Optional: simulate entries as paper positions, shown by !positions
+PAPER_TRADING = os.getenv("PAPER_TRADING")
+
+# Optional: depth channel ("books5" or "books15") whose spread and imbalance
+# the strategy can use, and a file its snapshots are journaled to
+BOOK_CHANNEL = os.getenv("BOOK_CHANNEL")
+DEPTH_JOURNAL = os.getenv("DEPTH_JOURNAL")
+
+# Optional: comma-separated symbols to watch, sharded over WORKERS processes
+SYMBOLS = [s.strip() for s in os.getenv("SYMBOLS", "").split(",") if s.strip()]
+WORKERS = int(os.getenv("WORKERS", "0")) or None
+
+# DayStore candle history (`!export <symbol> <span> <fmt> history`) and its symbol
+HISTORY_DIRECTORY = os.getenv("HISTORY_DIRECTORY", "output")
+HISTORY_SYMBOL = os.getenv("HISTORY_SYMBOL", "BTCUSDT")
+
+# Plots are rendered in worker threads, never on screen
+os.environ.setdefault("MPLBACKEND", "Agg")
+
 
 intents = Intents.default()
 intents.message_content = True
@@ -33,22 +66,89 @@ bot = commands.Bot(
 
 
 trader = None  # Initialize trader to None
+shared_feed = None
+paper_trader = None  # Shared by every Trader when PAPER_TRADING is set
+supervisor = None  # Worker processes, when SYMBOLS is set
+scanner = None  # Latest indicator values of the single Trader, for !scan
 
+alert_dispatcher = AlertDispatcher(bot, routes={"entry": ALERT_CHANNEL_ID})
+job_scheduler = JobScheduler()
+# Requests still sending each export part; joined exports share their parts
+export_senders = collections.Counter()
 
-async def entry_point_alert(message: str):
-    channel = bot.get_channel(
-        1157023192024621126
-    )  # Replace with your actual Discord channel ID
-    await channel.send(message)
+# pyplot keeps global state, so only one plot is drawn at a time
+plot_lock = threading.Lock()
 
 
 @bot.command(name="kraken")
 async def kraken(ctx):
-    global trader
+    global trader, shared_feed, paper_trader, supervisor, scanner
     await ctx.send("🥚 Initializing Kraken bot🥚. Hold please ⏳")
 
+    if SYMBOLS:
+        if PAPER_TRADING:
+            # Paper positions live in the bot process, the Traders in workers
+            await ctx.send(
+                "❌ PAPER_TRADING is not supported with SYMBOLS (worker processes). "
+                "Unset one of them and run !kraken again."
+            )
+            return
+        if supervisor is None:
+            from bitget.supervisor import Supervisor
+
+            supervisor = Supervisor(
+                SYMBOLS,
+                workers=WORKERS,
+                on_alert=alert_dispatcher.submit,
+                options={
+                    "order_size": ORDER_SIZE,
+                    "book_channel": BOOK_CHANNEL,
+                    "journal_path": DEPTH_JOURNAL,
+                },
+            )
+            supervisor.start()
+        await ctx.send(
+            f"🐣 Kraken bot Initialized with {len(supervisor.workers)} workers 🐙"
+        )
+        return
+
+    from bitget.trader import Trader
+
+    if SHARED_FEED_NAME and shared_feed is None:
+        from bitget.shared_feed import SharedCandleFeed
+
+        shared_feed = SharedCandleFeed(SHARED_FEED_NAME)
+
+    if PAPER_TRADING and paper_trader is None:
+        from bitget.paper import PaperTrader
+
+        paper_trader = PaperTrader()
+
+    order_client = None
+    if ORDER_SIZE:
+        from bitget.order_client import BitGetOrderClient
+
+        order_client = BitGetOrderClient(
+            os.getenv("API_KEY"), os.getenv("SECRET_KEY"), os.getenv("PASSPHRASE")
+        )
+        await order_client.warm_up(symbols=["BTCUSDT_UMCBL"])
+
+    if scanner is None:
+        from bitget.scanner import Scanner
+
+        scanner = Scanner()
+
     # Initialize Trader and connect
-    trader = Trader(entry_point_callback=entry_point_alert)
+    trader = Trader(
+        entry_point_callback=alert_dispatcher.submit,
+        shared_feed=shared_feed,
+        order_client=order_client,
+        order_size=ORDER_SIZE,
+        paper=paper_trader,
+        scanner=scanner,
+        book_channel=BOOK_CHANNEL,
+        journal_path=DEPTH_JOURNAL,
+    )
     asyncio.create_task(trader.connect())
 
     await ctx.send("🐣 Kraken bot Initialized 🐙")
@@ -58,54 +158,318 @@ async def kraken(ctx):
     # await trading_task
 
 
+def backtest_job(job, data):
+    from bitget.utils import format_backtest_results, run_backtest
+
+    job.report(0.0, "evaluating rules")
+    results = run_backtest(data, progress=job.report)
+    return format_backtest_results(results)
+
+
+def plot_job(job, data):
+    from plot import plot_candlestick_with_bollinger
+
+    with plot_lock:
+        job.report(0.0, "rendering")
+        try:
+            # Rendered in memory; nothing is left behind in plots/
+            buffer = io.BytesIO()
+            plot_candlestick_with_bollinger(data, save_path=buffer, progress=job.report)
+            return buffer.getvalue()
+        except JobCancelled:
+            import matplotlib.pyplot as plt
+
+            plt.close("all")
+            raise
+
+
+def chart_job(job, data, symbol, timeframe):
+    from plot import live_chart
+
+    job.report(0.0, "rendering")
+    return live_chart(symbol, timeframe).render(data).getvalue()
+
+
+def export_job(job, frame, start, end, fmt, path_prefix):
+    """Export the live `frame`, or the DayStore history when it is None."""
+    from export import export_chunks, frame_chunks, history_chunks
+
+    def report(rows, last_timestamp):
+        job.report((last_timestamp - start) / (end - start), f"{rows} rows")
+
+    if frame is None:
+        chunks = history_chunks(HISTORY_DIRECTORY, start, end)
+    else:
+        chunks = frame_chunks(frame, start, end)
+
+    job.report(0.0, "exporting")
+    return export_chunks(chunks, path_prefix, fmt, report=report)
+
+
+async def run_job(ctx, command, key, func, *args, description):
+    """Run `func` as a job (or join the identical one in flight) and wait for it."""
+    job, joined = job_scheduler.submit(
+        command, key, func, *args, description=description, requested_by=ctx.author.id
+    )
+    if joined:
+        await ctx.send(
+            f"🔁 Same {command} already running as job #{job.id}, joining it ⏳"
+        )
+    else:
+        await ctx.send(
+            f"⏳ Started job #{job.id}: {description}. `!cancel {job.id}` to stop it."
+        )
+
+    try:
+        return await job_scheduler.result(job)
+    except JobCancelled:
+        await ctx.send(f"🛑 Job #{job.id} was cancelled.")
+    except Exception as e:
+        await ctx.send(f"❌ Job #{job.id} failed: {e}")
+    return None
+
+
+async def check_trader(ctx, command):
+    """Whether the single-symbol Trader whose candles `command` reads is running."""
+    if trader is not None:
+        return True
+
+    if supervisor is not None:
+        await ctx.send(
+            f"❌ !{command} needs the single-symbol bot: with SYMBOLS set, the "
+            "candles stay in the worker processes. Use !scan and !workers."
+        )
+    else:
+        await ctx.send("❌ Kraken bot is not initialized. Please run !kraken first.")
+    return False
+
+
+async def check_timeframe(ctx, timeframe):
+    if timeframe in TIMEFRAMES:
+        return True
+
+    await ctx.send(
+        f"❌ Unknown timeframe {timeframe}. Use one of: {', '.join(TIMEFRAMES)}"
+    )
+    return False
+
+
 @bot.command(name="backtest")
-async def backtest(ctx, hours: int = 8):
-    global trader  # Assuming trader is a global instance of your Trader class
-    if trader is None:
+async def backtest(ctx, hours: int = 8, timeframe: str = "1m"):
+    if not await check_trader(ctx, "backtest"):
+        return
+
+    if not await check_timeframe(ctx, timeframe):
+        return
+
+    data = trader.get_data_last_n_hours(hours, timeframe)
+    key = (hours, timeframe, trader.data_version(timeframe))
+
+    formatted_results = await run_job(
+        ctx,
+        "backtest",
+        key,
+        backtest_job,
+        data,
+        description=f"backtest {hours}h {timeframe}",
+    )
+    if formatted_results is not None:
+        await ctx.send(formatted_results)
+
+
+@bot.command(name="plot")
+async def plot(ctx, hours: int = 8, timeframe: str = "1m"):
+    if not await check_trader(ctx, "plot"):
+        return
+
+    if not await check_timeframe(ctx, timeframe):
+        return
+
+    # Fetch and filter the trading data based on the number of hours
+    data = trader.get_data_last_n_hours(hours, timeframe)
+    version = trader.data_version(timeframe)
+    key = (hours, timeframe, version)
+
+    png = await run_job(
+        ctx,
+        "plot",
+        key,
+        plot_job,
+        data,
+        description=f"plot {hours}h {timeframe}",
+    )
+    if png is not None:
+        await ctx.send(
+            file=File(io.BytesIO(png), filename=f"kraken_plot_{timeframe}_{hours}h.png")
+        )
+
+
+@bot.command(name="chart")
+async def chart(ctx, hours: int = 8, timeframe: str = "1m"):
+    if not await check_trader(ctx, "chart"):
+        return
+
+    if not await check_timeframe(ctx, timeframe):
+        return
+
+    data = trader.get_data_last_n_hours(hours, timeframe)
+    key = (hours, timeframe, trader.data_version(timeframe))
+    png = await run_job(
+        ctx,
+        "chart",
+        key,
+        chart_job,
+        data,
+        trader.symbol,
+        timeframe,
+        description=f"chart {hours}h {timeframe}",
+    )
+    if png is not None:
         await ctx.send(
-            "❌ Trading bot is not initialized. Please run !initialize or equivalent command first."
+            file=File(io.BytesIO(png), filename=f"{trader.symbol}_{timeframe}.png")
         )
+
+
+@bot.command(name="export")
+async def export(
+    ctx,
+    symbol: str = "BTCUSDT",
+    span: str = "8h",
+    fmt: str = "csv",
+    source: str = "live",
+):
+    from export import EXPORT_FORMATS, EXPORT_SOURCES, parse_range
+
+    symbol = symbol.upper()
+    if fmt not in EXPORT_FORMATS:
+        await ctx.send(
+            f"❌ Unknown format {fmt}. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+        return
+    if source not in EXPORT_SOURCES:
+        await ctx.send(
+            f"❌ Unknown source {source}. Use one of: "
+            + ", ".join(f"{name} ({kind})" for name, kind in EXPORT_SOURCES.items())
+        )
+        return
+    try:
+        start, end = parse_range(span, int(time.time() * 1000))
+    except ValueError:
+        await ctx.send(
+            f"❌ Unknown range {span}. Use e.g. 8h, 2d, 2023-09-26 or "
+            "2023-09-26..2023-09-28"
+        )
+        return
+
+    frame, version = None, None
+    if source == "live":
+        if trader is None or trader.symbol != symbol:
+            if supervisor is not None and symbol in SYMBOLS:
+                await check_trader(ctx, "export")
+            else:
+                await ctx.send(f"❌ No live candles for {symbol}.")
+            return
+        # The live candles of the range, copied so later ticks don't change them
+        frame = trader.get_frame("1m")
+        frame = frame[(frame.index >= start) & (frame.index < end)]
+        version = trader.data_version("1m")
+    elif symbol != HISTORY_SYMBOL:
+        await ctx.send(f"❌ No stored history for {symbol}, only {HISTORY_SYMBOL}.")
         return
 
-    await ctx.send(f"⏳ Running backtest for the last {hours} hours. Hold please ⏳")
+    os.makedirs("exports", exist_ok=True)
+    paths = await run_job(
+        ctx,
+        "export",
+        (symbol, source, start, end, fmt, version),
+        export_job,
+        frame,
+        start,
+        end,
+        fmt,
+        f"exports/{symbol}_{source}_{start}_{end}",
+        description=f"export {symbol} {span} {fmt} ({EXPORT_SOURCES[source]})",
+    )
+    if paths is None:
+        return
+    if not paths:
+        await ctx.send(f"❌ No {source} candles for {symbol} in {span}.")
+        return
 
-    data = trader.get_data_last_n_hours(hours)
+    # Each part fits in one attachment
+    export_senders.update(paths)
+    try:
+        for i, path in enumerate(paths, start=1):
+            await ctx.send(
+                f"📦 {symbol} {span}, {EXPORT_SOURCES[source]} ({i}/{len(paths)})",
+                file=File(path),
+            )
+    finally:
+        export_senders.subtract(paths)
+        for path in paths:
+            if export_senders[path] <= 0:
+                del export_senders[path]
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+@bot.command(name="jobs")
+async def jobs(ctx):
+    await ctx.send(f"🛠️ **Jobs** 🛠️\n```{job_scheduler.format()}```")
+
+
+@bot.command(name="cancel")
+async def cancel(ctx, job_id: int):
+    if job_scheduler.cancel(job_id):
+        await ctx.send(f"🛑 Cancelling job #{job_id}.")
+    else:
+        await ctx.send(f"❌ No running job #{job_id}. See !jobs.")
 
-    # Run backtest
-    results = run_backtest(data, check_entry_conditions, check_trigger_conditions)
 
-    # Format and send the results
-    formatted_results = format_backtest_results(results)
-    await ctx.send(formatted_results)
+@bot.command(name="positions")
+async def positions(ctx):
+    if paper_trader is None:
+        await ctx.send("❌ Paper trading is off. Set PAPER_TRADING and run !kraken.")
+        return
+    await ctx.send(f"📒 **Paper positions** 📒\n```{paper_trader.format()}```")
 
 
-@bot.command(name="plot")
-async def plot(ctx, hours: int = 8):
-    global trader
-    if trader is None:
-        await ctx.send("❌ Kraken bot is not initialized. Please run !kraken first.")
+@bot.command(name="workers")
+async def workers(ctx):
+    if supervisor is None:
+        await ctx.send("❌ No worker processes. Set SYMBOLS and run !kraken.")
         return
+    await ctx.send(f"🧵 **Workers** 🧵\n```{supervisor.format()}```")
 
-    await ctx.send(f"📊 Generating the plot for the last {hours} hours. Hold please ⏳")
 
-    # Fetch and print the trading data
-    # data = trader.get_data()
+@bot.command(name="scan")
+async def scan(ctx, top: int = 20):
+    current = supervisor.scanner if supervisor is not None else scanner
+    if current is None or not len(current):
+        await ctx.send("❌ Nothing scanned yet. Run !kraken first.")
+        return
+    await ctx.send(f"🔭 **Distance to trigger** 🔭\n```{current.format(top)}```")
 
-    # Fetch and filter the trading data based on the number of hours
-    data = trader.get_data_last_n_hours(hours)
 
-    # Generate the plot and save it as a PNG file
-    file_path = "kraken_plot.png"
-    plot_candlestick_with_bollinger(data, save_path=file_path)
+@bot.command(name="metrics")
+async def show_metrics(ctx):
+    await ctx.send(f"📈 **Bot metrics** 📈\n```{metrics.format()}```")
+
 
-    # await ctx.send("", file=File(file_path))
-    await ctx.send(file=File(file_path))
+def warm_imports():
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    main_logger.info("Lazy modules imported.")
 
 
 @bot.event
 async def on_ready():
+    alert_dispatcher.start()
     print(f"We have logged in as {bot.user}")
 
+    # Import the heavy modules off the event loop so the first command is quick
+    asyncio.get_running_loop().run_in_executor(None, warm_imports)
+
 
 @bot.event
 async def on_command_error(ctx, error):
@@ -115,7 +479,17 @@ async def on_command_error(ctx, error):
         main_logger.error(f"An error occurred: {str(error)}")
 
 
-bot.run(DISCORD_TOKEN)
+def main():
+    bot.run(DISCORD_TOKEN)
+    job_scheduler.shutdown()
+
+    if shared_feed is not None:
+        shared_feed.close()
+        shared_feed.unlink()
+
+
+if __name__ == "__main__":
+    main()
 
 
 # @bot.command(name="help")
@@ -0,0 +1,260 @@
+"""
+Exchange-independent market data.
+
+Every source is converted once, at the edge, by its adapter into one of two
+array-backed batch types:
+
+- TradeBatch: trades as int64 ns timestamps, float64 price/volume, int8 side
+  (+1 buy, -1 sell) and int64 trade IDs.
+- CandleBatch: candles as int64 ms open times and float64 OHLCV columns.
+
+Downstream code (CandleStore, indicators, backtests, plots, DayStore) accepts
+the batches directly, taking any other input through `as_candle_batch()` or
+`as_trade_batch()`. `CandleBatch.to_frame()` builds the repo's standard candle
+frame straight from the arrays, with no string parsing or epoch guessing.
+"""
+
+import numpy as np
+import pandas as pd
+
+CANDLE_FIELDS = ["open", "high", "low", "close", "volume"]
+
+# Kraken's trade schema, used by the Kraken tools and DayStore
+TRADE_COLUMNS = [
+    "Price",
+    "Volume",
+    "Timestamp",  # Seconds, with the fractional part
+    "Buy/Sell",
+    "Market/Limit",
+    "Misc",
+    "TradeID",
+]
+
+
+class CandleBatch:
+    def __init__(self, timestamps, open, high, low, close, volume):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)  # Open time, ms
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        """A batch of the rows selected by a slice, mask or positions."""
+        return CandleBatch(
+            self.timestamps[index],
+            *(getattr(self, field)[index] for field in CANDLE_FIELDS),
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, CandleBatch) and all(
+            np.array_equal(getattr(self, name), getattr(other, name), equal_nan=True)
+            for name in ["timestamps"] + CANDLE_FIELDS
+        )
+
+    @classmethod
+    def concat(cls, batches):
+        return cls(
+            np.concatenate([batch.timestamps for batch in batches]),
+            *(
+                np.concatenate([getattr(batch, field) for batch in batches])
+                for field in CANDLE_FIELDS
+            ),
+        )
+
+    def to_frame(self):
+        """
+        Raw candle frame as CandleStore keeps it: indexed by UnixTimestamp (ms),
+        OHLCV columns, and Timestamp in Pacific time.
+        """
+        index = pd.Index(self.timestamps, name="UnixTimestamp")
+        df = pd.DataFrame(
+            {
+                "Open": self.open,
+                "High": self.high,
+                "Low": self.low,
+                "Close": self.close,
+                "Volume": self.volume,
+            },
+            index=index,
+        )
+        df["Timestamp"] = pd.to_datetime(
+            self.timestamps, unit="ms", utc=True
+        ).tz_convert("America/Los_Angeles")
+        return df
+
+
+class TradeBatch:
+    def __init__(self, timestamps, price, volume, side, trade_id, market=None):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)  # ns
+        self.price = np.asarray(price, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.side = np.asarray(side, dtype=np.int8)  # +1 buy, -1 sell
+        self.trade_id = np.asarray(trade_id, dtype=np.int64)
+        # True for market orders; unknown for some sources
+        self.market = (
+            np.ones(len(self.price), dtype=bool)
+            if market is None
+            else np.asarray(market, dtype=bool)
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        return TradeBatch(
+            self.timestamps[index],
+            self.price[index],
+            self.volume[index],
+            self.side[index],
+            self.trade_id[index],
+            self.market[index],
+        )
+
+    @classmethod
+    def concat(cls, batches):
+        return cls(
+            *(
+                np.concatenate([getattr(batch, name) for batch in batches])
+                for name in ["timestamps", "price", "volume", "side", "trade_id"]
+            ),
+            market=np.concatenate([batch.market for batch in batches]),
+        )
+
+    def seconds(self):
+        return self.timestamps / 1e9
+
+    def to_frame(self):
+        """The trades in the Kraken trade schema (TRADE_COLUMNS)."""
+        return pd.DataFrame(
+            {
+                "Price": self.price,
+                "Volume": self.volume,
+                "Timestamp": self.seconds(),
+                "Buy/Sell": np.where(self.side > 0, "b", "s"),
+                "Market/Limit": np.where(self.market, "m", "l"),
+                "Misc": "",
+                "TradeID": self.trade_id,
+            }
+        )
+
+    def to_candles(self, interval_ms, fill_gaps=True):
+        """
+        OHLCV per `interval_ms` bucket. With `fill_gaps`, buckets without
+        trades are included with NaN prices and zero volume.
+        """
+        if not len(self):
+            return CandleBatch(*([[]] * 6))
+
+        order = np.lexsort((self.trade_id, self.timestamps))
+        prices = self.price[order]
+        volumes = self.volume[order]
+        buckets = self.timestamps[order] // 1_000_000 // interval_ms * interval_ms
+
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        candles = CandleBatch(
+            buckets[starts],
+            prices[starts],
+            np.maximum.reduceat(prices, starts),
+            np.minimum.reduceat(prices, starts),
+            prices[ends],
+            np.add.reduceat(volumes, starts),
+        )
+        if not fill_gaps:
+            return candles
+
+        first, last = candles.timestamps[0], candles.timestamps[-1]
+        timestamps = np.arange(first, last + interval_ms, interval_ms)
+        positions = (candles.timestamps - first) // interval_ms
+        filled = CandleBatch(
+            timestamps,
+            *(np.full(len(timestamps), np.nan) for _ in range(4)),
+            np.zeros(len(timestamps)),
+        )
+        for field in CANDLE_FIELDS:
+            getattr(filled, field)[positions] = getattr(candles, field)
+        return filled
+
+
+class BitgetAdapter:
+    """Bitget candle rows: [ts ms, open, high, low, close, volume, ...] strings."""
+
+    @staticmethod
+    def candles(rows):
+        if not len(rows):
+            return CandleBatch(*([[]] * 6))
+        # One parse of the whole block instead of per-column string conversion
+        values = np.array([row[:6] for row in rows], dtype=np.float64)
+        return CandleBatch(values[:, 0].astype(np.int64), *values[:, 1:6].T)
+
+
+class KrakenAdapter:
+    """Kraken REST trade rows, websocket v2 trade messages and trade frames."""
+
+    @staticmethod
+    def rest_trades(rows):
+        """[price, volume, time (s), b/s, m/l, misc, trade_id] rows."""
+        if not len(rows):
+            return TradeBatch(*([[]] * 5))
+        columns = list(zip(*rows))
+        seconds = np.array(columns[2], dtype=np.float64)
+        return TradeBatch(
+            seconds_to_ns(seconds),
+            np.array(columns[0], dtype=np.float64),
+            np.array(columns[1], dtype=np.float64),
+            np.where(np.array(columns[3]) == "b", 1, -1),
+            np.array(columns[6], dtype=np.int64),
+            market=np.array(columns[4]) == "m",
+        )
+
+    @staticmethod
+    def ws_trades(data):
+        """The `data` list of a websocket v2 `trade` message."""
+        timestamps = pd.to_datetime([trade["timestamp"] for trade in data], utc=True)
+        return TradeBatch(
+            timestamps.asi8,  # ns
+            [trade["price"] for trade in data],
+            [trade["qty"] for trade in data],
+            [1 if trade["side"] == "buy" else -1 for trade in data],
+            [trade["trade_id"] for trade in data],
+            market=[trade["ord_type"] == "market" for trade in data],
+        )
+
+    @staticmethod
+    def trades_frame(df):
+        """A frame in the Kraken trade schema (e.g. a stored trade CSV)."""
+        return TradeBatch(
+            seconds_to_ns(df["Timestamp"].to_numpy(dtype=np.float64)),
+            df["Price"].to_numpy(dtype=np.float64),
+            df["Volume"].to_numpy(dtype=np.float64),
+            np.where(df["Buy/Sell"].to_numpy() == "b", 1, -1),
+            df["TradeID"].to_numpy(dtype=np.int64),
+            market=df["Market/Limit"].to_numpy() == "m",
+        )
+
+
+ADAPTERS = {"bitget": BitgetAdapter, "kraken": KrakenAdapter}
+
+
+def as_candle_batch(candles):
+    """`candles` as a CandleBatch: a batch as is, or raw Bitget candle rows."""
+    if isinstance(candles, CandleBatch):
+        return candles
+    return BitgetAdapter.candles(candles)
+
+
+def as_trade_batch(trades):
+    """`trades` as a TradeBatch: a batch as is, or a Kraken trade frame."""
+    if isinstance(trades, TradeBatch):
+        return trades
+    return KrakenAdapter.trades_frame(trades)
+
+
+def seconds_to_ns(seconds):
+    # Kraken times have microsecond precision; rounding there keeps them exact
+    return np.round(seconds * 1e6).astype(np.int64) * 1000
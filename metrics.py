@@ -0,0 +1,67 @@
+from collections import deque
+
+# How many recent samples are kept per observed metric
+SAMPLE_WINDOW = 500
+
+
+class Metrics:
+    """
+    In-process counters, gauges and recent samples, shown by the `!metrics` command.
+    """
+
+    def __init__(self, sample_window=SAMPLE_WINDOW):
+        self.sample_window = sample_window
+        self.counters = {}
+        self.gauges = {}
+        self.samples = {}
+
+    def incr(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, value):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.sample_window)
+        samples.append(value)
+
+    def summary(self, name):
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return None
+
+        return {
+            "count": len(samples),
+            "last": self.samples[name][-1],
+            "p50": samples[len(samples) // 2],
+            "p95": samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+            "max": samples[-1],
+        }
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "samples": {name: self.summary(name) for name in self.samples},
+        }
+
+    def format(self):
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"{name}: {value}")
+        for name in sorted(self.samples):
+            stats = self.summary(name)
+            lines.append(
+                f"{name}: last {stats['last']:.1f} | p50 {stats['p50']:.1f} | "
+                f"p95 {stats['p95']:.1f} | max {stats['max']:.1f} (n={stats['count']})"
+            )
+
+        return "\n".join(lines) if lines else "No metrics recorded yet."
+
+
+# Shared by everything running in the bot process
+metrics = Metrics()
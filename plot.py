@@ -1,8 +1,15 @@
+import io
+import threading
+
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from matplotlib.ticker import FuncFormatter
 import os
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.dates import DateFormatter
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 from matplotlib import style
 
@@ -23,9 +30,14 @@ def setup_plot(df):
 
 
 def plot_candlestick(ax, df):
+    # Widths are in days and sized for 1m candles; scale them for other timeframes
+    scale = 1
+    if len(df) > 1:
+        scale = (df.index[1:] - df.index[:-1]).median() / pd.Timedelta(minutes=1)
+
     candle_config = {
-        "width": 0.0006,
-        "width2": 0.00015,
+        "width": 0.0006 * scale,
+        "width2": 0.00015 * scale,
         "colors": {"up": "green", "down": "red"},
     }
 
@@ -88,8 +100,58 @@ def plot_bollinger_bands(ax, df, labels_colors):
         )
 
 
-def plot_candlestick_with_bollinger(df, save_path=None, save_csv=False):
-    df = df.copy()
+def plot_trade_flow(ax, ax_indicator, df, trade_flow):
+    """Overlay VWAP, buy/sell delta and the volume profile of a TradeFlow."""
+    flow = trade_flow.frame()
+    flow.index = flow.index.tz_convert(df.index.tz)
+    flow = flow[(flow.index >= df.index[0]) & (flow.index <= df.index[-1])]
+
+    ax.plot(flow.index, flow["VWAP"], color="cyan", label="VWAP", linewidth=1)
+
+    ax_delta = ax_indicator.twinx()
+    colors = ["green" if delta >= 0 else "red" for delta in flow["Delta"]]
+    width = trade_flow.candle_seconds / 86400 * 0.8  # in days
+    ax_delta.bar(flow.index, flow["Delta"], width=width, color=colors, alpha=0.3)
+    ax_delta.set_ylabel("Buy - Sell Volume")
+
+    profile = trade_flow.profile
+    if profile.low is not None:
+        ylim = ax.get_ylim()
+        ax_profile = ax.twiny()
+        prices = profile.prices()
+        ax_profile.barh(
+            prices,
+            profile.buy_volume,
+            height=profile.bin_width,
+            color="green",
+            alpha=0.15,
+        )
+        ax_profile.barh(
+            prices,
+            profile.sell_volume,
+            left=profile.buy_volume,
+            height=profile.bin_width,
+            color="red",
+            alpha=0.15,
+        )
+        # Keep the profile in the right quarter of the chart
+        total = (profile.buy_volume + profile.sell_volume).max()
+        ax_profile.set_xlim(total * 4, 0)
+        ax_profile.set_xticks([])
+        ax.axhline(
+            profile.point_of_control(), linestyle=":", linewidth=1, color="white"
+        )
+        ax.set_ylim(ylim)
+
+
+def plot_candlestick_with_bollinger(
+    df, save_path=None, save_csv=False, trade_flow=None, progress=None
+):
+    # `progress(fraction, message)` is called between drawing steps
+    progress = progress or (lambda fraction, message: None)
+    from bitget.utils import indicator_frame
+
+    df = indicator_frame(df).copy()
 
     if save_csv:
         csv_name = f"output/{df['Date'].iloc[0].timestamp()}_{df['Date'].iloc[-1].timestamp()}.csv"
@@ -111,6 +173,7 @@ def plot_candlestick_with_bollinger(df, save_path=None, save_csv=False):
 
     fig, ax, ax_indicator = setup_plot(df)
 
+    progress(0.1, "drawing candles")
     plot_candlestick(ax, df)
 
     bollinger_labels_colors = {
@@ -123,6 +186,10 @@ def plot_candlestick_with_bollinger(df, save_path=None, save_csv=False):
     }
     plot_bollinger_bands(ax, df, bollinger_labels_colors)
 
+    progress(0.4, "drawing indicators")
+    if trade_flow is not None:
+        plot_trade_flow(ax, ax_indicator, df, trade_flow)
+
     plot_indicators(ax_indicator, df)
     plot_common_elements(ax, ax_indicator, df)
 
@@ -132,14 +199,224 @@ def plot_candlestick_with_bollinger(df, save_path=None, save_csv=False):
         plt.show()
         return None
     else:
-        if not os.path.exists("plots"):
+        # `save_path` may also be a file object, e.g. an in-memory buffer
+        if isinstance(save_path, str) and not os.path.exists("plots"):
             os.makedirs("plots")
 
+        progress(0.6, "saving")
         plot_logger.info(f"Saving plot: {save_path}")
-        plt.savefig(save_path)
+        plt.savefig(save_path, format="png")
+        plt.close(fig)
 
         return save_path
 
 
+BOLLINGER_COLORS = {
+    "Bollinger_Upper_2": "red",
+    "Bollinger_Lower_2": "red",
+    "Bollinger_Upper_3": "yellow",
+    "Bollinger_Lower_3": "yellow",
+    "Bollinger_Upper_4": "orange",
+    "Bollinger_Lower_4": "orange",
+}
+INDICATOR_COLORS = {"RSI": "b", "Stochastic": "g"}
+
+MS_PER_DAY = 86_400_000  # Matplotlib dates are days since 1970-01-01
+LIVE_CHART_SIZE = (16, 10)
+# zlib level of the PNG; at the default (6) encoding takes as long as drawing
+LIVE_CHART_COMPRESSION = 1
+
+
+def timestamps_ms(df):
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.asi8 // 1_000_000
+    return df.index.to_numpy(dtype=np.int64)
+
+
+class LiveChart:
+    """
+    A chart that stays open between refreshes. The figure, axes and artists
+    are created once; update() only rewrites the geometry of the candles that
+    changed or were added and hands the band and indicator lines their new
+    arrays, and render() draws the figure again into a PNG.
+
+    The figure is not registered with pyplot, so charts can be rendered from
+    worker threads without plot_lock; each chart has its own lock instead.
+    """
+
+    def __init__(self, symbol="BTCUSDT", timeframe="1m", figsize=LIVE_CHART_SIZE):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.lock = threading.Lock()
+
+        self.timestamps = np.zeros(0, dtype=np.int64)
+        self.ohlc = np.zeros((0, 4))
+        self.bodies = np.zeros((0, 4, 2))
+        self.wicks = np.zeros((0, 2, 2))
+        self.colors = np.zeros(0, dtype=object)
+        self.laid_out = False
+        self.png = None  # Last render, reused until the candles change
+
+        with style.context("dark_background"):
+            self.figure = Figure(figsize=figsize)
+            FigureCanvasAgg(self.figure)
+            gs = GridSpec(3, 1, hspace=0, figure=self.figure)
+            self.ax = self.figure.add_subplot(gs[:2, 0])
+            self.ax_indicator = self.figure.add_subplot(gs[2, 0], sharex=self.ax)
+
+            self.body_collection = PolyCollection([], alpha=0.6)
+            self.wick_collection = LineCollection([], linewidths=1)
+            self.ax.add_collection(self.body_collection)
+            self.ax.add_collection(self.wick_collection)
+
+            self.band_lines = {
+                label: self.ax.plot([], [], color=color, label=label, linewidth=0.3)[0]
+                for label, color in BOLLINGER_COLORS.items()
+            }
+            self.indicator_lines = {
+                name: self.ax_indicator.plot([], [], color=color, label=name)[0]
+                for name, color in INDICATOR_COLORS.items()
+            }
+
+            self.ax_indicator.axhline(80, linestyle="--", linewidth=1, color="grey")
+            self.ax_indicator.axhline(20, linestyle="--", linewidth=1, color="grey")
+            self.ax_indicator.set_title("RSI and Stochastic Indicators")
+            self.ax_indicator.set_ylim([0, 100])
+            self.ax_indicator.legend(loc="upper left")
+
+            self.ax.set_xlabel("Date")
+            self.ax.set_ylabel("Price")
+            self.ax.xaxis.set_major_formatter(
+                DateFormatter("%H:%M", tz="America/Los_Angeles")
+            )
+            self.ax.yaxis.set_major_formatter(FuncFormatter(format_to_dollars))
+            self.ax.legend(loc="upper left")
+
+    def update(self, df):
+        """
+        Show the candles of `df` (with indicator columns).
+        :return: Number of candles whose geometry was rebuilt.
+        """
+        from bitget.utils import indicator_frame
+
+        df = indicator_frame(df).sort_index()
+        timestamps = timestamps_ms(df)
+        ohlc = df[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)
+
+        # Rows already drawn with the same prices keep their geometry
+        positions = np.searchsorted(self.timestamps, timestamps)
+        positions = np.minimum(positions, max(len(self.timestamps) - 1, 0))
+        known = np.zeros(len(timestamps), dtype=bool)
+        if len(self.timestamps):
+            known = (self.timestamps[positions] == timestamps) & (
+                self.ohlc[positions] == ohlc
+            ).all(axis=1)
+
+        bodies = np.empty((len(timestamps), 4, 2))
+        wicks = np.empty((len(timestamps), 2, 2))
+        colors = np.empty(len(timestamps), dtype=object)
+        bodies[known] = self.bodies[positions[known]]
+        wicks[known] = self.wicks[positions[known]]
+        colors[known] = self.colors[positions[known]]
+
+        changed = ~known
+        x = timestamps / MS_PER_DAY
+        width = self.candle_width(timestamps)
+        new_bodies, new_wicks = self.candle_geometry(x[changed], ohlc[changed], width)
+        bodies[changed] = new_bodies
+        wicks[changed] = new_wicks
+        up = ohlc[changed, 3] >= ohlc[changed, 0]
+        colors[changed] = np.where(up, "green", "red")
+
+        if changed.any() or not np.array_equal(timestamps, self.timestamps):
+            self.png = None
+        self.timestamps, self.ohlc = timestamps, ohlc
+        self.bodies, self.wicks, self.colors = bodies, wicks, colors
+
+        self.body_collection.set_verts(bodies)
+        self.body_collection.set_facecolor(colors)
+        self.wick_collection.set_segments(wicks)
+        self.wick_collection.set_color(colors)
+
+        for label, line in self.band_lines.items():
+            line.set_data(x, df[label].to_numpy())
+        for name, line in self.indicator_lines.items():
+            line.set_data(x, df[name].to_numpy())
+
+        if len(x):
+            self.ax.set_xlim(x[0] - width, x[-1] + width)
+            prices = np.concatenate(
+                [ohlc[:, 1], ohlc[:, 2]]
+                + [df[label].to_numpy(dtype=np.float64) for label in BOLLINGER_COLORS]
+            )
+            low, high = np.nanmin(prices), np.nanmax(prices)
+            margin = (high - low) * 0.02 or 1
+            self.ax.set_ylim(low - margin, high + margin)
+
+            title_date = pd.Timestamp(timestamps[0], unit="ms", tz="UTC")
+            title_date = title_date.tz_convert("America/Los_Angeles")
+            self.ax.set_title(
+                f"{title_date.strftime('%B %d')} {self.symbol} {self.timeframe}"
+            )
+        return int(changed.sum())
+
+    @staticmethod
+    def candle_width(timestamps):
+        # 60% of the candle spacing, in days
+        if len(timestamps) < 2:
+            return 0.6 / 1440
+        return float(np.median(np.diff(timestamps))) / MS_PER_DAY * 0.6
+
+    @staticmethod
+    def candle_geometry(x, ohlc, width):
+        """Body rectangles (n, 4, 2) and high-low wick segments (n, 2, 2)."""
+        open_, high, low, close = ohlc.T
+        left, right = x - width / 2, x + width / 2
+        bodies = np.stack(
+            [
+                np.stack([left, open_], axis=-1),
+                np.stack([left, close], axis=-1),
+                np.stack([right, close], axis=-1),
+                np.stack([right, open_], axis=-1),
+            ],
+            axis=1,
+        )
+        wicks = np.stack(
+            [np.stack([x, low], axis=-1), np.stack([x, high], axis=-1)], axis=1
+        )
+        return bodies, wicks
+
+    def render(self, df=None):
+        """Update with `df` if given, and draw the chart into a PNG buffer."""
+        with self.lock:
+            if df is not None:
+                self.update(df)
+
+            if self.png is None:
+                buffer = io.BytesIO()
+                with style.context("dark_background"):
+                    if not self.laid_out:
+                        # The axes keep their place between refreshes
+                        self.figure.tight_layout()
+                        self.laid_out = True
+                    self.figure.canvas.print_png(
+                        buffer, pil_kwargs={"compress_level": LIVE_CHART_COMPRESSION}
+                    )
+                self.png = buffer.getvalue()
+            return io.BytesIO(self.png)
+
+
+live_charts = {}  # (symbol, timeframe) -> LiveChart
+live_charts_lock = threading.Lock()
+
+
+def live_chart(symbol="BTCUSDT", timeframe="1m"):
+    with live_charts_lock:
+        chart = live_charts.get((symbol, timeframe))
+        if chart is None:
+            chart = live_charts[(symbol, timeframe)] = LiveChart(symbol, timeframe)
+        return chart
+
+
 # Example usage:
 # plot_candlestick_with_bollinger(df, save_path="plot.png", save_csv=True)
@@ -0,0 +1,226 @@
+import json
+
+import websockets
+from aiohttp import web
+
+CANDLE_INTERVAL_MS = 60_000
+
+
+def make_candles(start, count, price=27000.0):
+    """Raw Bitget candle rows: [ts, open, high, low, close, volume]."""
+    candles = []
+    for i in range(count):
+        close = price + (i % 7) - 3 + i * 0.5
+        candles.append(
+            [
+                str(start + i * CANDLE_INTERVAL_MS),
+                str(close - 1),
+                str(close + 2),
+                str(close - 2),
+                str(close),
+                str(1 + i % 3),
+            ]
+        )
+    return candles
+
+
+class MockBitGetServer:
+    """
+    Local stand-in for the Bitget REST API, serving a fixed candle history.
+    """
+
+    def __init__(self, candles=None):
+        self.candles = candles or []
+        self.requests = []
+        self.runner = None
+        self.base_url = None
+
+    async def get_candles(self, request):
+        self.requests.append(dict(request.query))
+
+        start = int(request.query["startTime"])
+        end = int(request.query["endTime"])
+        limit = int(request.query.get("limit", 100))
+
+        rows = [
+            candle + ["0"]  # quote volume, as returned by the real endpoint
+            for candle in self.candles
+            if start <= int(candle[0]) <= end
+        ]
+        return web.json_response(rows[:limit])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/mix/v1/market/candles", self.get_candles)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class MockBitGetStream:
+    """
+    Local stand-in for the Bitget websocket. Each connection receives the next
+    snapshot from `snapshots` and is then closed by the server.
+    """
+
+    def __init__(self, snapshots):
+        self.snapshots = list(snapshots)
+        self.connections = 0
+        self.server = None
+        self.uri = None
+
+    async def handler(self, ws, path=None):
+        self.connections += 1
+        await ws.recv()  # subscribe request
+        await ws.send(json.dumps({"event": "subscribed"}))
+
+        if self.snapshots:
+            snapshot = self.snapshots.pop(0)
+            await ws.send(json.dumps({"action": "snapshot", "data": snapshot}))
+
+        await ws.close()
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.uri = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class MockBitGetExchange:
+    """
+    Local stand-in for Bitget's signed mix order endpoints. Checks every
+    request's ACCESS-SIGN, acknowledges orders with sequential IDs and records
+    the client connections they arrived on.
+    """
+
+    def __init__(self, api_key="key", secret_key="secret", passphrase="pass"):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+        self.orders = {}  # orderId -> order body, with "state"
+        self.plans = {}
+        self.positions = {}  # symbol -> open long size
+        self.reject = set()  # planType/side values to reject
+        self.reject_times = {}  # planType/side -> rejections left
+        self.connections = set()
+        self.runner = None
+        self.base_url = None
+
+    def error(self, code, msg, status=400):
+        return web.json_response({"code": code, "msg": msg}, status=status)
+
+    def ok(self, data):
+        return web.json_response({"code": "00000", "msg": "success", "data": data})
+
+    def rejects(self, kind):
+        if self.reject_times.get(kind):
+            self.reject_times[kind] -= 1
+            return True
+        return kind in self.reject
+
+    def check_signature(self, request, body):
+        from bitget.order_client import sign
+
+        path = request.path_qs
+        content = f"{request.headers['ACCESS-TIMESTAMP']}{request.method}{path}{body}"
+        return (
+            request.headers.get("ACCESS-KEY") == self.api_key
+            and request.headers.get("ACCESS-PASSPHRASE") == self.passphrase
+            and request.headers.get("ACCESS-SIGN") == sign(self.secret_key, content)
+        )
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        if request.path.startswith("/api/mix/v1/market/"):
+            return await handler(request)
+
+        body = await request.text()
+        if not self.check_signature(request, body):
+            return self.error("40009", "sign signature error", status=401)
+        return await handler(request)
+
+    async def server_time(self, request):
+        return self.ok("1695772800000")
+
+    async def contracts(self, request):
+        return self.ok(
+            [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "1", "priceEndStep": "5"}]
+        )
+
+    async def place_order(self, request):
+        body = await request.json()
+        if self.rejects(body["side"]):
+            return self.error("40762", "The order amount exceeds the balance")
+
+        order_id = str(len(self.orders) + len(self.plans) + 1)
+        self.orders[order_id] = {**body, "state": "new"}
+        sign = -1 if body["side"] == "close_long" else 1
+        position = self.positions.get(body["symbol"], 0.0)
+        self.positions[body["symbol"]] = position + sign * float(body["size"])
+        return self.ok({"clientOid": body["clientOid"], "orderId": order_id})
+
+    async def place_tpsl(self, request):
+        body = await request.json()
+        if self.rejects(body["planType"]):
+            return self.error("40808", "Parameter verification exception")
+
+        order_id = str(len(self.orders) + len(self.plans) + 1)
+        self.plans[order_id] = body
+        return self.ok({"clientOid": body["clientOid"], "orderId": order_id})
+
+    async def order_detail(self, request):
+        order = self.orders.get(request.query["orderId"])
+        if order is None:
+            return self.error("40768", "Order does not exist")
+        return self.ok({"orderId": request.query["orderId"], "state": order["state"]})
+
+    async def cancel_order(self, request):
+        body = await request.json()
+        order = self.orders.get(body["orderId"])
+        if order is None:
+            return self.error("40768", "Order does not exist")
+        order["state"] = "canceled"
+        return self.ok({"orderId": body["orderId"]})
+
+    async def cancel_plan(self, request):
+        body = await request.json()
+        if self.plans.pop(body["orderId"], None) is None:
+            return self.error("40768", "Order does not exist")
+        return self.ok({"orderId": body["orderId"]})
+
+    async def start(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/api/mix/v1/market/time", self.server_time)
+        app.router.add_get("/api/mix/v1/market/contracts", self.contracts)
+        app.router.add_post("/api/mix/v1/order/placeOrder", self.place_order)
+        app.router.add_post("/api/mix/v1/plan/placeTPSL", self.place_tpsl)
+        app.router.add_get("/api/mix/v1/order/detail", self.order_detail)
+        app.router.add_post("/api/mix/v1/order/cancel-order", self.cancel_order)
+        app.router.add_post("/api/mix/v1/plan/cancelPlan", self.cancel_plan)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
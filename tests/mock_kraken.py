@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timezone
+
+import websockets
+from aiohttp import web
+
+START = 1695772800.0
+
+
+def make_trades(count, start=START):
+    """Kraken trades with consecutive IDs 1..count, two per second."""
+    return [
+        {
+            "price": 27000.0 + (i % 13) - 6,
+            "qty": 0.01 * (1 + i % 5),
+            "time": start + i * 0.5,
+            "side": "buy" if i % 3 else "sell",
+            "ord_type": "market" if i % 2 else "limit",
+            "trade_id": i,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def ws_trade(trade):
+    timestamp = datetime.fromtimestamp(trade["time"], timezone.utc)
+    return {
+        "symbol": "BTC/USD",
+        "side": trade["side"],
+        "price": trade["price"],
+        "qty": trade["qty"],
+        "ord_type": trade["ord_type"],
+        "trade_id": trade["trade_id"],
+        "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+    }
+
+
+def rest_trade(trade):
+    return [
+        f"{trade['price']:.1f}",
+        f"{trade['qty']:.8f}",
+        trade["time"],
+        trade["side"][0],
+        trade["ord_type"][0],
+        "",
+        trade["trade_id"],
+    ]
+
+
+class MockKraken:
+    """
+    Local stand-in for Kraken's v2 trade websocket and REST `Trades`
+    endpoint. Connection n sends the trade messages in `sessions[n]` (lists
+    of trade IDs); every connection but the last is then closed by the server.
+    """
+
+    def __init__(self, trades, sessions, page_size=1000):
+        self.trades = {trade["trade_id"]: trade for trade in trades}
+        self.sessions = list(sessions)
+        self.page_size = page_size
+        self.connections = 0
+        self.subscriptions = []
+        self.rest_requests = []
+        self.server = None
+        self.runner = None
+        self.uri = None
+        self.rest_url = None
+
+    async def handler(self, ws, path=None):
+        self.connections += 1
+        self.subscriptions.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"method": "subscribe", "success": True}))
+        await ws.send(json.dumps({"channel": "heartbeat"}))
+
+        messages = self.sessions.pop(0) if self.sessions else []
+        for i, ids in enumerate(messages):
+            message = {
+                "channel": "trade",
+                "type": "snapshot" if i == 0 else "update",
+                "data": [ws_trade(self.trades[trade_id]) for trade_id in ids],
+            }
+            await ws.send(json.dumps(message))
+
+        if self.sessions:
+            await ws.close()
+        else:
+            await ws.wait_closed()
+
+    async def get_trades(self, request):
+        since = float(request.query["since"])
+        self.rest_requests.append(since)
+        if since > 1e12:  # The nanosecond cursor of a previous page
+            rows = [t for t in self.trades.values() if t["time"] * 1e9 > since]
+        else:
+            rows = [t for t in self.trades.values() if t["time"] >= since]
+
+        rows = rows[: self.page_size]
+        last = int(rows[-1]["time"] * 1e9) if rows else int(since)
+        return web.json_response(
+            {
+                "error": [],
+                "result": {
+                    "XXBTZUSD": [rest_trade(trade) for trade in rows],
+                    "last": str(last),
+                },
+            }
+        )
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.uri = f"ws://127.0.0.1:{port}"
+
+        app = web.Application()
+        app.router.add_get("/0/public/Trades", self.get_trades)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.rest_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.runner.cleanup()
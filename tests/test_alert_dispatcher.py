@@ -0,0 +1,116 @@
+import asyncio
+from collections import defaultdict
+import pytest
+from unittest.mock import MagicMock
+from discord import HTTPException
+
+from alert_dispatcher import AlertDispatcher
+from bitget.trader import Trader
+
+
+class FakeChannel:
+    def __init__(self, rate_limited=0):
+        self.embeds = []
+        self.rate_limited = rate_limited
+
+    async def send(self, embed=None):
+        if self.rate_limited:
+            self.rate_limited -= 1
+            response = MagicMock(status=429, headers={"Retry-After": "0.05"})
+            raise HTTPException(response, "rate limited")
+        self.embeds.append(embed)
+
+
+class FakeBot:
+    def __init__(self, channels):
+        self.channels = channels
+        self.lookups = 0
+
+    def get_channel(self, channel_id):
+        self.lookups += 1
+        return self.channels.get(channel_id)
+
+
+@pytest.mark.asyncio
+async def test_alerts_in_one_window_share_an_embed_per_channel():
+    entries, errors = FakeChannel(), FakeChannel()
+    bot = FakeBot({1: entries, 2: errors})
+    dispatcher = AlertDispatcher(bot, routes={"entry": 1, "error": 2}, window=0.05)
+    task = dispatcher.start()
+
+    dispatcher.submit("first")
+    dispatcher.submit("second")
+    dispatcher.submit("boom", route="error")
+    await asyncio.sleep(0.15)
+    dispatcher.submit("third")
+    await asyncio.sleep(0.15)
+    task.cancel()
+
+    assert [len(embed.fields) for embed in entries.embeds] == [2, 1]
+    assert [len(embed.fields) for embed in errors.embeds] == [1]
+    assert bot.lookups == 2  # channels are resolved once
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_send_is_retried():
+    channel = FakeChannel(rate_limited=1)
+    dispatcher = AlertDispatcher(FakeBot({1: channel}), routes={"entry": 1})
+
+    embed = dispatcher.build_embeds([("title", "message")])[0]
+    assert await dispatcher.send(1, embed)
+    assert channel.embeds == [embed]
+
+
+def test_full_queue_drops_oldest():
+    dispatcher = AlertDispatcher(FakeBot({}), routes={}, maxsize=2)
+    for message in ["a", "b", "c"]:
+        dispatcher.submit(message)
+
+    assert dispatcher.dropped == 1
+    assert dispatcher.queue.get_nowait()[2] == "b"
+
+
+class BrokenChannel(FakeChannel):
+    """Fails the first send with an error that is not an HTTPException."""
+
+    failed = False
+
+    async def send(self, embed=None):
+        if not self.failed:
+            self.failed = True
+            raise TypeError("unexpected payload")
+        self.embeds.append(embed)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_survives_unexpected_errors():
+    channel = BrokenChannel()
+    dispatcher = AlertDispatcher(
+        FakeBot({1: channel}), routes={"entry": 1}, window=0.02
+    )
+    task = dispatcher.start()
+
+    dispatcher.submit("lost")
+    await asyncio.sleep(0.1)
+    dispatcher.submit("delivered")
+    await asyncio.sleep(0.1)
+
+    assert not task.done()
+    task.cancel()
+    assert [embed.fields[0].value for embed in channel.embeds] == ["```delivered```"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_async", [False, True])
+async def test_trader_sends_alerts_through_sync_and_async_callbacks(use_async):
+    alerts = []
+
+    async def async_alert(message):
+        alerts.append(message)
+
+    trader = Trader(entry_point_callback=async_alert if use_async else alerts.append)
+    trader.curr_trigger_stats = defaultdict(float)
+    await trader.place_order(defaultdict(float))
+
+    assert len(alerts) == 1
+    assert "Evaluating Entry Conditions" in alerts[0]
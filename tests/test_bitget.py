@@ -2,6 +2,7 @@ import asyncio
 import pytest
 import json
 from unittest.mock import AsyncMock, patch, call
+from websockets.exceptions import ConnectionClosedOK
 from bitget.bitget import BitGet
 
 
@@ -26,3 +27,19 @@ async def test_ping_pong():
 
         # Check if two or three 'pong' messages were received
         assert 1 <= mock_ws.recv.await_count <= 3
+
+
+@pytest.mark.asyncio
+async def test_data_without_a_channel_is_not_a_book_update():
+    bitget = BitGet()  # No book channel, so no order book
+    ws = AsyncMock()
+    ws.recv.side_effect = [
+        json.dumps({"data": [{"asks": [], "bids": []}]}),
+        "pong",
+        ConnectionClosedOK(None, None),
+    ]
+
+    # The message is skipped, not fed to a missing book, until the socket closes
+    with pytest.raises(ConnectionClosedOK):
+        await bitget.listen(ws)
+    assert ws.recv.await_count == 3
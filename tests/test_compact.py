@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitget.compact import FRAME_COLUMNS, CompactCandles
+from bitget.utils import convert_to_dataframe
+from tests.test_strategy import random_walk_candles
+
+EPS = 2.0**-24
+
+
+@pytest.fixture(scope="module")
+def df():
+    candles = random_walk_candles(n=2000, seed=3)
+    for candle in candles:
+        candle[1:5] = [round(price, 1) for price in candle[1:5]]
+    return convert_to_dataframe(candles)
+
+
+def test_decoded_frame_within_documented_bounds(df):
+    compact = CompactCandles.from_frame(df)
+    decoded = compact.to_frame()
+
+    assert list(decoded.columns) == FRAME_COLUMNS
+    assert list(decoded.index) == list(df.index)
+    pd.testing.assert_series_equal(decoded["Timestamp"], df["Timestamp"])
+
+    def within(name, bound):
+        valid = df[name].notna()
+        assert decoded[name].notna().equals(valid), name
+        error = np.abs(decoded[name] - df[name])
+        assert (error[valid] <= bound[valid]).all(), name
+
+    for name in ["Open", "High", "Low", "Close", "Volume", "SMA", "Rolling_STD"]:
+        within(name, np.abs(df[name]) * EPS)
+
+    for name in ["RSI", "Stochastic"]:
+        within(name, pd.Series(100 * EPS, index=df.index))
+
+    for k in (2, 3, 4):
+        bound = (np.abs(df["SMA"]) + k * df["Rolling_STD"]) * EPS * 1.01
+        within(f"Bollinger_Lower_{k}", bound)
+        within(f"Bollinger_Upper_{k}", bound)
+
+    assert df.memory_usage(deep=True).sum() / compact.nbytes > 3
+
+
+def test_fixed_point_prices_are_exact(df, tmp_path):
+    compact = CompactCandles.from_frame(df, price_decimals=1)
+    assert compact.prices.dtype == np.int32
+    np.testing.assert_array_equal(compact.column("Close"), df["Close"])
+
+    path = tmp_path / "candles.csv"
+    compact.to_csv(path)
+    restored = CompactCandles.read_csv(path, price_decimals=1)
+
+    np.testing.assert_array_equal(restored.prices, compact.prices)
+    np.testing.assert_array_equal(restored.floats, compact.floats)
+    np.testing.assert_array_equal(restored.timestamps, compact.timestamps)
+
+
+def test_float32_csv_round_trip(df, tmp_path):
+    compact = CompactCandles.from_frame(df)
+    path = tmp_path / "candles.csv"
+    compact.to_csv(path)
+    restored = CompactCandles.read_csv(path)
+
+    np.testing.assert_array_equal(restored.prices, compact.prices)
+    np.testing.assert_array_equal(restored.floats, compact.floats)
+    pd.testing.assert_frame_equal(restored.to_frame(10, 20), compact.to_frame(10, 20))
+
+
+def test_compact_store_keeps_the_hot_tail_exact():
+    from bitget.candle_store import HOT_ROWS, CandleStore
+
+    candles = random_walk_candles(n=1500, seed=4)
+    full = CandleStore(max_size=1000)
+    compact = CandleStore(max_size=1000, compact=True, price_decimals=1)
+    for store in (full, compact):
+        store.upsert(candles[:1200])
+        for candle in candles[1200:]:
+            store.upsert([candle])
+
+    assert len(compact) == len(full) == 1000
+    assert len(compact.recent) < 2 * HOT_ROWS
+    pd.testing.assert_frame_equal(compact.tail(HOT_ROWS), full.tail(HOT_ROWS))
+
+    # Older rows are decoded within the fixed-point bounds
+    decoded = compact.df
+    assert list(decoded.index) == list(full.df.index)
+    assert np.allclose(decoded["Close"], full.df["Close"], atol=0.05)
+
+    full_bytes = full.df.memory_usage(index=True).sum()
+    compact_bytes = compact.history.nbytes + compact.recent.memory_usage().sum()
+    assert compact_bytes < full_bytes / 2
+
+
+def test_compact_store_merges_into_compacted_rows():
+    from bitget.candle_store import CandleStore
+
+    candles = random_walk_candles(n=400, seed=5)
+    full = CandleStore()
+    compact = CandleStore(compact=True)
+    for store in (full, compact):
+        store.upsert(candles)
+        store.upsert([candles[100][:4] + [candles[100][4] + 10] + candles[100][5:]])
+
+    assert compact.history
+    assert np.allclose(compact.df["Close"], full.df["Close"], rtol=EPS)
+    assert np.allclose(compact.df["SMA"], full.df["SMA"], rtol=1e-6, equal_nan=True)
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitget.utils import calc_bollinger_bands, calc_RSI, calc_stochastic
+from bot.day_store import DayStore, DayStoreWriter, trades_to_candles
+from market_data import KrakenAdapter
+
+START = 1695772800
+INDICATOR_COLUMNS = ["SMA", "Rolling_STD", "Bollinger_Lower_2", "RSI", "Stochastic"]
+
+
+def make_trades(count, seed=0):
+    rng = np.random.default_rng(seed)
+    # Quiet stretches leave some 5m buckets without trades
+    gaps = rng.exponential(20, count) * rng.choice([1, 30], count, p=[0.98, 0.02])
+    return pd.DataFrame(
+        {
+            "Price": 27000 + np.cumsum(rng.normal(0, 3, count)),
+            "Volume": rng.uniform(0.001, 0.5, count),
+            "Timestamp": (START + np.cumsum(gaps)).astype("int64"),
+            "Buy/Sell": "b",
+            "Market/Limit": "m",
+            "Misc": "",
+            "TradeID": np.arange(1000, 1000 + count),
+        }
+    )
+
+
+def full_day(trades):
+    candles = trades_to_candles(trades, "5min").bfill().reset_index(drop=True)
+    candles = calc_bollinger_bands(candles)
+    candles = calc_RSI(candles)
+    return calc_stochastic(candles)
+
+
+def test_pages_append_to_the_same_day(tmp_path):
+    trades = make_trades(3000)
+    store = DayStore("2023-09-27", directory=tmp_path).load()
+
+    # Overlapping pages, like Kraken's inclusive `since`
+    for start in range(0, len(trades), 400):
+        assert store.append(trades.iloc[max(start - 25, 0) : start + 400]) > 0
+    assert store.append(trades.iloc[-100:]) == 0
+
+    expected = full_day(trades)
+    stored = pd.read_csv(tmp_path / "2023-09-27.csv")
+
+    assert list(stored["Timestamp"]) == list(expected["Timestamp"])
+    for column in ["Open", "High", "Low", "Close", "Volume_sum"] + INDICATOR_COLUMNS:
+        np.testing.assert_allclose(stored[column], expected[column], rtol=1e-9)
+
+    assert store.manifest["last_trade_id"] == trades["TradeID"].iloc[-1]
+    assert store.manifest["candles"] == len(expected)
+
+
+def test_resume_after_interrupted_append(tmp_path):
+    trades = make_trades(1500, seed=1)
+    store = DayStore("2023-09-27", directory=tmp_path).load()
+    store.append(trades.iloc[:900])
+
+    # A crash after writing rows but before the manifest was saved
+    with open(store.csv_path, "a") as f:
+        f.write("1695800000,1,1,1,1,1\n")
+
+    resumed = DayStore("2023-09-27", directory=tmp_path).load()
+    assert not resumed.complete
+    assert resumed.last_timestamp == trades["Timestamp"].iloc[899]
+    resumed.append(trades.iloc[850:])
+    resumed.mark_complete()
+
+    stored = pd.read_csv(tmp_path / "2023-09-27.csv")
+    expected = full_day(trades)
+    np.testing.assert_allclose(stored["Close"], expected["Close"])
+    np.testing.assert_allclose(stored["RSI"], expected["RSI"], rtol=1e-9)
+    assert DayStore("2023-09-27", directory=tmp_path).load().complete
+
+
+@pytest.mark.parametrize("rows_written", [0, 1])
+def test_resume_after_crash_while_rewriting_the_tail(
+    tmp_path, monkeypatch, rows_written
+):
+    trades = make_trades(1500, seed=2)
+    store = DayStore("2023-09-27", directory=tmp_path).load()
+    store.append(trades.iloc[:600])
+    store.append(trades.iloc[600:900])
+    before = pd.read_csv(store.csv_path)
+
+    # Crash after the tail was truncated, before (0) or while (1) writing the
+    # new rows
+    to_csv = pd.DataFrame.to_csv
+    calls = []
+
+    def crash(self, *args, **kwargs):
+        calls.append(None)
+        if len(calls) > rows_written:
+            raise KeyboardInterrupt
+        return to_csv(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.append(trades.iloc[900:])
+    monkeypatch.setattr(pd.DataFrame, "to_csv", to_csv)
+
+    resumed = DayStore("2023-09-27", directory=tmp_path).load()
+    pd.testing.assert_frame_equal(resumed.ohlc, before)
+    assert resumed.last_timestamp == trades["Timestamp"].iloc[899]
+
+    resumed.append(trades.iloc[850:])
+    stored = pd.read_csv(tmp_path / "2023-09-27.csv")
+    expected = full_day(trades)
+    assert list(stored["Timestamp"]) == list(expected["Timestamp"])
+    np.testing.assert_allclose(stored["Close"], expected["Close"])
+    np.testing.assert_allclose(stored["RSI"], expected["RSI"], rtol=1e-9)
+    assert not os.path.exists(resumed.tail_path)
+
+
+def crash_before_the_manifest(directory, trades):
+    """Append `trades` to the day in `directory`, crashing before the manifest."""
+    store = DayStore("2023-09-27", directory=directory).load()
+
+    def crash():
+        raise KeyboardInterrupt
+
+    store.save_manifest = crash
+    with pytest.raises(KeyboardInterrupt):
+        store.append(trades)
+
+
+def test_resume_after_crash_leaving_a_tail_of_the_same_size(tmp_path):
+    trades = make_trades(600, seed=4)
+    day = tmp_path / "day"
+    day.mkdir()
+    DayStore("2023-09-27", directory=day).load().append(trades)
+    before = pd.read_csv(day / "2023-09-27.csv")
+    size = os.path.getsize(day / "2023-09-27.csv")
+
+    # A trade at the last close only changes the last candle's volume; find one
+    # whose rewritten tail is as long as the committed one
+    last = before.iloc[-1]
+    for i, volume in enumerate(np.random.default_rng(4).uniform(0.001, 0.5, 200)):
+        trade = trades.iloc[-1:].assign(
+            Price=last["Close"], Volume=volume, TradeID=trades["TradeID"].iloc[-1] + 1
+        )
+        attempt = tmp_path / f"attempt{i}"
+        shutil.copytree(day, attempt)
+        crash_before_the_manifest(attempt, trade)
+        if os.path.getsize(attempt / "2023-09-27.csv") == size:
+            break
+    else:
+        pytest.fail("No volume leaves the file the same size")
+
+    resumed = DayStore("2023-09-27", directory=attempt).load()
+    pd.testing.assert_frame_equal(resumed.ohlc, before)
+
+    # The trade is counted once
+    assert resumed.append(trade) == 1
+    stored = pd.read_csv(attempt / "2023-09-27.csv")
+    assert stored["Volume_sum"].iloc[-1] == pytest.approx(last["Volume_sum"] + volume)
+
+
+@pytest.mark.asyncio
+async def test_writer_appends_batches_off_the_event_loop(tmp_path):
+    trades = make_trades(3000, seed=3)
+    store = DayStore("2023-09-27", directory=tmp_path).load()
+    threads = set()
+    append = store.append
+
+    def spy(batch):
+        threads.add(threading.get_ident())
+        return append(batch)
+
+    store.append = spy
+    writer = DayStoreWriter(store, interval=0.01, max_trades=1000)
+    task = asyncio.create_task(writer.run())
+
+    # Websocket-sized messages, with overlaps like a REST catch-up
+    for start in range(0, len(trades), 10):
+        page = trades.iloc[max(start - 3, 0) : start + 10]
+        writer.add(KrakenAdapter.trades_frame(page))
+        if start % 500 == 0:
+            await asyncio.sleep(0.02)
+    await writer.close()
+    await task
+
+    assert threading.get_ident() not in threads
+    assert 1 < writer.flushes < 30
+    stored = pd.read_csv(store.csv_path)
+    expected = full_day(trades)
+    assert list(stored["Timestamp"]) == list(expected["Timestamp"])
+    np.testing.assert_allclose(stored["RSI"], expected["RSI"], rtol=1e-9)
@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitget.utils import convert_to_dataframe
+from bot.day_store import DayStore
+from export import (
+    EXPORT_COLUMNS,
+    export_chunks,
+    frame_chunks,
+    history_chunks,
+    parse_range,
+)
+from tests.test_day_store import make_trades
+from tests.test_strategy import START, random_walk_candles
+
+MINUTE = 60_000
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return convert_to_dataframe(random_walk_candles(n=3000))
+
+
+@pytest.fixture
+def history_store(tmp_path):
+    """A day of Kraken trades appended in batches, as the data bot does."""
+    trades = make_trades(4000)
+    store = DayStore("2023-09-27", directory=str(tmp_path))
+    for batch in np.array_split(trades, 4):
+        store.append(batch)
+    (tmp_path / "notes.txt").write_text("not a day file")
+    return store, str(tmp_path)
+
+
+def read_parts(paths):
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+
+def test_parse_range():
+    now = START + 100 * MINUTE
+    assert parse_range("90min", now) == (START + 10 * MINUTE, now + 1)
+    assert parse_range("2023-09-27", now) == (
+        pd.Timestamp("2023-09-27", tz="UTC").value // 1_000_000,
+        pd.Timestamp("2023-09-28", tz="UTC").value // 1_000_000,
+    )
+    start, end = parse_range("2023-09-26..2023-09-28", now)
+    assert end - start == 3 * 86_400_000
+    with pytest.raises(ValueError):
+        parse_range("soon", now)
+
+
+def test_history_exports_match_the_day_store(tmp_path, history_store):
+    store, directory = history_store
+    stored = store.ohlc
+    timestamps = stored["Timestamp"].to_numpy(np.int64) * 1000
+    start, end = int(timestamps[10]), int(timestamps[-10])
+    chunks = history_chunks(directory, start, end, chunk_rows=50)
+    paths = export_chunks(chunks, str(tmp_path / "btc"))
+
+    exported = read_parts(paths)
+    expected = stored[(timestamps >= start) & (timestamps < end)]
+    assert list(exported.columns) == EXPORT_COLUMNS
+    assert exported["UnixTimestamp"].tolist() == (expected["Timestamp"] * 1000).tolist()
+    # 5-minute candles, not the 1m of the live frame
+    assert set(np.diff(exported["UnixTimestamp"])) == {300_000}
+    np.testing.assert_allclose(exported["Close"], expected["Close"])
+    np.testing.assert_allclose(exported["Volume"], expected["Volume_sum"])
+    np.testing.assert_allclose(exported["RSI"], expected["RSI"])
+
+
+def test_history_days_without_rows_in_the_range_are_skipped(tmp_path, history_store):
+    store, directory = history_store
+    last = int(store.ohlc["Timestamp"].iloc[-1])
+    next_day = make_trades(1000, seed=1)
+    next_day["Timestamp"] += last + 7200 - next_day["Timestamp"].min()
+    DayStore("2023-09-28", directory=directory).append(next_day)
+
+    # The range starts an hour after the first day's last candle, so that day
+    # is looked up but contributes nothing
+    start = (last + 3600) * 1000
+    end = start + 2 * 86_400_000
+    reported = []
+    paths = export_chunks(
+        history_chunks(directory, start, end),
+        str(tmp_path / "btc"),
+        report=lambda rows, last: reported.append(rows),
+    )
+
+    exported = read_parts(paths)
+    assert exported["UnixTimestamp"].iloc[0] >= start
+    assert (
+        exported["UnixTimestamp"].iloc[0] // 1000 >= next_day["Timestamp"].min() - 300
+    )
+    assert reported[-1] == len(exported)
+
+    # Nothing in the range: no parts at all, not one with only a header
+    paths = export_chunks(
+        history_chunks(directory, end, end + 86_400_000),
+        str(tmp_path / "empty"),
+        report=lambda rows, last: reported.append(rows),
+    )
+    assert paths == []
+    assert not list(tmp_path.glob("empty*"))
+
+
+def test_live_exports_match_the_frame(tmp_path, frame):
+    start, end = START + 100 * MINUTE, START + 2900 * MINUTE
+    paths = export_chunks(
+        frame_chunks(frame, start, end, chunk_rows=300), str(tmp_path / "btc")
+    )
+
+    assert paths == [str(tmp_path / "btc.part1.csv.gz")]
+    exported = read_parts(paths)
+    expected = frame.iloc[100:2900]
+    assert list(exported.columns) == EXPORT_COLUMNS
+    assert exported["UnixTimestamp"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(exported["Close"], expected["Close"])
+    np.testing.assert_allclose(exported["RSI"], expected["RSI"])
+
+
+def test_exports_over_the_limit_are_split(tmp_path, frame):
+    limit = 40_000
+    reported = []
+    paths = export_chunks(
+        frame_chunks(frame, 0, np.iinfo(np.int64).max, chunk_rows=100),
+        str(tmp_path / "btc"),
+        limit=limit,
+        report=lambda rows, last: reported.append(rows),
+    )
+
+    assert len(paths) > 2
+    assert all(os.path.getsize(path) <= limit for path in paths)
+    # Every part is a whole file with its own header
+    assert read_parts(paths)["UnixTimestamp"].tolist() == frame.index.tolist()
+    assert reported[-1] == len(frame)
+
+
+def test_failed_exports_leave_no_parts(tmp_path, frame):
+    def failing():
+        yield from frame_chunks(frame, 0, np.iinfo(np.int64).max, chunk_rows=100)
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        export_chunks(failing(), str(tmp_path / "btc"), limit=40_000)
+    assert os.listdir(tmp_path) == []
+
+
+def test_parquet_parts(tmp_path, frame):
+    pytest.importorskip("pyarrow")
+    paths = export_chunks(
+        frame_chunks(frame, 0, np.iinfo(np.int64).max, chunk_rows=500),
+        str(tmp_path / "btc"),
+        fmt="parquet",
+    )
+    exported = pd.concat([pd.read_parquet(path) for path in paths])
+    assert exported["UnixTimestamp"].tolist() == frame.index.tolist()
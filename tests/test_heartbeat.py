@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from bitget.heartbeat import Heartbeat
+from metrics import Metrics
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_pong_records_round_trip_time():
+    clock = FakeClock()
+    metrics = Metrics()
+    heartbeat = Heartbeat(None, interval=10, metrics=metrics, clock=clock)
+
+    heartbeat.ping_sent_at = clock.now
+    clock.now = 0.25
+    heartbeat.on_message("pong")
+
+    assert metrics.summary("bitget.rtt_ms")["last"] == pytest.approx(250)
+
+    # Pongs keep the connection alive but are not feed data
+    clock.now = 31
+    heartbeat.on_message("pong")
+    assert heartbeat.is_stalled()
+
+    heartbeat.on_message('{"action": "update"}')
+    assert not heartbeat.is_stalled()
+
+
+@pytest.mark.asyncio
+async def test_silent_feed_triggers_stall():
+    metrics = Metrics()
+    pings, stalls = [], []
+
+    async def send_ping():
+        pings.append(1)
+
+    async def on_stall():
+        stalls.append(1)
+
+    heartbeat = Heartbeat(
+        send_ping, interval=0.01, stall_intervals=3, on_stall=on_stall, metrics=metrics
+    )
+    task = asyncio.create_task(heartbeat.run())
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert len(pings) >= 3
+    assert stalls
+    assert metrics.counters["bitget.stalls"] == len(stalls)
+    assert metrics.counters["bitget.missed_pongs"] >= 1
@@ -0,0 +1,89 @@
+import numpy as np
+
+import bitget.candle_store
+from bitget.candle_store import CandleStore
+from bitget.utils import calc_indicators, candles_to_frame
+from tests.test_strategy import random_walk_candles
+
+PARAMS = {"window_size": 10, "rsi_window": 7, "stochastic_window": 5}
+COLUMNS = ["SMA", "Rolling_STD", "Bollinger_Upper_3", "RSI", "Stochastic"]
+
+
+def expected_indicators(store):
+    raw = store.df[["Open", "High", "Low", "Close", "Volume", "Timestamp"]].copy()
+    return calc_indicators(raw, 10, 7, 5)
+
+
+def test_variants_are_memoized_and_caught_up(monkeypatch):
+    computed = []
+
+    def spy(df, *params):
+        computed.append((len(df), params))
+        return calc_indicators(df, *params)
+
+    monkeypatch.setattr(bitget.candle_store, "calc_indicators", spy)
+
+    candles = random_walk_candles(n=350, seed=5)
+    store = CandleStore(max_size=300)
+    store.upsert(candles[:250])
+
+    first = store.indicators(**PARAMS)
+    assert store.indicators(**PARAMS) is first
+    assert store.indicators() is store.df
+
+    for candle in candles[250:]:
+        store.upsert([candle])
+        revised = list(candle)
+        revised[4] += 3.0  # the forming candle moves
+        store.upsert([revised])
+
+    computed.clear()
+    variant = store.indicators(**PARAMS)
+
+    # Only the 100 new candles plus the warm-up are recomputed
+    assert computed == [(100 + 10, (10, 7, 5))]
+    assert list(variant.index) == list(store.df.index)
+
+    expected = expected_indicators(store)
+    # Rows trimmed off the front of the store change the first windows
+    for column in COLUMNS:
+        np.testing.assert_allclose(
+            variant[column].to_numpy()[20:], expected[column].to_numpy()[20:]
+        )
+
+
+def test_out_of_order_upsert_recomputes_from_the_change():
+    candles = random_walk_candles(n=200, seed=9)
+    store = CandleStore()
+    store.upsert(candles)
+    store.indicators(**PARAMS)
+
+    revised = list(candles[120])
+    revised[3] -= 50.0
+    store.upsert([revised])
+
+    variant = store.indicators(**PARAMS)
+    expected = calc_indicators(
+        candles_to_frame(candles[:120] + [revised] + candles[121:]), 10, 7, 5
+    )
+    for column in COLUMNS:
+        np.testing.assert_allclose(variant[column], expected[column], rtol=1e-9)
+
+
+def test_query_cache_is_bounded(monkeypatch):
+    import bitget.trader
+    from bitget.trader import Trader
+
+    monkeypatch.setattr(bitget.trader, "QUERY_CACHE_SIZE", 3)
+    trader = Trader()
+    trader.candles.upsert(random_walk_candles(n=300, seed=6))
+
+    first = trader.get_data_last_n_hours(1)
+    for hours in range(2, 5):
+        trader.get_data_last_n_hours(hours)
+        trader.get_data_last_n_hours(1)  # Kept as the most recently used
+
+    assert len(trader.query_cache) == 3
+    assert list(trader.query_cache)[-1][0] == 1
+    assert (2, "1m", ()) not in trader.query_cache
+    assert trader.get_data_last_n_hours(1) is first
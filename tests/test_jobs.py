@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from jobs import CANCELLED, DONE, FAILED, JobCancelled, JobScheduler
+from metrics import Metrics
+
+
+def slow_sum(job, values, calls, started=None):
+    calls.append(values)
+    if started is not None:
+        started.set()
+    total = 0
+    for n, value in enumerate(values):
+        job.report(n / len(values), f"{n}/{len(values)}")
+        time.sleep(0.02)
+        total += value
+    return total
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_job():
+    scheduler = JobScheduler(metrics=Metrics())
+    calls = []
+
+    first, joined_first = scheduler.submit("sum", (3,), slow_sum, [1, 2, 3], calls)
+    second, joined_second = scheduler.submit("sum", (3,), slow_sum, [1, 2, 3], calls)
+    other, _ = scheduler.submit("sum", (4,), slow_sum, [4], calls)
+
+    results = await asyncio.gather(
+        scheduler.result(first), scheduler.result(second), scheduler.result(other)
+    )
+
+    assert (joined_first, joined_second) == (False, True)
+    assert first is second and first is not other
+    assert results == [6, 6, 4]
+    assert len(calls) == 2
+    assert first.status == DONE and first.progress == 1.0
+    assert scheduler.metrics.counters["jobs.coalesced"] == 1
+
+    # Finished jobs no longer coalesce
+    again, joined = scheduler.submit("sum", (3,), slow_sum, [1, 2, 3], calls)
+    assert not joined
+    await scheduler.result(again)
+    scheduler.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_failure():
+    scheduler = JobScheduler(max_workers=1, metrics=Metrics())
+    calls = []
+    started = threading.Event()
+
+    running, _ = scheduler.submit(
+        "sum", (1,), slow_sum, list(range(100)), calls, started
+    )
+    queued, _ = scheduler.submit("sum", (2,), slow_sum, [1], calls)
+
+    await asyncio.get_running_loop().run_in_executor(None, started.wait)
+    assert scheduler.cancel(running.id)
+    assert scheduler.cancel(queued.id)
+
+    for job in (running, queued):
+        with pytest.raises(JobCancelled):
+            await scheduler.result(job)
+        assert job.status == CANCELLED
+    assert len(calls) == 1  # the queued job never started
+    assert not scheduler.cancel(running.id)
+
+    def broken(job):
+        raise ValueError("no data")
+
+    failed, _ = scheduler.submit("broken", (), broken)
+    with pytest.raises(ValueError):
+        await scheduler.result(failed)
+    assert failed.status == FAILED
+    assert "no data" in scheduler.format()
+    scheduler.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive():
+    scheduler = JobScheduler(metrics=Metrics())
+    job, _ = scheduler.submit("sum", (), slow_sum, list(range(15)), [])
+
+    ticks = 0
+    while not job.task.done():
+        await asyncio.sleep(0.01)
+        ticks += 1
+
+    assert await scheduler.result(job) == sum(range(15))
+    assert ticks > 10
+    scheduler.shutdown()
@@ -0,0 +1,68 @@
+import io
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest
+
+from bitget.utils import convert_to_dataframe
+from plot import LiveChart, live_chart, plot_candlestick_with_bollinger
+from tests.test_strategy import random_walk_candles
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return random_walk_candles(n=482)
+
+
+def test_only_changed_and_new_candles_are_rebuilt(candles):
+    chart = LiveChart()
+    assert chart.update(convert_to_dataframe(candles[:480])) == 480
+
+    # The window slides by one candle and the forming candle is updated
+    forming = list(candles[480])
+    forming[4] += 10
+    df = convert_to_dataframe(candles[1:480] + [forming])
+    assert chart.update(df) == 1
+    assert chart.update(df) == 0
+
+    assert len(chart.body_collection.get_paths()) == 480
+    x, y = chart.indicator_lines["RSI"].get_data()
+    assert len(x) == 480 and y[-1] == df["RSI"].iloc[-1]
+
+
+def test_refresh_is_faster_than_a_first_render(candles):
+    chart = LiveChart()
+    start = time.perf_counter()
+    first = chart.render(convert_to_dataframe(candles[:480]))
+    cold = time.perf_counter() - start
+
+    df = convert_to_dataframe(candles[1:481])
+    start = time.perf_counter()
+    refreshed = chart.render(df)
+    warm = time.perf_counter() - start
+
+    assert first.getvalue().startswith(PNG_MAGIC)
+    assert refreshed.getvalue() != first.getvalue()
+    assert warm < cold
+    # Unchanged candles reuse the last PNG
+    assert chart.render(df).getvalue() == refreshed.getvalue()
+
+
+def test_one_chart_per_symbol_and_timeframe():
+    assert live_chart("BTCUSDT", "1m") is live_chart("BTCUSDT", "1m")
+    assert live_chart("BTCUSDT", "5m") is not live_chart("BTCUSDT", "1m")
+
+
+def test_plot_renders_into_a_buffer(candles, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    buffer = io.BytesIO()
+    plot_candlestick_with_bollinger(
+        convert_to_dataframe(candles[:120]), save_path=buffer
+    )
+    assert buffer.getvalue().startswith(PNG_MAGIC)
+    assert list(tmp_path.iterdir()) == []
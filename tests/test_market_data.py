@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from bitget.candle_store import CandleStore
+from bitget.utils import (
+    calc_indicators,
+    convert_to_dataframe,
+    indicator_arrays,
+    indicator_frame,
+    run_backtest,
+)
+from kraken.trade_feed import rest_trades_frame
+from market_data import TRADE_COLUMNS, BitgetAdapter, KrakenAdapter, TradeBatch
+from tests.mock_kraken import make_trades, rest_trade, ws_trade
+from tests.test_strategy import random_walk_candles
+
+
+def bitget_rows(candles):
+    # As received from Bitget: strings, millisecond open times
+    return [
+        [str(int(candle[0]))] + [str(value) for value in candle[1:]]
+        for candle in candles
+    ]
+
+
+def test_bitget_batches_feed_the_store_and_backtest():
+    rows = bitget_rows(random_walk_candles(n=400, seed=2))
+    batch = BitgetAdapter.candles(rows)
+
+    frame = batch.to_frame()
+    assert list(frame.columns) == [
+        "Open",
+        "High",
+        "Low",
+        "Close",
+        "Volume",
+        "Timestamp",
+    ]
+    assert frame.index.name == "UnixTimestamp" and frame.index[0] == int(rows[0][0])
+    assert str(frame["Timestamp"].dt.tz) == "America/Los_Angeles"
+    assert frame["Close"].iloc[-1] == float(rows[-1][4])
+
+    from_rows, from_batch = CandleStore(), CandleStore()
+    from_rows.upsert(rows)
+    from_batch.upsert(batch[:300])
+    from_batch.upsert(batch[300:])
+    pd.testing.assert_frame_equal(from_batch.df, from_rows.df)
+
+    assert run_backtest(batch) == run_backtest(convert_to_dataframe(rows))
+
+
+def test_kraken_sources_normalize_to_the_same_trades():
+    trades = make_trades(50)
+    from_rest = KrakenAdapter.rest_trades([rest_trade(trade) for trade in trades])
+    from_ws = KrakenAdapter.ws_trades([ws_trade(trade) for trade in trades])
+    from_frame = KrakenAdapter.trades_frame(from_rest.to_frame())
+
+    for batch in [from_ws, from_frame]:
+        for name in ["timestamps", "price", "volume", "side", "trade_id", "market"]:
+            np.testing.assert_array_equal(
+                getattr(batch, name), getattr(from_rest, name)
+            )
+    assert from_rest.timestamps[1] - from_rest.timestamps[0] == 500_000_000
+
+
+def test_trade_candles_match_pandas_resample():
+    rng = np.random.default_rng(4)
+    count = 5000
+    seconds = 1695772800 + np.cumsum(
+        rng.exponential(3, count) * rng.choice([1, 80], count, p=[0.99, 0.01])
+    )
+    batch = TradeBatch(
+        np.round(seconds * 1e6).astype(np.int64) * 1000,
+        27000 + np.cumsum(rng.normal(0, 2, count)),
+        rng.uniform(0.001, 1, count),
+        rng.choice([1, -1], count),
+        np.arange(count),
+    )
+    candles = batch.to_candles(60_000)
+
+    prices = pd.Series(batch.price, index=pd.to_datetime(batch.timestamps))
+    expected = prices.resample("1min").ohlc()
+    volume = pd.Series(batch.volume, index=prices.index).resample("1min").sum()
+
+    assert np.isnan(candles.open).any()  # Some minutes had no trades
+    np.testing.assert_array_equal(candles.timestamps, expected.index.asi8 // 1_000_000)
+    for field in ["open", "high", "low", "close"]:
+        np.testing.assert_array_equal(
+            getattr(candles, field), expected[field].to_numpy()
+        )
+    np.testing.assert_allclose(candles.volume, volume.to_numpy(), rtol=1e-12)
+
+
+def test_indicators_take_arrays():
+    batch = BitgetAdapter.candles(bitget_rows(random_walk_candles(n=300, seed=5)))
+    arrays = indicator_arrays(batch.close, batch.high, batch.low, window_size=10)
+
+    frame = calc_indicators(batch.to_frame(), window_size=10)
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(values, frame[name].to_numpy())
+    pd.testing.assert_frame_equal(indicator_frame(batch, window_size=10), frame)
+    assert indicator_frame(frame) is frame
+
+
+def test_rest_trades_frame_keeps_misc():
+    rows = [rest_trade(trade) for trade in make_trades(5)]
+    rows[2][5] = "l"
+
+    df = rest_trades_frame(rows)
+    assert list(df.columns) == TRADE_COLUMNS
+    assert list(df["Misc"]) == ["", "", "l", "", ""]
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from bitget.message_bus import COALESCE, DROP_OLDEST, MessageBus
+from metrics import Metrics
+
+
+def drain(subscription):
+    messages = []
+    while True:
+        try:
+            messages.append(subscription.get_nowait())
+        except asyncio.QueueEmpty:
+            return messages
+
+
+def test_drop_oldest_keeps_memory_bounded():
+    bus = MessageBus(maxsize=3, policy=DROP_OLDEST, metrics=Metrics())
+    slow = bus.subscribe()
+
+    for i in range(5):
+        bus.publish(i)
+
+    assert slow.depth == 3
+    assert drain(slow) == [2, 3, 4]
+    assert slow.dropped == 2
+    assert bus.dropped == 2
+    assert len(bus.buffer) == 3
+
+
+def test_coalesce_keeps_latest_state_per_candle():
+    bus = MessageBus(maxsize=10, policy=COALESCE, metrics=Metrics())
+    fast, slow = bus.subscribe(), bus.subscribe()
+
+    bus.publish("c1 v1", key=("BTCUSDT", 1))
+    bus.publish("c1 v2", key=("BTCUSDT", 1))
+    assert drain(fast) == ["c1 v2"]
+
+    # fast already read candle 1, so its next state is appended, not replaced
+    bus.publish("c1 v3", key=("BTCUSDT", 1))
+    bus.publish("c2 v1", key=("BTCUSDT", 2))
+    bus.publish("c2 v2", key=("BTCUSDT", 2))
+    bus.publish("signal")
+
+    assert drain(fast) == ["c1 v3", "c2 v2", "signal"]
+    assert drain(slow) == ["c1 v2", "c1 v3", "c2 v2", "signal"]
+    assert bus.coalesced == 2
+
+
+@pytest.mark.asyncio
+async def test_subscribers_wake_on_publish():
+    bus = MessageBus(metrics=Metrics())
+    first, second = bus.subscribe(), bus.subscribe()
+
+    waiting = asyncio.gather(first.get(), second.get())
+    await asyncio.sleep(0)
+    bus.publish("Trigger condition met")
+
+    assert await waiting == ["Trigger condition met"] * 2
+    assert bus.depth == 0
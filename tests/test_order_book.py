@@ -0,0 +1,162 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+import websockets.exceptions
+
+import bitget.trader
+from bitget.bitget import BitGet
+from bitget.order_book import DepthJournal, OrderBook
+from bitget.strategy import BOOK_IMBALANCE, SPREAD_BPS, Strategy
+from bitget.trader import Trader
+from tests.test_strategy import random_walk_candles
+
+
+def book_message(ts, mid=27000.0, depth=15, channel="books15"):
+    bids = [[f"{mid - 0.5 - i * 0.5:.1f}", f"{1 + i * 0.1:.4f}"] for i in range(depth)]
+    asks = [[f"{mid + 0.5 + i * 0.5:.1f}", f"{2 + i * 0.1:.4f}"] for i in range(depth)]
+    return json.dumps(
+        {
+            "action": "snapshot",
+            "arg": {"instType": "mc", "channel": channel, "instId": "BTCUSDT"},
+            "data": [{"asks": asks, "bids": bids, "checksum": 0, "ts": str(ts)}],
+        }
+    )
+
+
+def test_features_and_short_books():
+    book = OrderBook(depth=5)
+    book.apply(json.loads(book_message(1000, depth=5))["data"][0])
+
+    assert book.mid() == 27000.0
+    assert book.spread() == 1.0
+    assert book.spread_bps() == pytest.approx(1 / 27000 * 10_000)
+    # Top 2: bids 1 + 1.1, asks 2 + 2.1
+    assert book.imbalance(2) == pytest.approx((2.1 - 4.1) / 6.2)
+
+    # A thinner snapshot clears the levels it no longer has
+    book.apply({"bids": [["26990", "3"]], "asks": [], "ts": "2000"})
+    assert book.best_bid() == 26990.0
+    assert np.isnan(book.bids[1:]).all() and np.isnan(book.best_ask())
+    assert book.imbalance() == 1.0
+
+
+def test_journal_round_trip(tmp_path):
+    path = tmp_path / "depth" / "BTCUSDT.books5"
+    book = OrderBook(depth=5, journal=DepthJournal(str(path), depth=5))
+    for ts in range(3):
+        book.apply(json.loads(book_message(ts, mid=27000 + ts, depth=5))["data"][0])
+    book.journal.close()
+
+    records = DepthJournal.read(path, depth=5)
+    assert list(records["timestamp"]) == [0, 1, 2]
+    np.testing.assert_allclose(records["bids"][2], book.bids)
+    assert path.stat().st_size == 3 * (8 + 2 * 5 * 2 * 4)
+
+
+@pytest.mark.asyncio
+async def test_listen_keeps_up_with_book_messages():
+    count = 2000
+    messages = [book_message(i, mid=27000 + i % 10) for i in range(count)]
+    ws = AsyncMock()
+    ws.recv.side_effect = messages + [
+        websockets.exceptions.ConnectionClosedOK(None, None)
+    ]
+
+    bitget = BitGet(book_channel="books15")
+    assert bitget.subscription_args()[1]["channel"] == "books15"
+
+    bids, asks = bitget.order_book.bids, bitget.order_book.asks
+    with pytest.raises(websockets.exceptions.ConnectionClosed):
+        await bitget.listen(ws)
+
+    assert bitget.order_book.updates == count
+    assert bitget.book_features()["timestamp"] == count - 1
+    assert bitget.book_features()["mid"] == 27000 + (count - 1) % 10
+    # Every message is written into the same preallocated arrays
+    assert bitget.order_book.bids is bids and bitget.order_book.asks is asks
+
+
+def candle_message(candles):
+    return json.dumps(
+        {
+            "action": "update",
+            "arg": {"instType": "mc", "channel": "candle1m", "instId": "BTCUSDT"},
+            "data": [[str(c[0]), *[str(v) for v in c[1:]]] for c in candles],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_trader_feeds_book_features_to_the_strategy():
+    strategy = Strategy("book", SPREAD_BPS < 1, BOOK_IMBALANCE < 0)
+    trader = Trader(strategy=strategy, book_channel="books5")
+    assert trader.subscription_args()[1]["channel"] == "books5"
+
+    candles = random_walk_candles(n=50, seed=7)
+    trader.candles.upsert(candles[:48])
+    trader.snapshot_received = True
+    trader.place_order = AsyncMock()
+
+    # Depth messages only update the book, never the candles
+    await trader.handle_message(book_message(1000, depth=5, channel="books5"))
+    assert trader.order_book.updates == 1 and len(trader.candles) == 48
+
+    # 1 bps spread: the closing candle triggers; more asks: the next one enters
+    await trader.handle_message(candle_message(candles[48:49]))
+    assert trader.strategy.armed
+    await trader.handle_message(candle_message(candles[49:50]))
+    trader.place_order.assert_awaited_once()
+
+    # Without a book (e.g. a backtest) the rules never hold
+    trigger, entry = strategy.masks(trader.df)
+    assert not trigger.any() and not entry.any()
+
+
+class OneShotSocket:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+
+@pytest.mark.asyncio
+async def test_trader_flushes_and_closes_the_depth_journal(tmp_path, monkeypatch):
+    path = tmp_path / "BTCUSDT.books5"
+    trader = Trader(book_channel="books5", journal_path=str(path))
+    trader.secret_key = "secret"
+
+    sockets = [OneShotSocket([book_message(1, depth=5, channel="books5")])]
+
+    async def connect(*args, **kwargs):
+        if sockets:
+            return sockets.pop()
+        raise OSError("down")
+
+    monkeypatch.setattr(bitget.trader.websockets, "connect", connect)
+    monkeypatch.setattr(bitget.trader, "RECONNECT_BACKOFF_MIN", 0.01)
+
+    task = asyncio.create_task(trader.connect())
+    for _ in range(100):
+        if not sockets:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+
+    # Flushed when the connection ended, while the journal is still open
+    assert not trader.order_book.journal.file.closed
+    assert list(DepthJournal.read(path, depth=5)["timestamp"]) == [1]
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert trader.order_book.journal.file.closed
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from bitget.order_client import (
+    ACKNOWLEDGED,
+    CANCELLED,
+    PROTECTIVE_RETRIES,
+    REJECTED,
+    BitGetOrderClient,
+)
+from bitget.rate_limiter import RateLimiter
+from bitget.trader import Trader
+from metrics import Metrics
+from tests.mock_bitget import MockBitGetExchange
+
+
+@pytest_asyncio.fixture
+async def exchange():
+    exchange = await MockBitGetExchange().start()
+    yield exchange
+    await exchange.stop()
+
+
+def make_client(exchange, secret_key="secret", pool_size=3):
+    return BitGetOrderClient(
+        "key",
+        secret_key,
+        "pass",
+        base_url=exchange.base_url,
+        rate_limiter=RateLimiter(),
+        metrics=Metrics(),
+        pool_size=pool_size,
+    )
+
+
+@pytest.mark.asyncio
+async def test_bracket_legs_are_signed_and_acknowledged(exchange):
+    client = make_client(exchange)
+    await client.warm_up()
+    try:
+        for _ in range(5):
+            bracket = await client.place_bracket(
+                "BTCUSDT_UMCBL", 0.01, 26900.0, 27100.0, signal_time=0
+            )
+            assert [order.status for order in bracket.orders] == [ACKNOWLEDGED] * 3
+    finally:
+        await client.close()
+
+    assert len(exchange.orders) == 5 and len(exchange.plans) == 10
+    plans = [
+        exchange.plans[bracket.stop.order_id],
+        exchange.plans[bracket.target.order_id],
+    ]
+    assert [(plan["planType"], plan["triggerPrice"]) for plan in plans] == [
+        ("loss_plan", "26900.0"),
+        ("profit_plan", "27100.0"),
+    ]
+
+    # Every request after the warm-up reused a pooled keep-alive connection
+    assert len(exchange.connections) <= 3
+    assert client.metrics.summary("orders.ack_ms")["count"] == 15
+    assert client.metrics.summary("orders.signal_to_ack_ms")["count"] == 5
+
+
+@pytest.mark.asyncio
+async def test_order_state_and_rejections(exchange):
+    exchange.reject.add("profit_plan")
+    client = make_client(exchange)
+    try:
+        bracket = await client.place_bracket("BTCUSDT_UMCBL", 0.01, 26900.0, 27100.0)
+        assert bracket.entry.status == ACKNOWLEDGED
+        assert bracket.target.status == REJECTED
+        assert "40808" in bracket.target.error
+        assert client.metrics.counters["orders.rejected"] == 1 + PROTECTIVE_RETRIES
+
+        # The unprotected position was closed and its stop cancelled
+        assert bracket.close.status == ACKNOWLEDGED
+        assert bracket.stop.status == CANCELLED
+        assert exchange.positions["BTCUSDT_UMCBL"] == 0
+        assert not exchange.plans
+
+        await client.refresh(bracket.entry)
+        assert bracket.entry.status == ACKNOWLEDGED
+        await client.cancel(bracket.entry)
+        exchange.orders[bracket.entry.order_id]["state"] = "canceled"
+        assert (await client.refresh(bracket.entry)).status == CANCELLED
+    finally:
+        await client.close()
+
+    # Requests with a wrong signature are refused
+    client = make_client(exchange, secret_key="wrong")
+    try:
+        bracket = await client.place_bracket("BTCUSDT_UMCBL", 0.01, 26900.0, 27100.0)
+    finally:
+        await client.close()
+    assert "40009" in bracket.entry.error
+    # Nothing to protect, so the plans are never sent
+    assert [bracket.stop.status, bracket.target.status] == [CANCELLED] * 2
+
+
+@pytest.mark.asyncio
+async def test_rejected_stop_never_leaves_an_open_position(exchange):
+    exchange.reject.add("loss_plan")
+    client = make_client(exchange)
+    try:
+        brackets = [
+            await client.place_bracket("BTCUSDT_UMCBL", 0.01, 26900.0, 27100.0)
+            for _ in range(3)
+        ]
+    finally:
+        await client.close()
+
+    for bracket in brackets:
+        assert bracket.stop.status == REJECTED
+        assert bracket.close.body["side"] == "close_long"
+        assert bracket.close.status == ACKNOWLEDGED
+    assert exchange.positions["BTCUSDT_UMCBL"] == 0
+    assert not exchange.plans  # The targets were cancelled with the positions
+    assert client.metrics.counters["orders.flattened"] == 3
+
+
+@pytest.mark.asyncio
+async def test_protective_legs_are_retried(exchange):
+    exchange.reject_times["loss_plan"] = PROTECTIVE_RETRIES
+    client = make_client(exchange)
+    try:
+        bracket = await client.place_bracket("BTCUSDT_UMCBL", 0.01, 26900.0, 27100.0)
+    finally:
+        await client.close()
+
+    assert bracket.stop.status == ACKNOWLEDGED and bracket.stop.error is None
+    assert bracket.close is None
+    assert exchange.positions["BTCUSDT_UMCBL"] == 0.01
+    assert exchange.plans[bracket.stop.order_id]["clientOid"] == bracket.stop.client_oid
+
+
+@pytest.mark.asyncio
+async def test_trader_sends_bracket_without_blocking(exchange):
+    client = make_client(exchange)
+    trader = Trader(order_client=client, order_size=0.01)
+    row = {"Close": 27000.0, "Bollinger_Lower_3": 26950.3}
+    try:
+        await trader.place_order({}, row)
+        assert trader.order_tasks  # Still in flight when place_order returns
+        await asyncio.gather(*trader.order_tasks)
+    finally:
+        await client.close()
+
+    (bracket,) = trader.brackets
+    # Rounded to the contract's 0.5 tick
+    assert bracket.stop.body["triggerPrice"] == "26950.5"
+    assert bracket.target.body["triggerPrice"] == "27049.5"
+    assert bracket.signal_to_ack_ms() is not None
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from bitget.paper import OPEN, STOPPED, TARGET, PaperTrader
+from bitget.trader import Trader
+
+
+def entry_row(close, stop):
+    return {"Close": close, "Bollinger_Lower_3": stop}
+
+
+def test_positions_settle_like_a_brute_force_replay():
+    rng = np.random.default_rng(3)
+    paper = PaperTrader(capacity=4)  # Forces the arrays to grow
+    expected = []  # [book, size, entry, stop, target, status, exit]
+    price = {"BTCUSDT": 27000.0, "ETHUSDT": 1600.0}
+
+    for tick in range(2000):
+        symbol = ["BTCUSDT", "ETHUSDT"][tick % 2]
+        price[symbol] *= 1 + rng.normal(0, 0.002)
+        close = price[symbol]
+
+        if rng.random() < 0.1:
+            strategy = ["reversal", "breakout"][rng.integers(2)]
+            stop = close * (1 - rng.uniform(0.002, 0.01))
+            size = float(rng.integers(1, 4))
+            paper.open(symbol, strategy, entry_row(close, stop), size=size)
+            book = paper.book_id(symbol, strategy)
+            expected.append([book, size, close, stop, 2 * close - stop, OPEN, np.nan])
+            continue
+
+        high = close * (1 + abs(rng.normal(0, 0.002)))
+        low = close * (1 - abs(rng.normal(0, 0.002)))
+        paper.mark(symbol, high, low, close, timestamp=tick)
+
+        for position in expected:
+            if paper.books[position[0]][0] != symbol or position[5] != OPEN:
+                continue
+            if low <= position[3]:
+                position[5:] = [STOPPED, position[3]]
+            elif high >= position[4]:
+                position[5:] = [TARGET, position[4]]
+
+    expected = np.array(expected)
+    assert paper.count == len(expected)
+    np.testing.assert_array_equal(paper.status[: paper.count], expected[:, 5])
+    np.testing.assert_allclose(paper.exit[: paper.count], expected[:, 6])
+    assert {STOPPED, TARGET, OPEN} <= set(paper.status[: paper.count])
+
+    for book in range(len(paper.books)):
+        mine = expected[expected[:, 0] == book]
+        closed = mine[mine[:, 5] != OPEN]
+        still_open = mine[mine[:, 5] == OPEN]
+        assert paper.realized[book] == pytest.approx(
+            np.sum((closed[:, 6] - closed[:, 2]) * closed[:, 1])
+        )
+        last = paper.last_price[book]
+        assert paper.unrealized()[book] == pytest.approx(
+            np.sum((last - still_open[:, 2]) * still_open[:, 1])
+        )
+
+    summary = paper.summary()
+    assert sum(row["open"] + row["wins"] + row["losses"] for row in summary) == len(
+        expected
+    )
+    assert paper.format().splitlines()[-1].startswith("Total: ")
+
+
+def test_ticks_inside_every_bracket_do_not_scan_positions(monkeypatch):
+    paper = PaperTrader()
+    for i in range(500):
+        paper.open("BTCUSDT", "reversal", entry_row(27000.0 + i % 10, 26900.0))
+
+    settled = []
+    monkeypatch.setattr(paper, "_settle", lambda *args: settled.append(args) or 0)
+    for _ in range(100):
+        paper.mark("BTCUSDT", 27050.0, 26950.0, 27000.0)
+    assert settled == []
+
+    paper.mark("BTCUSDT", 27050.0, 26899.0, 26950.0)
+    assert len(settled) == 1
+
+
+@pytest.mark.asyncio
+async def test_trader_opens_and_marks_paper_positions():
+    paper = PaperTrader()
+    trader = Trader(paper=paper)
+
+    await trader.place_order({}, entry_row(27000.0, 26950.0))
+    assert paper.count == 1 and paper.open_size[0] == 1.0
+
+    candle = ["1695772860000", "27000", "27060", "26990", "27045", "3"]
+    await trader.handle_update({"data": [candle]})
+
+    assert paper.status[0] == TARGET
+    assert paper.realized[0] == 50.0
+    assert "1W/0L" in paper.format()
@@ -0,0 +1,52 @@
+import asyncio
+import pytest
+from bitget.rate_limiter import RateLimiter, SlidingWindowCounter
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_expires_old_events():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(limit=3, window=60, buckets=6, clock=clock)
+
+    counter.record()
+    clock.now = 30
+    counter.record(2)
+    assert counter.remaining() == 0
+    assert counter.wait_time() > 0
+
+    # The first event leaves the window (plus one bucket of slack)
+    clock.now = 71
+    assert counter.remaining() == 1
+    assert counter.wait_time() == 0
+
+    clock.now = 1000
+    assert counter.used() == 0
+
+
+def test_wait_time_rejects_weight_above_limit():
+    counter = SlidingWindowCounter(limit=2, window=1)
+    with pytest.raises(ValueError):
+        counter.wait_time(3)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_a_slot():
+    limiter = RateLimiter(limits={"connections": (2, 0.2)})
+
+    await limiter.acquire("connections")
+    await limiter.acquire("connections")
+    assert limiter.remaining("connections") == 0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.acquire("connections")
+
+    assert loop.time() - start > 0.1
+    assert limiter.remaining() == {"connections": 1}
@@ -0,0 +1,89 @@
+import asyncio
+import numpy as np
+import pytest
+
+import bitget.trader
+from bitget.candle_store import CandleStore
+from bitget.rest_client import BitGetRestClient
+from bitget.trader import Trader
+from bitget.utils import convert_to_dataframe
+from tests.mock_bitget import (
+    CANDLE_INTERVAL_MS,
+    MockBitGetServer,
+    MockBitGetStream,
+    make_candles,
+)
+
+START = 1695772800000
+INDICATOR_COLUMNS = ["SMA", "Rolling_STD", "Bollinger_Lower_2", "RSI", "Stochastic"]
+
+
+def test_upsert_matches_full_recompute():
+    candles = make_candles(START, 120)
+    store = CandleStore()
+
+    store.upsert(candles[:80])
+    store.upsert(candles[70:100])  # overlapping page
+    store.upsert(candles[100:])
+    revised = list(candles[-1])
+    revised[4] = "27100.0"  # the forming candle moves
+    recomputed = store.upsert([revised])
+
+    expected = convert_to_dataframe(candles[:-1] + [revised])
+
+    assert recomputed <= 21
+    assert list(store.df.index) == list(expected.index)
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            store.df[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9
+        )
+
+
+def test_find_gap():
+    store = CandleStore()
+    store.upsert(make_candles(START, 10))
+
+    contiguous = make_candles(START + 10 * CANDLE_INTERVAL_MS, 5)
+    assert store.find_gap(contiguous) is None
+
+    later = make_candles(START + 15 * CANDLE_INTERVAL_MS, 5)
+    assert store.find_gap(later) == (
+        START + 10 * CANDLE_INTERVAL_MS,
+        START + 14 * CANDLE_INTERVAL_MS,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reconnect_backfills_missed_candles(monkeypatch):
+    monkeypatch.setattr(bitget.trader, "RECONNECT_BACKOFF_MIN", 0.01)
+
+    history = make_candles(START, 60)
+    server = await MockBitGetServer(history).start()
+    # The second connection's snapshot starts 20 candles after the first ends
+    stream = await MockBitGetStream([history[:30], history[50:]]).start()
+
+    trader = Trader(rest_client=BitGetRestClient(base_url=server.base_url))
+    trader.secret_key = "secret"
+    trader.uri = stream.uri
+    trader.timeframes_seeded = True  # only the gap backfill should hit REST
+
+    task = asyncio.create_task(trader.connect())
+    for _ in range(200):
+        if trader.df is not None and len(trader.df) == 60:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    await trader.rest_client.close()
+    await stream.stop()
+    await server.stop()
+
+    assert stream.connections >= 2
+    assert len(server.requests) == 1
+    assert list(trader.df.index) == [int(candle[0]) for candle in history]
+
+    expected = convert_to_dataframe(history)
+    np.testing.assert_allclose(
+        trader.df["RSI"].to_numpy(), expected["RSI"].to_numpy(), rtol=1e-9
+    )
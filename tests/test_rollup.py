@@ -0,0 +1,61 @@
+import numpy as np
+
+from bitget.candle_store import CandleStore
+from bitget.rollup import CandleRollup
+from bitget.utils import convert_to_dataframe
+from tests.mock_bitget import make_candles
+
+START = 1695772800000  # 4h aligned
+
+
+def resample(candles, interval):
+    buckets = {}
+    for ts, o, h, l, c, v in candles:
+        ts, o, h, l, c, v = int(ts), *map(float, (o, h, l, c, v))
+        bucket = ts - ts % interval
+        if bucket not in buckets:
+            buckets[bucket] = [bucket, o, h, l, c, v]
+        else:
+            row = buckets[bucket]
+            row[2], row[3], row[4] = max(row[2], h), min(row[3], l), c
+            row[5] += v
+    return list(buckets.values())
+
+
+def test_incremental_rollup_matches_resampling():
+    candles = make_candles(START, 420)
+    store = CandleStore()
+    rollup = CandleRollup(store, timeframes=("5m", "1h"))
+
+    store.upsert(candles[:300])  # snapshot: bulk rebuild
+    for candle in candles[300:]:
+        # the forming candle is revised before the next one starts
+        early = list(candle)
+        early[4] = early[1]
+        store.upsert([early])
+        store.upsert([candle])
+
+    for tf, interval in (("5m", 300_000), ("1h", 3_600_000)):
+        expected = convert_to_dataframe(resample(candles, interval))
+        df = rollup.frame(tf)
+
+        assert list(df.index) == list(expected.index)
+        np.testing.assert_allclose(df["Close"], expected["Close"])
+        np.testing.assert_allclose(df["Volume"], expected["Volume"])
+        np.testing.assert_allclose(df["SMA"], expected["SMA"], rtol=1e-9)
+
+
+def test_closed_buckets_are_reported_once():
+    candles = make_candles(START, 11)
+    store = CandleStore()
+    rollup = CandleRollup(store, timeframes=("5m",))
+
+    for candle in candles[:5]:
+        store.upsert([candle])
+    assert not rollup.pop_closed("5m")
+
+    store.upsert([candles[5]])
+    assert rollup.pop_closed("5m")
+    assert not rollup.pop_closed("5m")
+    # Closing a bucket writes it to the store without a read
+    assert len(rollup.stores["5m"]) == 1
@@ -0,0 +1,84 @@
+import timeit
+
+import numpy as np
+import pytest
+
+from bitget.scanner import Scanner
+from bitget.strategy import BOLLINGER_REVERSAL, RSI, STOCHASTIC
+from bitget.utils import convert_to_dataframe
+from tests.test_strategy import random_walk_candles
+
+
+@pytest.fixture(scope="module")
+def df():
+    return convert_to_dataframe(random_walk_candles())
+
+
+@pytest.fixture(scope="module")
+def masks(df):
+    return BOLLINGER_REVERSAL.masks(df)
+
+
+def scan_every_candle(df, masks):
+    """A scanner with one "symbol" per candle of `df`, as if it were forming."""
+    trigger, _ = masks
+    scanner = Scanner()
+    for end in range(2, len(df) + 1):
+        scanner.update(f"S{end}", df.iloc[end - 2 : end], armed=trigger[end - 2])
+    return scanner
+
+
+def test_scan_matches_the_backtest_masks(df, masks):
+    trigger, entry = masks
+    scanner = scan_every_candle(df, masks)
+
+    scanned_trigger, scanned_entry, distance = scanner.scan()
+
+    assert scanned_trigger.tolist() == trigger[1:].tolist()
+    assert scanned_entry.tolist() == entry[1:].tolist()
+    assert scanned_entry.any()
+    # Met exactly where the distance is zero; unknown while warming up
+    assert ((distance == 0) == scanned_trigger).all()
+    assert np.isinf(distance[:10]).all()
+
+
+def test_strict_comparisons_of_equal_values_are_not_at_the_trigger():
+    row = {"RSI": np.array([29.0, 30.0, 31.0, np.nan]), "Stochastic": np.zeros(4)}
+
+    distance = (RSI < 30).distance(row, row)
+    assert distance[0] == 0
+    assert 0 < distance[1] < distance[2]
+    assert np.isinf(distance[3])
+    # Equal to a threshold of 0, where the relative gap is 0 / 0
+    assert ((STOCHASTIC > 0).distance(row, row) > 0).all()
+    assert (RSI <= 30).distance(row, row)[1] == 0
+
+
+def test_rank_puts_triggered_symbols_first(df, masks):
+    scanner = scan_every_candle(df, masks)
+    rows = scanner.rank()
+
+    distances = [row["distance"] for row in rows]
+    assert distances == sorted(distances)
+    n_triggered = int(masks[0][1:].sum())
+    assert all(row["trigger"] for row in rows[:n_triggered])
+    assert not rows[n_triggered]["trigger"]
+    assert len(scanner.format(top=5).splitlines()) == 5
+
+
+def test_merged_snapshots_update_in_place(df, masks):
+    worker = scan_every_candle(df.iloc[:50], masks)
+    merged = Scanner(capacity=4)
+    merged.merge(worker.snapshot())
+    merged.merge(worker.snapshot())
+
+    assert merged.symbols == worker.symbols
+    for a, b in zip(merged.scan(), worker.scan()):
+        assert a.tolist() == b.tolist()
+
+
+def test_scanning_500_symbols_is_fast(df, masks):
+    scanner = scan_every_candle(df.iloc[:501], masks)
+    assert len(scanner) == 500
+    seconds = min(timeit.repeat(scanner.scan, number=20, repeat=5)) / 20
+    assert seconds < 0.001
@@ -0,0 +1,75 @@
+import multiprocessing
+import uuid
+
+import numpy as np
+
+from bitget.candle_store import CandleStore
+from bitget.shared_feed import SharedCandleFeed, SharedCandleReader
+from tests.mock_bitget import make_candles
+
+START = 1695772800000
+
+
+def read_closes(name, n, results):
+    reader = SharedCandleReader(name)
+    results.put(reader.read(n)["Close"].tolist())
+    reader.close()
+
+
+def test_reader_sees_store_updates():
+    feed = SharedCandleFeed(f"test_feed_{uuid.uuid4().hex[:8]}", capacity=50)
+    reader = SharedCandleReader(feed.name)
+    try:
+        store = CandleStore()
+        store.listeners.append(feed.publish)
+
+        candles = make_candles(START, 80)
+        store.upsert(candles[:60])
+        version = reader.version
+
+        revised = list(candles[59])
+        revised[4] = "30000.0"
+        store.upsert([revised] + candles[60:])
+
+        assert reader.version > version
+        df = reader.read()
+        assert len(df) == 50  # ring capacity
+        assert list(df.index) == list(store.df.index[-50:])
+        assert df.loc[int(revised[0]), "Close"] == 30000.0
+        np.testing.assert_allclose(df["RSI"], store.df["RSI"].iloc[-50:])
+
+        # A second process reads the same rows without any pickled payload
+        results = multiprocessing.get_context("spawn").Queue()
+        worker = multiprocessing.get_context("spawn").Process(
+            target=read_closes, args=(feed.name, 5, results)
+        )
+        worker.start()
+        worker.join(30)
+        assert results.get(timeout=5) == store.df["Close"].iloc[-5:].tolist()
+    finally:
+        reader.close()
+        feed.close()
+        feed.unlink()
+
+
+def test_stale_block_from_a_crashed_writer_is_replaced():
+    from multiprocessing import shared_memory
+
+    name = f"test_feed_{uuid.uuid4().hex[:8]}"
+    # A writer that died without unlinking its block
+    stale = shared_memory.SharedMemory(name=name, create=True, size=64)
+    stale.close()
+
+    feed = SharedCandleFeed(name, capacity=50)
+    reader = SharedCandleReader(name)
+    try:
+        store = CandleStore()
+        store.listeners.append(feed.publish)
+        store.upsert(make_candles(START, 10))
+
+        assert reader.capacity == 50
+        assert list(reader.read().index) == list(store.df.index)
+    finally:
+        reader.close()
+        feed.close()
+        feed.unlink()
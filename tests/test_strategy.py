@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from bitget.strategy import (
+    BOLLINGER_LOWER_2,
+    BOLLINGER_REVERSAL,
+    CLOSE,
+    RSI,
+    STOCHASTIC,
+    touch,
+)
+from bitget.utils import (
+    check_entry_conditions,
+    check_trigger_conditions,
+    convert_to_dataframe,
+    run_backtest,
+)
+
+START = 1695772800000
+
+
+def random_walk_candles(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    closes = 27000 + np.cumsum(rng.normal(0, 15, n))
+    candles = []
+    for i, close in enumerate(closes):
+        open_ = closes[i - 1] if i else close
+        high = max(open_, close) + abs(rng.normal(0, 5))
+        low = min(open_, close) - abs(rng.normal(0, 5))
+        candles.append([str(START + i * 60_000), open_, high, low, close, 1.0])
+    return candles
+
+
+@pytest.fixture(scope="module")
+def df():
+    return convert_to_dataframe(random_walk_candles())
+
+
+def test_rule_mask_matches_row_evaluation(df):
+    rule = touch(BOLLINGER_LOWER_2) & ((RSI < 20) | (STOCHASTIC < 20)) & ~(CLOSE > 1e9)
+    rows = df.to_dict("records")
+
+    mask = rule.mask(df)
+    expected = [rule.evaluate(row, prev) for prev, row in zip([None] + rows, rows)]
+
+    assert mask.tolist() == expected
+    assert mask.any()
+
+
+def test_vectorized_and_live_paths_agree(df):
+    trigger, entry = BOLLINGER_REVERSAL.masks(df)
+
+    live = BOLLINGER_REVERSAL.live()
+    live_signals = [live.on_candle(row) for row in df.to_dict("records")]
+
+    assert trigger.tolist() == [t for t, _ in live_signals]
+    assert entry.tolist() == [e for _, e in live_signals]
+    assert entry.sum() > 0
+
+
+def test_backtest_matches_per_candle_checks(df):
+    window = df.iloc[:1500]
+
+    # Reference: walk the window candle by candle with the check functions
+    expected, armed = [], False
+    for i in range(1, len(window)):
+        temp_df = window.iloc[: i + 1]
+        if armed and check_entry_conditions(temp_df)[0]:
+            expected.append(temp_df.iloc[-1]["Timestamp"])
+        armed = check_trigger_conditions(temp_df)[0]
+
+    results = run_backtest(window)
+    entries = [event for event in results if event["event"] == "entry"]
+
+    assert [event["timestamp"] for event in entries] == expected
+    assert entries[0]["conditions"]["stochastic_cross"]
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import bitget.supervisor
+from bitget.supervisor import Supervisor, WorkerChannel, shard_symbols
+from bitget.trader import Trader
+from metrics import Metrics
+from tests.test_strategy import random_walk_candles
+
+
+def crashing_worker(worker_id, symbols, conn, states, n_workers):
+    """Checkpoints and crashes on its first run, reports its state after a restart."""
+    channel = WorkerChannel(conn)
+    channel.metrics({"counters": {"ticks": len(symbols)}, "gauges": {}, "samples": {}})
+    if not states:
+        for symbol in symbols:
+            channel.checkpoint(symbol, {"worker": worker_id, "symbol": symbol})
+        os._exit(1)
+
+    for symbol in symbols:
+        channel.alert(symbol, f"restored {states[symbol]['symbol']}")
+    time.sleep(60)  # Until stopped
+
+
+def test_shards_are_balanced():
+    symbols = [f"S{i}USDT" for i in range(11)]
+    shards = shard_symbols(symbols, 4)
+    assert sorted(sum(shards, [])) == sorted(symbols)
+    assert [len(shard) for shard in shards] == [3, 3, 3, 2]
+    assert shard_symbols(["BTCUSDT"], 8) == [["BTCUSDT"]]
+
+
+@pytest.mark.asyncio
+async def test_crashed_workers_restart_with_their_state(monkeypatch):
+    monkeypatch.setattr(bitget.supervisor, "RESTART_BACKOFF_MIN", 0.05)
+    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    alerts = []
+    supervisor = Supervisor(
+        symbols,
+        workers=2,
+        on_alert=alerts.append,
+        target=crashing_worker,
+        metrics=Metrics(),
+    )
+
+    supervisor.start()
+    try:
+        for _ in range(300):
+            if len(alerts) == len(symbols):
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        supervisor.stop()
+
+    assert sorted(alerts) == sorted(f"[{s}] restored {s}" for s in symbols)
+    assert [worker.restarts for worker in supervisor.workers] == [1, 1]
+    assert supervisor.metrics.counters["supervisor.restarts"] == 2
+    assert supervisor.metrics.gauges["worker0.ticks"] == 2
+    assert set(supervisor.states) == set(symbols)
+    assert "worker 1" in supervisor.format()
+
+
+def test_trader_checkpoint_round_trip():
+    candles = random_walk_candles(n=400, seed=8)
+    trader = Trader(symbol="ETHUSDT")
+    trader.candles.upsert(candles)
+    trader.strategy.armed = True
+    trader.last_evaluated_timestamp = int(candles[-2][0])
+
+    restored = Trader(symbol="ETHUSDT")
+    restored.restore(trader.checkpoint(candles=300))
+
+    assert len(restored.df) == 300
+    assert restored.df.index[-1] == trader.df.index[-1]
+    assert restored.df["Close"].iloc[-1] == trader.df["Close"].iloc[-1]
+    assert restored.strategy.armed and restored.trigger_conditions_met
+    assert restored.last_evaluated_timestamp == int(candles[-2][0])
+
+
+def options_worker(worker_id, symbols, conn, states, n_workers, **options):
+    WorkerChannel(conn).alert(symbols[0], repr(sorted(options.items())))
+    time.sleep(60)  # Until stopped
+
+
+@pytest.mark.asyncio
+async def test_trader_options_reach_the_workers(monkeypatch, tmp_path):
+    alerts = []
+    options = {"book_channel": "books5", "order_size": "0.01"}
+    supervisor = Supervisor(
+        ["BTCUSDT"],
+        on_alert=alerts.append,
+        target=options_worker,
+        metrics=Metrics(),
+        options=options,
+    )
+    supervisor.start()
+    try:
+        for _ in range(300):
+            if alerts:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        supervisor.stop()
+    assert alerts == [f"[BTCUSDT] {sorted(options.items())!r}"]
+
+    # ...and the worker builds its Traders with them
+    traders = []
+
+    async def connect(self):
+        traders.append(self)
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(Trader, "connect", connect)
+    journal = str(tmp_path / "depth")
+    task = asyncio.create_task(
+        bitget.supervisor.worker_main(
+            0,
+            ["BTCUSDT", "ETHUSDT"],
+            WorkerChannel(None),  # Nothing is reported before the first scan
+            {},
+            1,
+            book_channel="books5",
+            journal_path=journal,
+        )
+    )
+    for _ in range(100):
+        if len(traders) == 2:
+            break
+        await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [trader.book_channel for trader in traders] == ["books5"] * 2
+    assert traders[1].order_book.journal.path == f"{journal}.ETHUSDT"
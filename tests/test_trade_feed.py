@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import kraken.trade_feed
+from kraken.trade_feed import KrakenTradeFeed
+from market_data import TRADE_COLUMNS, TradeBatch
+from tests.mock_kraken import START, MockKraken, make_trades
+
+
+@pytest.mark.asyncio
+async def test_reconnect_catches_up_over_rest(monkeypatch):
+    monkeypatch.setattr(kraken.trade_feed, "REST_PAGE_SIZE", 10)
+    monkeypatch.setattr(kraken.trade_feed, "RECONNECT_BACKOFF_MIN", 0.01)
+
+    trades = make_trades(100)
+    # The first connection drops after trade 50; trades 51-60 are only on REST
+    sessions = [[range(41, 46), range(46, 51)], [range(61, 66), range(66, 76)]]
+    server = await MockKraken(trades, sessions, page_size=10).start()
+
+    batches = []
+    feed = KrakenTradeFeed(
+        batches.append,
+        since=START + 30 * 0.5,  # Trade 30
+        uri=server.uri,
+        rest_url=server.rest_url,
+        page_delay=0,
+    )
+    try:
+        await asyncio.wait_for(feed.run(until=START + 70 * 0.5), timeout=10)
+    finally:
+        await server.stop()
+
+    delivered = TradeBatch.concat(batches).to_frame()
+    assert list(delivered.columns) == TRADE_COLUMNS
+    assert list(delivered["TradeID"]) == list(range(30, 76))
+    assert server.connections == 2
+    assert len(server.rest_requests) >= 3  # Paged catch-ups after each connect
+    assert server.subscriptions[0]["params"]["channel"] == "trade"
+
+    # Websocket and REST trades normalize to the same values
+    first = trades[29]
+    row = delivered.iloc[0]
+    assert (row["Price"], row["Volume"], row["Buy/Sell"]) == (
+        first["price"],
+        first["qty"],
+        first["side"][0],
+    )
+    ws_row = delivered[delivered["TradeID"] == 70].iloc[0]
+    assert ws_row["Timestamp"] == pytest.approx(trades[69]["time"], abs=1e-6)
+    assert ws_row["Market/Limit"] == trades[69]["ord_type"][0]
+
+
+@pytest.mark.asyncio
+async def test_live_only_feed_skips_rest():
+    trades = make_trades(20)
+    server = await MockKraken(trades, [[range(1, 5), range(5, 11)]]).start()
+
+    batches = []
+    feed = KrakenTradeFeed(batches.append, uri=server.uri, rest_url=server.rest_url)
+    try:
+        await asyncio.wait_for(feed.run(until=START + 10 * 0.5), timeout=10)
+    finally:
+        await server.stop()
+
+    assert list(TradeBatch.concat(batches).trade_id) == list(range(1, 11))
+    assert server.rest_requests == []
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from kraken.trade_flow import TradeFlow, VolumeProfile
+
+START = 1696377600  # 00:00 UTC
+
+
+def make_trades(count, seed=0, start=START, step=7.3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Price": 27000 + np.cumsum(rng.normal(0, 5, count)),
+            "Volume": rng.uniform(0.001, 0.5, count),
+            "Timestamp": start + np.arange(count) * step,
+            "Buy/Sell": rng.choice(["b", "s"], count),
+            "Market/Limit": "m",
+            "Misc": "",
+            "TradeID": np.arange(count),
+        }
+    )
+
+
+def test_batches_match_reference():
+    # Spans a session boundary at midnight UTC
+    trades = make_trades(20000, start=START + 86400 - 20000 * 3, step=4.1)
+
+    flow = TradeFlow(candle_seconds=60, max_candles=5000)
+    for bounds in np.array_split(np.arange(len(trades)), 37):
+        flow.update(trades.iloc[bounds])
+    result = flow.frame()
+
+    ts = trades["Timestamp"]
+    pv = trades["Price"] * trades["Volume"]
+    session = ts // 86400
+    vwap = pv.groupby(session).cumsum() / trades["Volume"].groupby(session).cumsum()
+    candle = (ts // 60 * 60).astype("int64")
+    is_buy = trades["Buy/Sell"] == "b"
+
+    expected_vwap = vwap.groupby(candle).last()
+    expected_delta = trades["Volume"].where(is_buy, -trades["Volume"]).groupby(candle)
+
+    assert list(result.index) == list(
+        pd.to_datetime(expected_vwap.index, unit="s", utc=True)
+    )
+    np.testing.assert_allclose(result["VWAP"], expected_vwap, rtol=1e-9)
+    np.testing.assert_allclose(result["Delta"], expected_delta.sum(), atol=1e-9)
+    np.testing.assert_allclose(
+        result["Cumulative_Delta"], expected_delta.sum().cumsum(), atol=1e-6
+    )
+
+
+def test_volume_profile_grows_without_losing_volume():
+    profile = VolumeProfile(n_bins=50, bin_width=1.0)
+    prices = np.array([100.0, 101.5, 90.0, 300.0, 5.0])
+    volumes = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    is_buy = np.array([True, False, True, False, True])
+
+    profile.add(prices[:2], volumes[:2], is_buy[:2])
+    assert profile.bin_width == 1.0
+    profile.add(prices[2:], volumes[2:], is_buy[2:])
+
+    assert len(profile.buy_volume) == 50
+    assert profile.low <= 5.0 < 300.0 < profile.high
+    assert profile.buy_volume.sum() == 9.0
+    assert profile.sell_volume.sum() == 6.0
+    assert abs(profile.point_of_control() - 5.0) <= profile.bin_width
+
+
+def test_memory_is_bounded():
+    flow = TradeFlow(candle_seconds=60, max_candles=100)
+    for day in range(3):
+        flow.update(make_trades(5000, seed=day, start=START + day * 86400, step=17))
+
+    assert len(flow.candles) == 100
+    assert len(flow.profile.buy_volume) == flow.profile.n_bins
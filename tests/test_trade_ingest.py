@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from kraken.trade_ingest import TradeIdIndex, TradeIngest
+
+
+def make_page(first, last):
+    ids = np.arange(first, last + 1)
+    return pd.DataFrame(
+        {"Price": 27000.0 + ids, "Timestamp": 1695772800 + ids, "TradeID": ids}
+    )
+
+
+def test_index_merges_runs_and_reports_gaps():
+    index = TradeIdIndex()
+    index.add([5, 6, 7, 20, 21])
+    index.add([8, 9, 30])
+    index.add([10, 11, 12, 19])
+
+    assert list(zip(index.starts, index.ends)) == [(5, 12), (19, 21), (30, 30)]
+    assert index.gaps() == [(13, 18), (22, 29)]
+    assert len(index) == 12
+    assert list(index.contains([4, 5, 12, 13, 19, 25, 30, 31])) == [
+        False,
+        True,
+        True,
+        False,
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_overlapping_pages_keep_each_trade_once():
+    ingest = TradeIngest()
+    # Pages overlap on their edges, arrive out of order and repeat rows
+    pages = [make_page(1000, 1999), make_page(2990, 3999), make_page(1990, 3000)]
+    pages.append(pd.concat([make_page(3500, 3510)] * 2))
+
+    stored = pd.concat([ingest.add(page) for page in pages])
+
+    assert sorted(stored["TradeID"]) == list(range(1000, 4000))
+    assert ingest.duplicates == 10 + 11 + 22
+    assert ingest.index.gaps() == []
+    assert len(ingest.index.starts) == 1
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from bitget.utils import (
+    calc_indicators_local,
+    candles_to_frame,
+    convert_to_dataframe,
+    run_backtest,
+)
+from bitget.walk_forward import HALO, make_shards, walk_forward
+from tests.test_strategy import random_walk_candles
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return candles_to_frame(random_walk_candles(n=6000, seed=11))
+
+
+def test_local_indicators_match_pandas(candles):
+    local = calc_indicators_local(candles.copy())
+    expected = convert_to_dataframe(random_walk_candles(n=6000, seed=11))
+
+    for column in ["SMA", "Bollinger_Lower_2", "RSI", "Stochastic"]:
+        np.testing.assert_allclose(local[column], expected[column], rtol=1e-9)
+
+
+def test_make_shards():
+    assert make_shards(100, 40) == [
+        (0, 0, 40),
+        (40 - HALO, 40, 80),
+        (80 - HALO, 80, 100),
+    ]
+
+
+@pytest.mark.parametrize("shard_size,workers", [(50, 1), (997, 1), (1440, 2)])
+def test_shards_match_sequential_run(candles, shard_size, workers):
+    sequential = run_backtest(calc_indicators_local(candles.copy()))
+    events, summaries = walk_forward(candles, shard_size=shard_size, workers=workers)
+
+    assert len(sequential) > 20
+    assert events == sequential
+    assert sum(summary["candles"] for summary in summaries) == len(candles)
+    assert sum(summary["entries"] for summary in summaries) == len(events) // 2